@@ -5,19 +5,23 @@ configuration
 import errno
 import os
 import logging
-import subprocess
 import pwd
 import shutil
 import stat
 import re
 
 from osg_configure.modules import utilities
+from osg_configure.modules import configeditor
+from osg_configure.modules import runner
 from osg_configure.modules import configfile
 from osg_configure.modules import validation
 from osg_configure.modules.jobmanagerconfiguration import JobManagerConfiguration
 
 __all__ = ['BoscoConfiguration']
 
+# number of seconds bosco_cluster may take to install the remote cluster
+BOSCO_INSTALL_TIMEOUT = 1800
+
 
 class BoscoConfiguration(JobManagerConfiguration):
     """Class to handle attributes related to Bosco job manager configuration"""
@@ -193,7 +197,11 @@ class BoscoConfiguration(JobManagerConfiguration):
         """
         Install Bosco on the remote cluster for a given username
         """
-        
+
+        if utilities.get_root() is not None:
+            self.log("Rendering into %s, not installing Bosco for %s" % (utilities.get_root(), username))
+            return True
+
         # First, get the uid of the username so we can seteuid
         try:
             user_info = pwd.getpwnam(username)
@@ -250,13 +258,6 @@ Host %(host)s
                 os.chown(os.path.join(root, momo), user_uid, user_gid)
         os.chown(path, user_uid, user_gid)
                 
-        # Function to demote to a specified uid and gid
-        def demote(user_uid, user_gid):
-            def result():
-                os.setgid(user_gid)
-                os.setuid(user_uid)
-            return result
-        
         try:
 
             # Set the user home directory
@@ -271,10 +272,18 @@ Host %(host)s
                 'rms': self.options['batch'].value}
                 
             self.log("Bosco command to execute: %s" % install_cmd)
-            process = subprocess.Popen(install_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True,
-                                       preexec_fn = demote(user_uid, user_gid), env=env)
-            (stdout, stderr) = process.communicate()
-            returncode = process.wait()
+            # runuser switches to the user instead of a preexec_fn, since
+            # Python code run between fork and exec can deadlock once other
+            # threads are running
+            result = runner.run(['runuser', '-s', '/bin/sh', '-c', install_cmd, user_name],
+                                timeout=BOSCO_INSTALL_TIMEOUT, env=env)
+            (stdout, stderr, returncode) = (result.stdout, result.stderr, result.returncode)
+            if result.timed_out:
+                self.log("Bosco installation command did not finish within %d seconds" % BOSCO_INSTALL_TIMEOUT,
+                         level=logging.ERROR)
+                self.log("stdout:\n%s" % stdout, level=logging.ERROR)
+                self.log("stderr:\n%s" % stderr, level=logging.ERROR)
+                return False
             if returncode:
                 self.log("Bosco installation command failed with exit code %i" % returncode, level=logging.ERROR)
                 self.log("stdout:\n%s" % stdout, level=logging.ERROR)
@@ -298,13 +307,10 @@ Host %(host)s
         - BOSCO_ENDPOINT
 
         """
-        contents = utilities.read_file(self.HTCONDOR_CE_CONFIG_FILE,
-                                       default="# This file is managed by osg-configure\n")
-        contents = utilities.add_or_replace_setting(contents, "BOSCO_RMS", self.options['batch'].value,
-                                                    quote_value=False)
-        contents = utilities.add_or_replace_setting(contents, "BOSCO_ENDPOINT", self.options['endpoint'].value,
-                                                    quote_value=False)
-        utilities.atomic_write(self.HTCONDOR_CE_CONFIG_FILE, contents)
+        ce_config = configeditor.edit(self.HTCONDOR_CE_CONFIG_FILE,
+                                      default="# This file is managed by osg-configure\n")
+        ce_config.set("BOSCO_RMS", self.options['batch'].value, quote_value=False)
+        ce_config.set("BOSCO_ENDPOINT", self.options['endpoint'].value, quote_value=False)
 
     def _search_config(self, host, config_path):
         """
@@ -6,8 +6,10 @@ import os
 import logging
 
 from osg_configure.modules import utilities
+from osg_configure.modules import configeditor
 from osg_configure.modules import validation
 from osg_configure.modules import configfile
+from osg_configure.modules import condorconfig
 from osg_configure.modules.jobmanagerconfiguration import JobManagerConfiguration
 
 __all__ = ['CondorConfiguration']
@@ -27,12 +29,10 @@ class CondorConfiguration(JobManagerConfiguration):
         self.config_section = "Condor"
         self.options = {'condor_location':
                             configfile.Option(name='condor_location',
-                                              default_value=utilities.get_condor_location(),
                                               mapping='OSG_CONDOR_LOCATION'),
                         'condor_config':
                             configfile.Option(name='condor_config',
                                               required=configfile.Option.OPTIONAL,
-                                              default_value=utilities.get_condor_config(),
                                               mapping='OSG_CONDOR_CONFIG'),
                         'job_contact':
                             configfile.Option(name='job_contact',
@@ -60,6 +60,11 @@ class CondorConfiguration(JobManagerConfiguration):
 
         self.check_config(configuration)
 
+        # looked up here rather than in __init__ since they depend on the
+        # environment
+        self.options['condor_location'].default_value = utilities.get_condor_location()
+        self.options['condor_config'].default_value = utilities.get_condor_config()
+
         if not configuration.has_section(self.config_section):
             self.enabled = False
             self.log("%s section not in config file" % self.config_section)
@@ -196,15 +201,12 @@ class CondorConfiguration(JobManagerConfiguration):
 
         if self.htcondor_gateway_enabled:
             if not self.setup_htcondor_ce_config():
-                self.log('Error writing to ' + JobManagerConfiguration.HTCONDOR_CE_CONFIG_FILE,
+                self.log('Unable to work out the settings for ' + JobManagerConfiguration.HTCONDOR_CE_CONFIG_FILE,
                          level=logging.ERROR)
                 return False
             self.write_binpaths_to_blah_config('condor', self.condor_bin_location)
             self.write_htcondor_ce_sentinel()
 
-        if not utilities.reconfig_service('condor', 'condor_reconfig', log=self.logger):
-            self.log('Error reloading condor config', level=logging.WARNING)
-
         self.warn_on_non_default_local_config_dir()
 
         self.log('CondorConfiguration.configure completed')
@@ -225,7 +227,7 @@ class CondorConfiguration(JobManagerConfiguration):
         Returns True if successful, False otherwise
         """
 
-        buf = open(CondorConfiguration.GRAM_CONFIG_FILE).read()
+        buf = open(utilities.staged_path(CondorConfiguration.GRAM_CONFIG_FILE)).read()
         for binfile in ['condor_submit', 'condor_rm']:
             bin_location = os.path.join(self.condor_bin_location, binfile)
             if validation.valid_file(bin_location):
@@ -241,9 +243,10 @@ class CondorConfiguration(JobManagerConfiguration):
     def setup_htcondor_ce_config(self):
         """
         Populate the config file that tells htcondor-ce where the condor
-        pool is and where the spool directory is.
+        pool is and where the spool directory is.  The settings are written
+        by configeditor.flush() once all modules are done.
 
-        Returns True if successful, False otherwise
+        Returns True if the settings could be worked out, False otherwise
         """
         if not utilities.rpm_installed('htcondor-ce'):
             self.log("Unable to configure htcondor-ce for Condor: htcondor-ce not installed", level=logging.ERROR)
@@ -252,6 +255,12 @@ class CondorConfiguration(JobManagerConfiguration):
         def get_condor_ce_config_val(variable):
             return utilities.get_condor_config_val(variable, executable='condor_ce_config_val', quiet_undefined=True)
 
+        # look up everything needed below with one run of each tool
+        condorconfig.get_values(['SCHEDD_NAME', 'FULL_HOSTNAME', 'COLLECTOR_HOST', 'SPOOL', 'COLLECTOR_PORT'],
+                                quiet_undefined=True)
+        condorconfig.get_values(['JOB_ROUTER_SCHEDD2_NAME', 'JOB_ROUTER_SCHEDD2_POOL', 'JOB_ROUTER_SCHEDD2_SPOOL'],
+                                executable='condor_ce_config_val', quiet_undefined=True)
+
         # Get values for the settings we want to update. We can get the
         # values from condor_config_val; in the case of JOB_ROUTER_SCHEDD2_NAME,
         # we have FULL_HOSTNAME as a fallback in case SCHEDD_NAME is missing.
@@ -288,13 +297,10 @@ class CondorConfiguration(JobManagerConfiguration):
                 condor_ce_config[condor_ce_config_key] = condor_config_value
 
         if condor_ce_config:
-            buf = utilities.read_file(JobManagerConfiguration.HTCONDOR_CE_CONFIG_FILE,
-                                      default="# This file is managed by osg-configure\n")
+            ce_config = configeditor.edit(JobManagerConfiguration.HTCONDOR_CE_CONFIG_FILE,
+                                          default="# This file is managed by osg-configure\n")
             for key, value in condor_ce_config.items():
-                buf = utilities.add_or_replace_setting(buf, key, value, quote_value=False)
-
-            if not utilities.atomic_write(JobManagerConfiguration.HTCONDOR_CE_CONFIG_FILE, buf):
-                return False
+                ce_config.set(key, value, quote_value=False)
 
         return True
 
@@ -377,3 +383,7 @@ class CondorConfiguration(JobManagerConfiguration):
             return set()
 
         return set(['globus-gridftp-server']).union(self.gateway_services())
+
+    def produces(self):
+        return super(CondorConfiguration, self).produces() | set([CondorConfiguration.CONDOR_CONFIG_FILE,
+                                                                  CondorConfiguration.GRAM_CONFIG_FILE])
@@ -279,6 +279,12 @@ class GipConfiguration(BaseConfiguration):
             self.log('GipConfiguration.configure completed')
             return
 
+        if utilities.get_root() is not None:
+            # only ownership of directories on this host is changed
+            self.log('Rendering into %s, not changing GIP directories' % utilities.get_root())
+            self.log('GipConfiguration.configure completed')
+            return
+
         try:
             gip_pwent = pwd.getpwnam(self.gip_user)
         except KeyError, e:
@@ -348,3 +354,10 @@ class GipConfiguration(BaseConfiguration):
         separately
         """
         return True
+
+    def produces(self):
+        return set(['/var/tmp/gip',
+                    '/var/log/gip'])
+
+    def relevant_rpms(self):
+        return set(['gip', 'osg-ce', 'osg-htcondor-ce'])
@@ -4,10 +4,10 @@ import os
 import re
 import sys
 import logging
-import subprocess
 
 from osg_configure.modules import exceptions
 from osg_configure.modules import utilities
+from osg_configure.modules import condorconfig
 from osg_configure.modules import validation
 from osg_configure.modules import configfile
 from osg_configure.modules.baseconfiguration import BaseConfiguration
@@ -356,7 +356,7 @@ in your config.ini file."""
             probe = 'gridftp-transfer'
 
         try:
-            buf = open(probe_file).read()
+            buf = open(utilities.staged_path(probe_file)).read()
             buf = re.sub(r'(\s*)ProbeName\s*=.*',
                          r'\1ProbeName="' + "%s:%s" % (probe, hostname) + '"',
                          buf,
@@ -393,6 +393,12 @@ in your config.ini file."""
         self.log("GratiaConfiguration._make_subscription completed")
         return True
 
+    def hostnames(self):
+        """Return a set of the host names check_attributes() resolves"""
+        if not self.enabled or self.ignored:
+            return set()
+        return set([server.split(':')[0] for server in self.enabled_probe_settings.values()])
+
     def module_name(self):
         """Return a string with the name of the module"""
         return "Gratia"
@@ -497,7 +503,7 @@ in your config.ini file."""
         """
 
         config_location = GRATIA_CONFIG_FILES['condor']
-        buf = file(config_location).read()
+        buf = file(utilities.staged_path(config_location)).read()
         settings = self._probe_config['condor']
         buf = self.replace_setting(buf, 'CondorLocation', settings['condor_location'])
         buf = self.replace_setting(buf, 'CondorConfig', settings['condor_config'])
@@ -521,7 +527,7 @@ in your config.ini file."""
             return True
 
         config_location = GRATIA_CONFIG_FILES['pbs']
-        buf = file(config_location).read()
+        buf = file(utilities.staged_path(config_location)).read()
         buf = self.replace_setting(buf, 'pbsAcctLogDir', accounting_dir, xml_file=False)
         buf = self.replace_setting(buf, 'lrmsType', 'pbs', xml_file=False)
         if not utilities.atomic_write(config_location, buf):
@@ -547,7 +553,7 @@ in your config.ini file."""
                      section='LSF')
             return True
         config_location = GRATIA_CONFIG_FILES['lsf']
-        buf = file(config_location).read()
+        buf = file(utilities.staged_path(config_location)).read()
         buf = self.replace_setting(buf, 'lsfAcctLogDir', log_directory, xml_file=False)
 
         # setup lsfBinDir
@@ -571,7 +577,7 @@ in your config.ini file."""
         """
         accounting_path = self._probe_config['sge']['sge_accounting_file']
         config_location = GRATIA_CONFIG_FILES['sge']
-        buf = file(config_location).read()
+        buf = file(utilities.staged_path(config_location)).read()
         buf = self.replace_setting(buf, 'SGEAccountingFile', accounting_path)
         if not utilities.atomic_write(config_location, buf):
             return False
@@ -582,7 +588,7 @@ in your config.ini file."""
         Do SLURM probe specific configuration
         """
         config_location = GRATIA_CONFIG_FILES['slurm']
-        buf = file(config_location).read()
+        buf = file(utilities.staged_path(config_location)).read()
 
         settings = self._probe_config['slurm']
         if not validation.valid_file(settings['db_pass']):
@@ -610,7 +616,7 @@ in your config.ini file."""
         Set to suppress grid local jobs (pre-routed jobs)
         """
         config_location = GRATIA_CONFIG_FILES['htcondor-ce']
-        buf = file(config_location).read()
+        buf = file(utilities.staged_path(config_location)).read()
         buf = self.replace_setting(buf, 'SuppressGridLocalRecords', '1')
         
         if not utilities.atomic_write(config_location, buf):
@@ -640,7 +646,7 @@ in your config.ini file."""
             return False
 
         config_location = GRATIA_CONFIG_FILES['condor']
-        contents = file(config_location).read()
+        contents = file(utilities.staged_path(config_location)).read()
         re_obj = re.compile(r'(?m)^\s*DataFolder\s*=(.*)\s*$')
         match = re_obj.search(contents)
         if match is not None:
@@ -690,9 +696,14 @@ in your config.ini file."""
     def _get_history_dir(self, condor_config_val_bin):
         cmd = [condor_config_val_bin, '-schedd', 'PER_JOB_HISTORY_DIR']
         try:
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            (history_dir, errtext) = process.communicate()
-            if process.returncode != 0:
+            result = condorconfig.run_cached(cmd)
+            (history_dir, errtext) = (result.stdout, result.stderr)
+            if result.timed_out:
+                self.log("While checking gratia parameters: %s did not finish within %d seconds" %
+                         (condor_config_val_bin, utilities.CONDOR_CONFIG_VAL_TIMEOUT),
+                         level=logging.INFO)
+                return None
+            if result.returncode != 0:
                 self.log("While checking gratia parameters: %s failed. Output follows:\n%s" % (condor_config_val_bin,
                                                                                                errtext),
                          level=logging.INFO)
@@ -736,3 +747,10 @@ in your config.ini file."""
             return set()
 
         return set(['gratia-probes-cron'])
+
+    def produces(self):
+        # the metric probe is also configured by the RSV module
+        return set(GRATIA_CONFIG_FILES.values()) | set(['/etc/gratia/metric/ProbeConfig'])
+
+    def relevant_rpms(self):
+        return set(['globus-gatekeeper', 'htcondor-ce'] + CE_PROBE_RPMS)
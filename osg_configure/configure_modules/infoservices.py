@@ -3,12 +3,12 @@
 
 import re
 import ConfigParser
-import subprocess
 import urlparse
 import logging
 
 from osg_configure.modules import exceptions
 from osg_configure.modules import utilities
+from osg_configure.modules import condorconfig
 from osg_configure.modules import configfile
 from osg_configure.modules import validation
 from osg_configure.modules.baseconfiguration import BaseConfiguration
@@ -29,10 +29,17 @@ SERVICEKEY_PATH = "/etc/grid-security/http/httpkey.pem"
 # coincidentally the same. If they ever change, make a mapping.
 BATCH_SYSTEMS = ['Condor', 'LSF', 'PBS', 'SGE', 'SLURM']
 
-try:
-    import classad
-except ImportError:
-    classad = None
+
+def _classad_available():
+    """
+    Return True if the HTCondor classad bindings can be imported.  They are
+    only imported when needed since loading them is slow.
+    """
+    try:
+        import classad
+    except ImportError:
+        return False
+    return True
 
 
 class InfoServicesConfiguration(BaseConfiguration):
@@ -62,12 +69,12 @@ class InfoServicesConfiguration(BaseConfiguration):
         self.bdii_servers = {}
         self.copy_host_cert_for_service_cert = False
 
-        self.ois_required_rpms_installed = utilities.gateway_installed() and utilities.rpm_installed(
-            'osg-info-services')
+        # rpm queries are done on first use, see the properties below
+        self._ois_required_rpms_installed = None
 
         # for htcondor-ce-info-services:
         self.ce_collectors = []
-        self.ce_collector_required_rpms_installed = utilities.rpm_installed('htcondor-ce')
+        self._ce_collector_required_rpms_installed = None
         self.osg_resource = ""
         self.osg_resource_group = ""
         self.enabled_batch_systems = []
@@ -94,6 +101,21 @@ class InfoServicesConfiguration(BaseConfiguration):
         else:
             return val.split(',')
 
+    @property
+    def ois_required_rpms_installed(self):
+        """True if the rpms needed for osg-info-services are installed"""
+        if self._ois_required_rpms_installed is None:
+            self._ois_required_rpms_installed = (utilities.gateway_installed() and
+                                                 utilities.rpm_installed('osg-info-services'))
+        return self._ois_required_rpms_installed
+
+    @property
+    def ce_collector_required_rpms_installed(self):
+        """True if the rpms needed for the HTCondor-CE info services are installed"""
+        if self._ce_collector_required_rpms_installed is None:
+            self._ce_collector_required_rpms_installed = utilities.rpm_installed('htcondor-ce')
+        return self._ce_collector_required_rpms_installed
+
     def parse_configuration(self, configuration):
         """
         Try to get configuration information from ConfigParser or SafeConfigParser object given
@@ -180,7 +202,7 @@ class InfoServicesConfiguration(BaseConfiguration):
                 return False
 
         if self.ce_collector_required_rpms_installed and self.htcondor_gateway_enabled:
-            if classad is None:
+            if not _classad_available():
                 self.log("Cannot configure HTCondor CE info services: unable to import HTCondor Python bindings."
                          "\nEnsure the 'classad' Python module is installed and accessible to Python scripts."
                          "\nIf using HTCondor from RPMs, install the 'condor-python' RPM."
@@ -225,6 +247,13 @@ class InfoServicesConfiguration(BaseConfiguration):
         self.log("InfoServicesConfiguration.check_attributes completed")
         return valid
 
+    def hostnames(self):
+        """Return a set of the host names check_attributes() resolves"""
+        if not self.enabled or self.ignored:
+            return set()
+        return set([urlparse.urlsplit(subscription)[1].split(':')[0]
+                    for subscription in self.bdii_servers])
+
     def module_name(self):
         """Return a string with the name of the module"""
         return "Infoservices"
@@ -320,6 +349,34 @@ class InfoServicesConfiguration(BaseConfiguration):
             services.add('condor-ce')
         return services
 
+    def consumes(self):
+        # configure() only creates the user-vo-map itself if it is still
+        # missing after the misc module ran.  The CE collector settings read
+        # back with condor_ce_config_val are not listed: modules edit the
+        # HTCondor-CE config in memory and it is only written once all
+        # modules are done, so no module order makes them visible here
+        return set([misc.USER_VO_MAP_LOCATION])
+
+    def produces(self):
+        return set([CE_COLLECTOR_ATTRIBUTES_FILE,
+                    CE_COLLECTOR_CONFIG_FILE])
+
+    def input_values(self):
+        values = super(InfoServicesConfiguration, self).input_values()
+        values['htcondor_gateway_enabled'] = self.htcondor_gateway_enabled
+        values['enabled_batch_systems'] = sorted(self.enabled_batch_systems)
+        values['osg_resource'] = self.osg_resource
+        values['osg_resource_group'] = self.osg_resource_group
+        values['copy_host_cert_for_service_cert'] = self.copy_host_cert_for_service_cert
+        values['authorization_method'] = self.authorization_method
+        if self.subcluster_sections is not None:
+            for section in self.subcluster_sections.sections():
+                values['section:' + section] = sorted(self.subcluster_sections.items(section))
+        return values
+
+    def relevant_rpms(self):
+        return set(['globus-gatekeeper', 'htcondor-ce', 'osg-info-services'])
+
     def _configure_ce_collector(self):
         for filename, description, writer_func in [
             (CE_COLLECTOR_ATTRIBUTES_FILE, "attributes file", self._write_ce_collector_attributes_file),
@@ -393,19 +450,23 @@ CONDOR_VIEW_HOST = %s
         """
         errlevel = logging.ERROR
         try:
-            process = subprocess.Popen(['condor_ce_config_val', '-verbose', 'OSG_ResourceCatalog'],
-                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            output, error = process.communicate()
-            if process.returncode != 0:
+            result = condorconfig.run_cached(['condor_ce_config_val', '-verbose', 'OSG_ResourceCatalog'])
+            error = result.stderr
+            if result.timed_out:
+                self.log('condor_ce_config_val OSG_ResourceCatalog did not finish within %d seconds' %
+                         utilities.CONDOR_CONFIG_VAL_TIMEOUT,
+                         level=errlevel)
+                return None
+            if result.returncode != 0:
                 if not (error and error.startswith('Not defined:')):
                     self.log('condor_ce_config_val OSG_ResourceCatalog failed; exit %d; error %s' % (
-                    process.returncode, error),
+                    result.returncode, error),
                              level=errlevel)
                 return None
         except OSError, err:
             self.log('Could not run condor_ce_config_val: %s' % str(err), level=errlevel)
             return None
-        output = output.strip()
+        output = result.stdout.strip()
         match = re.search(r'# at: (\S+), line \d+', output)
         if not match:
             self.log('Could not find definition of OSG_ResourceCatalog; condor_ce_config_val output was: \n%s' % output,
@@ -5,6 +5,7 @@ import os
 import logging
 
 from osg_configure.modules import utilities
+from osg_configure.modules import configeditor
 from osg_configure.modules import configfile
 from osg_configure.modules import validation
 from osg_configure.modules.jobmanagerconfiguration import JobManagerConfiguration
@@ -239,11 +240,9 @@ class LSFConfiguration(JobManagerConfiguration):
         return True
 
     def write_lsf_confpath_to_blah_config(self):
-        if os.path.exists(self.BLAH_CONFIG):
-            contents = utilities.read_file(self.BLAH_CONFIG)
-            contents = utilities.add_or_replace_setting(contents, 'lsf_confpath', self.options['lsf_conf'].value,
-                                                        quote_value=True)
-            utilities.atomic_write(self.BLAH_CONFIG, contents)
+        blah_config = configeditor.edit(self.BLAH_CONFIG)
+        if blah_config is not None:
+            blah_config.set('lsf_confpath', self.options['lsf_conf'].value, quote_value=True)
 
     def setup_gram_config(self):
         """
@@ -251,7 +250,7 @@ class LSFConfiguration(JobManagerConfiguration):
 
         Returns True if successful, False otherwise
         """
-        buf = open(LSFConfiguration.GRAM_CONFIG_FILE).read()
+        buf = open(utilities.staged_path(LSFConfiguration.GRAM_CONFIG_FILE)).read()
         for binfile in ['bsub', 'bqueues', 'bjobs', 'bhist', 'bacct', 'bkill']:
             bin_location = os.path.join(self.lsf_bin_location, binfile)
             if validation.valid_file(bin_location):
@@ -289,3 +288,7 @@ class LSFConfiguration(JobManagerConfiguration):
             services.add('globus-scheduler-event-generator')
             services.add('globus-gatekeeper')
         return services
+
+    def produces(self):
+        return super(LSFConfiguration, self).produces() | set([LSFConfiguration.LSF_CONFIG_FILE,
+                                                               LSFConfiguration.GRAM_CONFIG_FILE])
@@ -43,12 +43,10 @@ class ManagedForkConfiguration(JobManagerConfiguration):
         self.options = {'condor_location':
                             configfile.Option(name='condor_location',
                                               required=configfile.Option.OPTIONAL,
-                                              value=utilities.get_condor_location(),
                                               mapping='OSG_CONDOR_LOCATION'),
                         'condor_config':
                             configfile.Option(name='condor_config',
                                               required=configfile.Option.OPTIONAL,
-                                              value=utilities.get_condor_config(),
                                               mapping='OSG_CONDOR_CONFIG'),
                         'enabled':
                             configfile.Option(name='enabled',
@@ -75,6 +73,11 @@ class ManagedForkConfiguration(JobManagerConfiguration):
 
         self.check_config(configuration)
 
+        # looked up here rather than in __init__ since they depend on the
+        # environment
+        self.options['condor_location'].value = utilities.get_condor_location()
+        self.options['condor_config'].value = utilities.get_condor_config()
+
         if not configuration.has_section(self.config_section):
             self.enabled = False
             self.section_present = False
@@ -218,3 +221,7 @@ class ManagedForkConfiguration(JobManagerConfiguration):
             return set()
 
         return set(['condor']).union(self.gateway_services())
+
+    def produces(self):
+        return super(ManagedForkConfiguration, self).produces() | \
+               set([ManagedForkConfiguration.MANAGED_FORK_CONFIG_FILE])
@@ -6,8 +6,10 @@ import sys
 
 from osg_configure.modules import exceptions
 from osg_configure.modules import utilities
+from osg_configure.modules import configeditor
 from osg_configure.modules import configfile
 from osg_configure.modules import validation
+from osg_configure.modules import background
 from osg_configure.modules.baseconfiguration import BaseConfiguration
 
 __all__ = ['MiscConfiguration']
@@ -17,6 +19,9 @@ GUMS_CLIENT_LOCATION = "/etc/gums/gums-client.properties"
 LCMAPS_DB_LOCATION = "/etc/lcmaps.db"
 USER_VO_MAP_LOCATION = '/var/lib/osg/user-vo-map'
 HTCONDOR_CE_CONFIG_FILE = '/etc/condor-ce/config.d/50-osg-configure.conf'
+# names of the background tasks started by this module
+FETCH_CRL_TASK = 'fetch-crl'
+USER_VO_FILE_TASK = 'user-vo-map'
 
 
 class MiscConfiguration(BaseConfiguration):
@@ -137,10 +142,8 @@ class MiscConfiguration(BaseConfiguration):
             self.log('MiscConfiguration.configure completed')
             return True
 
-        # run fetch-crl script
-        if not utilities.fetch_crl():
-            self.log("Error while running fetch-crl script", level=logging.ERROR)
-            raise exceptions.ConfigureError('fetch-crl returned non-zero exit code')
+        # run fetch-crl script, its result is checked when the task is joined
+        self._start_fetch_crl()
 
         using_gums = False
         if self.options['authorization_method'].value == 'xacml':
@@ -172,13 +175,47 @@ class MiscConfiguration(BaseConfiguration):
         if self.htcondor_gateway_enabled:
             self.write_gridmap_to_htcondor_ce_config()
 
-        ensure_valid_user_vo_file(using_gums, logger=self.logger)
+        # gums-host-cron reads the gums client settings written above;
+        # modules that need the user-vo-map join the task
+        start_user_vo_file_task(using_gums, logger=self.logger)
         # Call configure_vdt_cleanup (enabling or disabling as necessary)
         self._configure_cleanup()
 
         self.log('MiscConfiguration.configure completed')
         return True
 
+    def start_background_tasks(self):
+        """Start fetch-crl and edg-mkgridmap before configuring"""
+        if not self.enabled:
+            return
+        self._start_fetch_crl()
+        if self.options['authorization_method'].value in ('gridmap', 'local-gridmap'):
+            # unlike gums-host-cron, edg-mkgridmap doesn't read anything
+            # configure() writes
+            start_user_vo_file_task(False, logger=self.logger)
+
+    def _start_fetch_crl(self):
+        """Start running fetch-crl in the background"""
+        background.start(FETCH_CRL_TASK, utilities.fetch_crl, check=self._check_fetch_crl)
+
+    def _check_fetch_crl(self, result):
+        """
+        Check the result of fetch-crl
+
+        Raises:
+        ConfigureError -- fetch-crl failed
+        """
+        if not result:
+            self.log("Error while running fetch-crl script", level=logging.ERROR)
+            raise exceptions.ConfigureError('fetch-crl returned non-zero exit code')
+
+    def hostnames(self):
+        """Return a set of the host names check_attributes() resolves"""
+        if (not self.enabled or self.options['authorization_method'].value != 'xacml' or
+                utilities.blank(self.options['gums_host'].value)):
+            return set()
+        return set([self.options['gums_host'].value])
+
     def module_name(self):
         """Return a string with the name of the module"""
         return "Misc"
@@ -210,7 +247,7 @@ class MiscConfiguration(BaseConfiguration):
             gums_properties += "gums.authz=https://%s:8443" % (self.options['gums_host'].value)
             gums_properties += "/gums/services/GUMSXACMLAuthorizationServicePort"
         else:
-            gums_properties = open(GUMS_CLIENT_LOCATION).read()
+            gums_properties = open(utilities.staged_path(GUMS_CLIENT_LOCATION)).read()
             replacement = "gums.location=https://%s:8443" % (self.options['gums_host'].value)
             replacement += "/gums/services/GUMSAdmin"
             gums_properties = location_re.sub(replacement, gums_properties)
@@ -241,7 +278,7 @@ configuration:
 
         for lcmaps_db_file in files_to_update:
             self.log("Updating " + lcmaps_db_file, level=logging.INFO)
-            lcmaps_db = open(lcmaps_db_file).read()
+            lcmaps_db = open(utilities.staged_path(lcmaps_db_file)).read()
 
             lcmaps_db = self._update_lcmaps_text(lcmaps_db, gums, self.options['gums_host'].value)
 
@@ -345,22 +382,21 @@ configuration:
                      level=logging.ERROR)
             raise exceptions.ConfigureError(err_msg)
 
-        filehandle = open('/etc/osg/osg-cleanup.conf', 'w')
+        contents = '# This file is automatically generated by osg-configure\n'
+        contents += '# Manual modifications to this file may be overwritten\n'
+        contents += '# Instead, modify /etc/osg/config.d/10-misc.ini\n'
 
-        filehandle.write('# This file is automatically generated by osg-configure\n')
-        filehandle.write('# Manual modifications to this file may be overwritten\n')
-        filehandle.write('# Instead, modify /etc/osg/config.d/10-misc.ini\n')
+        contents += 'age = %s\n' % (self.options['cleanup_age_in_days'].value)
+        contents += 'users = %s\n' % (self.options['cleanup_users_list'].value)
 
-        filehandle.write('age = %s\n' % (self.options['cleanup_age_in_days'].value))
-        filehandle.write('users = %s\n' % (self.options['cleanup_users_list'].value))
-
-        filehandle.close()
+        if not utilities.atomic_write('/etc/osg/osg-cleanup.conf', contents):
+            raise exceptions.ConfigureError("Error while writing to /etc/osg/osg-cleanup.conf")
 
         # Writing this file seems a little hacky, but I'm not sure of a better way
-        filehandle = open('/etc/cron.d/osg-cleanup', 'w')
-        filehandle.write('%s root [ ! -f /var/lock/subsys/osg-cleanup-cron ] || /usr/sbin/osg-cleanup\n' %
-                         (self.options['cleanup_cron_time'].value))
-        filehandle.close()
+        contents = '%s root [ ! -f /var/lock/subsys/osg-cleanup-cron ] || /usr/sbin/osg-cleanup\n' % \
+                   (self.options['cleanup_cron_time'].value)
+        if not utilities.atomic_write('/etc/cron.d/osg-cleanup', contents):
+            raise exceptions.ConfigureError("Error while writing to /etc/cron.d/osg-cleanup")
 
         return True
 
@@ -385,23 +421,40 @@ configuration:
             services.add('osg-cleanup-cron')
         return services
 
+    def produces(self):
+        return set([GSI_AUTHZ_LOCATION,
+                    GUMS_CLIENT_LOCATION,
+                    LCMAPS_DB_LOCATION,
+                    USER_VO_MAP_LOCATION,
+                    HTCONDOR_CE_CONFIG_FILE,
+                    '/etc/osg/osg-cleanup.conf',
+                    '/etc/cron.d/osg-cleanup'])
+
+    def relevant_rpms(self):
+        return set(['fetch-crl', 'fetch-crl3'])
+
     def write_gridmap_to_htcondor_ce_config(self):
-        contents = utilities.read_file(HTCONDOR_CE_CONFIG_FILE,
-                                       default="# This file is managed by osg-configure\n")
+        ce_config = configeditor.edit(HTCONDOR_CE_CONFIG_FILE,
+                                      default="# This file is managed by osg-configure\n")
         if self.options['authorization_method'].value == 'xacml':
             # Remove GRIDMAP setting
-            contents = re.sub(r'(?m)^\s*GRIDMAP\s*=.*?$[\n]?', "", contents)
+            ce_config.remove("GRIDMAP")
         else:
-            contents = utilities.add_or_replace_setting(contents, "GRIDMAP", "/etc/grid-security/grid-mapfile",
-                                                        quote_value=False)
-        utilities.atomic_write(HTCONDOR_CE_CONFIG_FILE, contents)
+            ce_config.set("GRIDMAP", "/etc/grid-security/grid-mapfile", quote_value=False)
 
 
-def create_user_vo_file(using_gums=False):
+def create_user_vo_file(using_gums=False, output=None):
     """
     Check and create a mapfile if needed
+
+    Keyword arguments:
+    using_gums - create the mapfile with gums-host-cron instead of
+                 edg-mkgridmap
+    output - file-like object to write messages to instead of stdout
     """
 
+    if output is None:
+        output = sys.stdout
     map_file = '/var/lib/osg/user-vo-map'
     try:
         if validation.valid_user_vo_file(map_file):
@@ -411,30 +464,67 @@ def create_user_vo_file(using_gums=False):
         else:
             gums_script = '/usr/sbin/edg-mkgridmap'
 
-        sys.stdout.write("Running %s, this process may take some time " % gums_script +
-                         "to query vo and gums servers\n")
-        sys.stdout.flush()
-        if not utilities.run_script([gums_script]):
+        output.write("Running %s, this process may take some time " % gums_script +
+                     "to query vo and gums servers\n")
+        output.flush()
+        if not utilities.run_script([gums_script], output=output):
             return False
     except IOError:
         return False
     return True
 
 
+def start_user_vo_file_task(using_gums, logger=utilities.NullLogger):
+    """
+    Start creating the user-vo-map file in the background if it's not valid
+    and return the BackgroundTask, or None if there is nothing to do.  If a
+    task was already started, it is returned.  Failures are logged to logger
+    and raised as a ConfigureError when the task is joined.
+    """
+    task = background.get(USER_VO_FILE_TASK)
+    if task is not None:
+        return task
+    if utilities.get_root() is not None:
+        # the user-vo-map comes from VO and GUMS servers, it can't be rendered
+        logger.info("Rendering into %s, not creating user-vo-map file" % utilities.get_root())
+        return None
+    if validation.valid_user_vo_file(USER_VO_MAP_LOCATION):
+        return None
+    logger.info("Trying to create user-vo-map file")
+    return background.start(USER_VO_FILE_TASK, create_user_vo_file, (using_gums,),
+                            check=lambda result: check_user_vo_file(result, logger))
+
+
+def check_user_vo_file(result, logger=utilities.NullLogger):
+    """
+    Check the user-vo-map file after create_user_vo_file returned result
+
+    Raises:
+    ConfigureError -- the file couldn't be created or isn't valid
+    """
+    temp, invalid_lines = validation.valid_user_vo_file(USER_VO_MAP_LOCATION, True)
+    result = result and temp
+    if not result:
+        logger.error("Can't generate user-vo-map, manual intervention is needed")
+        if not invalid_lines:
+            logger.error("gums-host-cron or edg-mkgridmap generated an empty " +
+                         USER_VO_MAP_LOCATION + " file, please check the "
+                         "appropriate configuration and or log messages")
+            raise exceptions.ConfigureError('Error when generating user-vo-map file')
+        logger.error("Invalid lines in user-vo-map file:")
+        logger.error("\n".join(invalid_lines))
+        raise exceptions.ConfigureError("Error when invoking gums-host-cron or edg-mkgridmap")
+
+
 def ensure_valid_user_vo_file(using_gums, logger=utilities.NullLogger):
-    if not validation.valid_user_vo_file(USER_VO_MAP_LOCATION):
-        logger.info("Trying to create user-vo-map file")
-        result = create_user_vo_file(using_gums)
-        temp, invalid_lines = validation.valid_user_vo_file(USER_VO_MAP_LOCATION, True)
-        result = result and temp
-        if not result:
-            logger.error("Can't generate user-vo-map, manual intervention is needed")
-            if not invalid_lines:
-                logger.error("gums-host-cron or edg-mkgridmap generated an empty " +
-                             USER_VO_MAP_LOCATION + " file, please check the "
-                             "appropriate configuration and or log messages")
-                raise exceptions.ConfigureError('Error when generating user-vo-map file')
-            logger.error("Invalid lines in user-vo-map file:")
-            logger.error("\n".join(invalid_lines))
-            raise exceptions.ConfigureError("Error when invoking gums-host-cron or edg-mkgridmap")
+    """
+    Make sure the user-vo-map file is valid, waiting for it to be created if
+    it was started in the background
+
+    Raises:
+    ConfigureError -- the file couldn't be created or isn't valid
+    """
+    task = start_user_vo_file_task(using_gums, logger)
+    if task is not None:
+        task.join()
 
@@ -167,3 +167,8 @@ class NetworkConfiguration(BaseConfiguration):
     def separately_configurable(self):
         """Return a boolean that indicates whether this module can be configured separately"""
         return True
+
+    def produces(self):
+        return set(['/var/lib/osg/globus-firewall',
+                    '/etc/profile.d/osg.sh',
+                    '/etc/profile.d/osg.csh'])
@@ -226,7 +226,7 @@ class PBSConfiguration(JobManagerConfiguration):
 
         Returns True if successful, False otherwise
         """
-        contents = open(PBSConfiguration.GRAM_CONFIG_FILE).read()
+        contents = open(utilities.staged_path(PBSConfiguration.GRAM_CONFIG_FILE)).read()
         for binfile in ['qsub', 'qstat', 'qdel']:
             bin_location = os.path.join(self.pbs_bin_location, binfile)
             if validation.valid_file(bin_location):
@@ -266,3 +266,7 @@ class PBSConfiguration(JobManagerConfiguration):
             services.add('globus-scheduler-event-generator')
             services.add('globus-gatekeeper')
         return services
+
+    def produces(self):
+        return super(PBSConfiguration, self).produces() | set([PBSConfiguration.PBS_CONFIG_FILE,
+                                                               PBSConfiguration.GRAM_CONFIG_FILE])
@@ -2,15 +2,16 @@
 
 import os
 import re
-import shutil
 import logging
 import ConfigParser
+import cStringIO
 import pwd
 
 from osg_configure.modules import exceptions
 from osg_configure.modules import utilities
 from osg_configure.modules import validation
 from osg_configure.modules import configfile
+from osg_configure.modules import reloadqueue
 from osg_configure.modules.baseconfiguration import BaseConfiguration
 
 __all__ = ['RsvConfiguration']
@@ -324,6 +325,10 @@ class RsvConfiguration(BaseConfiguration):
         except ConfigFailed:
             return False
 
+        # condor-cron is reloaded once all modules are done if its config changed
+        reloadqueue.request('condor-cron', 'condor_cron_reconfig',
+                            ['/etc/condor-cron/', '/etc/sysconfig/condor-cron'])
+
         self.log('RsvConfiguration.configure completed')
         return True
 
@@ -439,7 +444,14 @@ class RsvConfiguration(BaseConfiguration):
         return check_value
 
     def _reset_configuration(self):
-        """ Reset all metrics and consumers to disabled """
+        """
+        Reset all metrics and consumers to disabled.  The files are removed
+        with remove_path so that a failed run puts them back.
+        """
+
+        if utilities.get_root() is not None:
+            # the staging root starts out empty so there is nothing to reset
+            return
 
         self.log("Resetting all metrics and consumers to disabled")
 
@@ -452,7 +464,7 @@ class RsvConfiguration(BaseConfiguration):
 
             path = os.path.join(self.rsv_conf_dir, filename)
             self.log("Removing %s as part of reset" % path)
-            os.unlink(path)
+            utilities.remove_path(path)
 
         # Remove any host specific metric configuration
         for directory in os.listdir(self.rsv_metrics_dir):
@@ -460,7 +472,7 @@ class RsvConfiguration(BaseConfiguration):
             if not os.path.isdir(path):
                 continue
 
-            shutil.rmtree(path)
+            utilities.remove_path(path)
 
     def _create_cert_key_if_needed(self):
         if not self.copy_host_cert_for_service_cert:
@@ -785,26 +797,21 @@ class RsvConfiguration(BaseConfiguration):
         # Put the location into the condor-cron-env.sh file so that the condor-cron
         # wrappers and init script have the binaries in their PATH
         sysconf_file = os.path.join('/', 'etc', 'sysconfig', 'condor-cron')
-        try:
-            sysconf = open(sysconf_file, 'w')
-            if self.options['condor_location'].value:
-                sysconf.write("PATH=%s/bin:%s/sbin:$PATH\n" % (condor_dir,
-                                                               condor_dir))
-                sysconf.write("export PATH\n")
-            sysconf.close()
-        except IOError, err:
-            self.log("Error trying to write to file (%s): %s" % (sysconf_file, err))
+        contents = ""
+        if self.options['condor_location'].value:
+            contents += "PATH=%s/bin:%s/sbin:$PATH\n" % (condor_dir, condor_dir)
+            contents += "export PATH\n"
+        if not utilities.atomic_write(sysconf_file, contents):
+            self.log("Error trying to write to file (%s)" % sysconf_file)
             raise ConfigFailed
 
         # Adjust the Condor-Cron configuration
         conf_file = os.path.join('/', 'etc', 'condor-cron', 'config.d', 'condor_location')
-        try:
-            config = open(conf_file, 'w')
-            if self.options['condor_location'].value:
-                config.write("RELEASE_DIR = %s" % condor_dir)
-            config.close()
-        except IOError, err:
-            self.log("Error trying to write to file (%s): %s" % (conf_file, err))
+        contents = ""
+        if self.options['condor_location'].value:
+            contents = "RELEASE_DIR = %s" % condor_dir
+        if not utilities.atomic_write(conf_file, contents):
+            self.log("Error trying to write to file (%s)" % conf_file)
             raise ConfigFailed
 
     def _validate_host_list(self, hosts, setting):
@@ -833,20 +840,27 @@ class RsvConfiguration(BaseConfiguration):
         config.optionxform = str  # rsv.conf is case-sensitive
 
         if os.path.exists(self.rsv_conf):
-            config.read(self.rsv_conf)
+            config.read(utilities.staged_path(self.rsv_conf))
 
         if not config.has_section('rsv'):
             config.add_section('rsv')
 
         return config
 
+    def _write_config(self, filename, config):
+        """Write the contents of a ConfigParser to filename
+
+        :raise ConfigFailed: if writing the file failed
+        """
+        config_buf = cStringIO.StringIO()
+        config.write(config_buf)
+        if not utilities.atomic_write(filename, config_buf.getvalue()):
+            self.log("Error writing to %s" % filename, level=logging.ERROR)
+            raise ConfigFailed
+
     def _write_rsv_conf(self, config):
         """Write the contents of a ConfigParser back to the rsv.conf file"""
-        config_fp = open(self.rsv_conf, 'w')
-        try:
-            config.write(config_fp)
-        finally:
-            config_fp.close()
+        self._write_config(self.rsv_conf, config)
 
     def _configure_cert_info(self):
         """ Configure certificate information """
@@ -925,28 +939,20 @@ class RsvConfiguration(BaseConfiguration):
         allmetrics_conf_path = os.path.join(host_metrics_dir, "allmetrics.conf")
 
         try:
-            os.mkdir(host_metrics_dir)
+            os.mkdir(utilities.root_path(host_metrics_dir))
         except OSError:
             pass  # Dir already exists.
 
         config = ConfigParser.RawConfigParser()
         config.optionxform = str  # Conf is case-sensitive.
 
-        config.read(allmetrics_conf_path)  # Does nothing if the file can't be read.
+        config.read(utilities.staged_path(allmetrics_conf_path))  # Does nothing if the file can't be read.
 
         if not config.has_section('allmetrics'):
             config.add_section('allmetrics')
         config.set('allmetrics', 'ce-type', ce_type)
 
-        config_fp = open(allmetrics_conf_path, 'w')
-        try:
-            try:
-                config.write(config_fp)
-            except EnvironmentError, err:
-                self.log("Error writing to %s: %s" % (allmetrics_conf_path, str(err)), level=logging.ERROR)
-                raise ConfigFailed
-        finally:
-            config_fp.close()
+        self._write_config(allmetrics_conf_path, config)
 
     def _configure_consumers(self):
         """ Enable the appropriate consumers """
@@ -986,9 +992,15 @@ class RsvConfiguration(BaseConfiguration):
         """ Store the nagios configuration """
 
         # The Nagios conf file contains a password so set it to mode 0400 owned by rsv
+        # The file comes from the rsv-consumers rpm, so there is no copy of it
+        # to fix up when rendering into a staging root
         pw_file = os.path.join(self.rsv_conf_dir, 'rsv-nagios.conf')
-        os.chown(pw_file, self.uid, self.gid)
-        os.chmod(pw_file, 0400)
+        if utilities.get_root() is None:
+            os.chown(pw_file, self.uid, self.gid)
+            os.chmod(pw_file, 0400)
+        else:
+            self.log("Rendering into %s, not changing the ownership of %s" %
+                     (utilities.get_root(), pw_file))
 
         # Add the configuration file
         nagios_conf_file = os.path.join(self.rsv_conf_dir, 'consumers/nagios-consumer.conf')
@@ -996,7 +1008,7 @@ class RsvConfiguration(BaseConfiguration):
         config.optionxform = str
 
         if os.path.exists(nagios_conf_file):
-            config.read(nagios_conf_file)
+            config.read(utilities.staged_path(nagios_conf_file))
 
         if not config.has_section('nagios-consumer'):
             config.add_section('nagios-consumer')
@@ -1007,9 +1019,7 @@ class RsvConfiguration(BaseConfiguration):
 
         config.set("nagios-consumer", "args", args)
 
-        config_fp = open(nagios_conf_file, 'w')
-        config.write(config_fp)
-        config_fp.close()
+        self._write_config(nagios_conf_file, config)
 
     def _configure_zabbix_files(self):
         """ Store the zabbix configuration """
@@ -1022,7 +1032,7 @@ class RsvConfiguration(BaseConfiguration):
         config.optionxform = str
 
         if os.path.exists(zabbix_conf_file):
-            config.read(zabbix_conf_file)
+            config.read(utilities.staged_path(zabbix_conf_file))
 
         if not config.has_section('zabbix-consumer'):
             config.add_section('zabbix-consumer')
@@ -1033,9 +1043,7 @@ class RsvConfiguration(BaseConfiguration):
 
         config.set("zabbix-consumer", "args", args)
 
-        config_fp = open(zabbix_conf_file, 'w')
-        config.write(config_fp)
-        config_fp.close()
+        self._write_config(zabbix_conf_file, config)
 
     def load_rsv_meta_files(self):
         """ All the RSV meta files are in INI format.  Pull them in so that we know what
@@ -1117,7 +1125,7 @@ class RsvConfiguration(BaseConfiguration):
 
         self.log("Putting collector '%s' into Gratia conf file '%s'" % (collector, probe_conf))
 
-        conf = open(probe_conf).read()
+        conf = open(utilities.staged_path(probe_conf)).read()
 
         conf = re.sub("CollectorHost=\".+\"", "CollectorHost=\"%s\"" % collector, conf)
         conf = re.sub("SSLHost=\".+\"", "SSLHost=\"%s\"" % collector, conf)
@@ -1134,24 +1142,24 @@ class RsvConfiguration(BaseConfiguration):
         parent_dir = os.path.join('/', 'var', 'log', 'gratia', 'rsv')
 
         log_folder = os.path.join(parent_dir, 'logs')
-        if not os.path.exists(log_folder):
+        if not os.path.exists(utilities.root_path(log_folder)):
             utilities.make_directory(log_folder, 0755, self.uid, self.gid)
-        elif os.path.isdir(log_folder):
-            os.chown(log_folder, self.uid, self.gid)
+        elif os.path.isdir(utilities.root_path(log_folder)):
+            os.chown(utilities.root_path(log_folder), self.uid, self.gid)
         conf = re.sub(r'(\s*)LogFolder\s*=.*', r'\1LogFolder="' + log_folder + '"', conf, 1)
 
         data_folder = os.path.join(parent_dir, 'data')
-        if not os.path.exists(data_folder):
+        if not os.path.exists(utilities.root_path(data_folder)):
             utilities.make_directory(data_folder, 0755, self.uid, self.gid)
-        elif os.path.isdir(data_folder):
-            os.chown(data_folder, self.uid, self.gid)
+        elif os.path.isdir(utilities.root_path(data_folder)):
+            os.chown(utilities.root_path(data_folder), self.uid, self.gid)
         conf = re.sub(r'(\s*)DataFolder\s*=.*', r'\1DataFolder="' + data_folder + '"', conf, 1)
 
         working_folder = os.path.join(parent_dir, 'tmp')
-        if not os.path.exists(working_folder):
+        if not os.path.exists(utilities.root_path(working_folder)):
             utilities.make_directory(working_folder, 0755, self.uid, self.gid)
-        elif os.path.isdir(working_folder):
-            os.chown(working_folder, self.uid, self.gid)
+        elif os.path.isdir(utilities.root_path(working_folder)):
+            os.chown(utilities.root_path(working_folder), self.uid, self.gid)
         conf = re.sub(r'(\s*)WorkingFolder\s*=.*',
                       r'\1WorkingFolder="' + working_folder + '"',
                       conf,
@@ -1223,6 +1231,15 @@ class RsvConfiguration(BaseConfiguration):
 
         return set(['rsv', 'condor-cron'])
 
+    def produces(self):
+        return set([self.rsv_conf_dir,
+                    '/etc/gratia/metric/ProbeConfig',
+                    '/etc/sysconfig/condor-cron',
+                    '/etc/condor-cron/config.d'])
+
+    def relevant_rpms(self):
+        return set(['rsv-core', 'rsv-consumers-zabbix'])
+
     def _configure_condor_cron_ids(self):
         """Ensure UID/GID of cndrcron user is valid and is in the condor-cron configs
         :raise ConfigFailed: if modifying condor-cron configs failed
@@ -1230,7 +1247,7 @@ class RsvConfiguration(BaseConfiguration):
         """
         # check the uid/gid in the condor_ids file
         condor_id_fname = "/etc/condor-cron/config.d/condor_ids"
-        ids = open(condor_id_fname).read()
+        ids = open(utilities.staged_path(condor_id_fname)).read()
         id_regex = re.compile(r'^\s*CONDOR_IDS\s+=\s+(\d+)\.(\d+).*', re.MULTILINE)
         condor_ent = pwd.getpwnam('cndrcron')
         match = id_regex.search(ids)
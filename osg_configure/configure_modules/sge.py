@@ -5,6 +5,7 @@ import logging
 import subprocess
 
 from osg_configure.modules import utilities
+from osg_configure.modules import configeditor
 from osg_configure.modules import configfile
 from osg_configure.modules import validation
 from osg_configure.modules.jobmanagerconfiguration import JobManagerConfiguration
@@ -286,7 +287,7 @@ class SGEConfiguration(JobManagerConfiguration):
 
         Returns True if successful, False otherwise
         """
-        buf = open(SGEConfiguration.GRAM_CONFIG_FILE).read()
+        buf = open(utilities.staged_path(SGEConfiguration.GRAM_CONFIG_FILE)).read()
 
         for binfile in ['qsub', 'qstat', 'qdel', 'qconf']:
             bin_location = os.path.join(self.options['sge_bin_location'].value, binfile)
@@ -316,18 +317,14 @@ class SGEConfiguration(JobManagerConfiguration):
 
     def setup_blah_config(self):
         """
-        Populate blah.config with correct values
-
-        Return True if successful, False otherwise
+        Populate blah.config with correct values.  The edits are written by
+        configeditor.flush() once all modules are done; does not do anything
+        if blah.config is missing (e.g. if blahp is not installed).
         """
-        if os.path.exists(self.BLAH_CONFIG):
-            contents = utilities.read_file(self.BLAH_CONFIG)
-            contents = utilities.add_or_replace_setting(contents, "sge_rootpath", self.options['sge_root'].value,
-                                                        quote_value=True)
-            contents = utilities.add_or_replace_setting(contents, "sge_cellname", self.options['sge_cell'].value,
-                                                        quote_value=True)
-            return utilities.atomic_write(self.BLAH_CONFIG, contents)
-        return False
+        blah_config = configeditor.edit(self.BLAH_CONFIG)
+        if blah_config is not None:
+            blah_config.set("sge_rootpath", self.options['sge_root'].value, quote_value=True)
+            blah_config.set("sge_cellname", self.options['sge_cell'].value, quote_value=True)
 
     def enabled_services(self):
         """Return a list of  system services needed for module to work
@@ -342,6 +339,10 @@ class SGEConfiguration(JobManagerConfiguration):
             services.add('globus-gatekeeper')
         return services
 
+    def produces(self):
+        return super(SGEConfiguration, self).produces() | set([SGEConfiguration.SGE_CONFIG_FILE,
+                                                               SGEConfiguration.GRAM_CONFIG_FILE])
+
     def get_accounting_file(self):
         """
         Return the location of the SGE Accounting file
@@ -255,6 +255,12 @@ class SiteAttributes(BaseConfiguration):
         self.log('SiteAttributes.check_attributes completed')
         return attributes_ok
 
+    def hostnames(self):
+        """Return a set of the host names check_attributes() resolves"""
+        if not self.enabled or utilities.blank(self.options['host_name'].value):
+            return set()
+        return set([self.options['host_name'].value])
+
     def module_name(self):
         """Return a string with the name of the module"""
         return "SiteInformation"
@@ -244,7 +244,7 @@ class SlurmConfiguration(JobManagerConfiguration):
 
         Returns True if successful, False otherwise
         """
-        contents = open(SlurmConfiguration.GRAM_CONFIG_FILE).read()
+        contents = open(utilities.staged_path(SlurmConfiguration.GRAM_CONFIG_FILE)).read()
         for binfile in ['qsub', 'qstat', 'qdel']:
             bin_location = os.path.join(self.slurm_bin_location, binfile)
             if validation.valid_file(bin_location):
@@ -264,6 +264,10 @@ class SlurmConfiguration(JobManagerConfiguration):
 
         return set(['globus-gridftp-server']).union(self.gateway_services())
 
+    def produces(self):
+        return super(SlurmConfiguration, self).produces() | set([SlurmConfiguration.SLURM_CONFIG_FILE,
+                                                                 SlurmConfiguration.GRAM_CONFIG_FILE])
+
     def get_db_host(self):
         """
         Return the hostname of the machine with the Slurm DB
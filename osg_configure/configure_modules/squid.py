@@ -156,6 +156,13 @@ class SquidConfiguration(BaseConfiguration):
         self.log('SquidConfiguration.configure completed')
         return True
 
+    def hostnames(self):
+        """Return a set of the host names check_attributes() resolves"""
+        location = self.options['location'].value
+        if not self.enabled or self.ignored or utilities.blank(location) or location.count(':') != 1:
+            return set()
+        return set([location.split(':')[0]])
+
     def module_name(self):
         """Return a string with the name of the module"""
         return "Squid"
@@ -1,7 +1,6 @@
 """ Module to handle attributes related to the storage """
 
 import os
-import shutil
 import stat
 import logging
 
@@ -156,14 +155,15 @@ class StorageConfiguration(BaseConfiguration):
                          level=logging.WARNING)
 
             try:
-                shutil.copyfile(grid3_source, grid3_location)
+                if not utilities.atomic_write(grid3_location, open(grid3_source).read()):
+                    raise IOError("Can't write %s" % grid3_location)
             except IOError:
                 self.log("Can't copy grid3-location file from %s to %s" % (grid3_source,
                                                                            grid3_location),
                          level=logging.WARNING)
             try:
-                if validation.valid_file(grid3_location):
-                    os.chmod(grid3_location, 0666)
+                if validation.valid_file(utilities.root_path(grid3_location)):
+                    os.chmod(utilities.root_path(grid3_location), 0666)
             except IOError:
                 self.log("Can't set permissions on grid3-location file at %s" % \
                          (grid3_location),
@@ -180,6 +180,12 @@ class StorageConfiguration(BaseConfiguration):
         """Return a boolean that indicates whether this module can be configured separately"""
         return True
 
+    def produces(self):
+        return set([os.path.join(self.options['app_dir'].value, 'etc', 'grid3-locations.txt')])
+
+    def relevant_rpms(self):
+        return set(['globus-gatekeeper', 'htcondor-ce'])
+
     def _app_dir_in_oasis(self, app_dir):
         return app_dir.startswith('/cvmfs/oasis.opensciencegrid.org')
 
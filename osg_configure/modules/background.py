@@ -0,0 +1,175 @@
+""" Module to run slow commands in the background while modules are configured """
+
+import cStringIO
+import sys
+import threading
+
+__all__ = ['BackgroundTask',
+           'start',
+           'get',
+           'join_all',
+           'wait_all',
+           'reset']
+
+_lock = threading.Lock()
+# BackgroundTask objects keyed by name and the names in the order started
+_tasks = {}
+_order = []
+
+
+class BackgroundTask(object):
+    """
+    Class running function(*args, output=...) on a thread.  Whatever the
+    function writes to output is held back and passed on to stdout when the
+    task is joined, so that it shows up where the function used to be called.
+    """
+
+    def __init__(self, name, function, args=(), check=None):
+        """
+        Arguments:
+        name - name of the task
+        function - callable to run, it gets a file-like object to write its
+                   messages to as the output keyword argument
+        args - positional arguments to pass to function
+
+        Keyword arguments:
+        check - callable given the result of function when the task is first
+                joined, on the joining thread; it can log and raise
+                exceptions to report failures
+        """
+        self.name = name
+        self.function = function
+        self.args = args
+        self.check = check
+        self.output = cStringIO.StringIO()
+        self.result = None
+        self.exc_info = None
+        self.joined = False
+        self.thread = threading.Thread(target=self._run, name=name)
+        # don't keep osg-configure running if it exits without joining
+        self.thread.setDaemon(True)
+        self._join_lock = threading.Lock()
+
+    def start(self):
+        """Start running the task"""
+        self.thread.start()
+
+    def _run(self):
+        """Call the function, recording its result or exception"""
+        try:
+            self.result = self.function(*self.args, **{'output': self.output})
+        except Exception:
+            self.exc_info = sys.exc_info()
+
+    def done(self):
+        """Return True if the function finished"""
+        return not self.thread.isAlive()
+
+    def join(self):
+        """
+        Wait for the task to finish and return the result of the function.
+        The first join passes the output of the function on and runs the
+        check, later ones return the same result or raise the same exception.
+        """
+        self._join_lock.acquire()
+        try:
+            while self.thread.isAlive():
+                # use a timeout so that KeyboardInterrupt gets handled
+                self.thread.join(1)
+            if not self.joined:
+                self.joined = True
+                sys.stdout.write(self.output.getvalue())
+                sys.stdout.flush()
+                if self.exc_info is None and self.check is not None:
+                    try:
+                        self.check(self.result)
+                    except Exception:
+                        self.exc_info = sys.exc_info()
+        finally:
+            self._join_lock.release()
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+        return self.result
+
+
+def start(name, function, args=(), check=None):
+    """
+    Start running function(*args) in the background as task name and return
+    the BackgroundTask; if a task with that name was already started, it is
+    returned instead.  See BackgroundTask for the arguments.
+    """
+    _lock.acquire()
+    try:
+        task = _tasks.get(name)
+        if task is None:
+            task = BackgroundTask(name, function, args, check)
+            _tasks[name] = task
+            _order.append(name)
+            task.start()
+        return task
+    finally:
+        _lock.release()
+
+
+def get(name):
+    """Return the BackgroundTask started as name or None"""
+    _lock.acquire()
+    try:
+        return _tasks.get(name)
+    finally:
+        _lock.release()
+
+
+def join_all():
+    """
+    Join every task in the order they were started, the first exception
+    raised by a task or its check is re-raised once all tasks are done
+    """
+    _lock.acquire()
+    try:
+        tasks = [_tasks[name] for name in _order]
+    finally:
+        _lock.release()
+    failure = None
+    for task in tasks:
+        try:
+            task.join()
+        except Exception:
+            if failure is None:
+                failure = sys.exc_info()
+    if failure is not None:
+        raise failure[0], failure[1], failure[2]
+
+
+def wait_all():
+    """
+    Join every task in the order they were started, ignoring the exceptions
+    they raise, so that no task is left running and all output is passed on
+    when a run fails.  Returns the number of tasks that failed.
+    """
+    _lock.acquire()
+    try:
+        tasks = [_tasks[name] for name in _order]
+    finally:
+        _lock.release()
+    failures = 0
+    for task in tasks:
+        try:
+            task.join()
+        except Exception:
+            failures += 1
+    return failures
+
+
+def reset():
+    """Wait for the running tasks and forget all tasks"""
+    _lock.acquire()
+    try:
+        tasks = [_tasks[name] for name in _order]
+        _tasks.clear()
+        del _order[:]
+    finally:
+        _lock.release()
+    for task in tasks:
+        while task.thread.isAlive():
+            task.thread.join(1)
@@ -100,12 +100,13 @@ class BaseConfiguration(object):
         exception = kwargs.get('exception', False)
         message = ""
         if 'option' in kwargs and 'section' in kwargs:
-            file_location = configfile.get_option_location(kwargs['option'],
-                                                           kwargs['section'])
-            if file_location is not None:
-                message = "Option '%s' in section '%s' located in %s: " % (kwargs['option'],
-                                                                           kwargs['section'],
-                                                                           file_location)
+            location = configfile.get_option_line(kwargs['option'],
+                                                  kwargs['section'])
+            if location is not None:
+                message = "Option '%s' in section '%s' located in %s, line %d: " % (kwargs['option'],
+                                                                                    kwargs['section'],
+                                                                                    location[0],
+                                                                                    location[1])
         message += mesg
         self.logger.log(log_level, message, exc_info=exception)
 
@@ -114,9 +115,9 @@ class BaseConfiguration(object):
         Make sure config argument is of the correct type
         """
 
-        if configuration is None or \
-                (configuration.__class__.__name__ is not 'ConfigParser' and
-                         configuration.__class__.__name__ is not 'SafeConfigParser'):
+        # SafeConfigParser and the ResolvedConfigParser of config snapshots
+        # derive from ConfigParser
+        if not isinstance(configuration, ConfigParser.ConfigParser):
             err_msg = 'Invalid type for configuration, must be a ConfigParser '
             err_msg += 'or SafeConfigParser object'
             self.log(err_msg, level=logging.ERROR)
@@ -201,6 +202,57 @@ class BaseConfiguration(object):
         """
         return set()
 
+    def start_background_tasks(self):
+        """
+        Start slow commands configure() needs with background.start() so
+        that they run while other modules are configured.  Called before any
+        module is configured, only for the modules that will be configured.
+        """
+        pass
+
+    def hostnames(self):
+        """
+        Return a set of the host names check_attributes() checks for
+        resolving.  Used to look them all up at once before checking.
+        """
+        return set()
+
+    def consumes(self):
+        """
+        Return a set of the artifacts (files, services) this module reads in
+        configure() that other modules may produce.  Used to order modules
+        when configuring.
+        """
+        return set()
+
+    def produces(self):
+        """
+        Return a set of the artifacts (files, services) this module writes or
+        changes in configure().  Modules that produce the same artifact are
+        not configured at the same time.
+        """
+        return set()
+
+    def input_values(self):
+        """
+        Return a dict with the settings configure() depends on.  Used to
+        decide whether the module needs to be configured again when running
+        incrementally.
+        """
+        values = {'enabled': self.enabled,
+                  'ignored': self.ignored}
+        for name, option in self.options.items():
+            values['option:' + name] = getattr(option, 'value', None)
+        return values
+
+    def relevant_rpms(self):
+        """
+        Return a set of the names of rpms whose presence changes what
+        configure() does.  Used to decide whether the module needs to be
+        configured again when running incrementally.
+        """
+        return set()
+
     @staticmethod
     def section_disabled(configuration, section):
         """
@@ -0,0 +1,403 @@
+""" Module to look up HTCondor configuration values with few condor tool runs """
+
+import os
+import re
+import sys
+import threading
+
+from osg_configure.modules import runner
+
+__all__ = ['CONDOR_CONFIG_VAL_TIMEOUT',
+           'get_value',
+           'get_values',
+           'run_cached',
+           'file_written',
+           'enable_evaluator',
+           'reset',
+           'ConfigEvaluator']
+
+CONDOR_CONFIG_VAL_TIMEOUT = 60
+# writes to files under these directories change what the condor tools report
+CONFIG_ROOTS = ['/etc/condor', '/etc/condor-ce', '/etc/condor-cron']
+# top level config file read by each tool
+CONFIG_FILES = {'condor_config_val': os.environ.get('CONDOR_CONFIG', '/etc/condor/condor_config'),
+                'condor_ce_config_val': '/etc/condor-ce/condor_config'}
+# files in LOCAL_CONFIG_DIR that HTCondor skips unless the config says otherwise
+DEFAULT_EXCLUDE_REGEXP = r'^((\..*)|(.*~)|(#.*)|(.*\.rpmsave)|(.*\.rpmnew))$'
+
+ASSIGNMENT_RE = re.compile(r'([A-Za-z0-9_.]+)\s*=\s*(.*)$')
+FUNCTION_RE = re.compile(r'\$[A-Za-z_]+\(')
+
+_lock = threading.Lock()
+# expanded values keyed by (executable, variable), None if not defined
+_values = {}
+# CommandResult objects keyed by command tuple
+_results = {}
+# ConfigEvaluator objects keyed by executable, None if evaluation is off
+_evaluators = None
+
+
+class _Unknown(Exception):
+    """Raised when a value can't be worked out without running condor"""
+
+
+class ConfigEvaluator(object):
+    """
+    Class evaluating HTCondor config files in the order condor reads them:
+    the main config file, then the files in LOCAL_CONFIG_DIR and the
+    LOCAL_CONFIG_FILE list.  Only plain NAME = value assignments with $(NAME)
+    and $(NAME:default) references are understood.  Anything else, values
+    that depend on HTCondor's built-in defaults or on the environment, and
+    variables set differently in LOCAL_CONFIG_DIR and LOCAL_CONFIG_FILE, are
+    reported as unknown so that condor is asked instead.
+    """
+
+    def __init__(self, config_file):
+        """
+        Arguments:
+        config_file - top level config file
+        """
+        self.config_file = config_file
+        self.values = {}
+        # names whose value can't be worked out
+        self.unknown = set()
+        self.usable = True
+        try:
+            self._read_config()
+        except (_Unknown, IOError, OSError):
+            self.usable = False
+
+    def _read_config(self):
+        """
+        Read the config files
+
+        Raises:
+        _Unknown -- the files use something the evaluator doesn't handle
+        IOError -- a config file can't be read
+        """
+        self._read_file(self.config_file, self.values)
+        local_files = []
+        for name in self._split_list(self._setting('LOCAL_CONFIG_FILE', '')):
+            if os.path.isfile(name):
+                local_files.append(name)
+        dir_files = []
+        exclude = re.compile(self._setting('LOCAL_CONFIG_DIR_EXCLUDE_REGEXP', DEFAULT_EXCLUDE_REGEXP))
+        # HTCondor versions differ in their built-in default for this one
+        for directory in self._split_list(self._setting('LOCAL_CONFIG_DIR', None)):
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if not exclude.match(name) and os.path.isfile(path):
+                    dir_files.append(path)
+
+        # the two sets of files are read in an order that depends on the
+        # HTCondor version, so only trust settings made in one of them
+        base_values = self.values
+        results = []
+        for filenames in (dir_files, local_files):
+            values = dict(base_values)
+            for filename in filenames:
+                self._read_file(filename, values)
+            results.append(values)
+        (dir_values, local_values) = results
+        self.values = dict(base_values)
+        for name in set(dir_values) | set(local_values):
+            dir_changed = dir_values.get(name) != base_values.get(name)
+            local_changed = local_values.get(name) != base_values.get(name)
+            if dir_changed and local_changed:
+                self.unknown.add(name)
+            elif dir_changed:
+                self.values[name] = dir_values[name]
+            elif local_changed:
+                self.values[name] = local_values[name]
+        for name in ('LOCAL_CONFIG_FILE', 'LOCAL_CONFIG_DIR'):
+            if self.values.get(name) != base_values.get(name) or name in self.unknown:
+                raise _Unknown(name)
+
+    def _setting(self, name, default):
+        """
+        Return the expanded value of a setting read from the main config
+        file or default if it's not set there
+
+        Raises:
+        _Unknown -- the value can't be worked out or isn't set and default
+                    is None
+        """
+        if name not in self.values and name not in self.unknown and default is not None:
+            return default
+        return self.lookup(name)
+
+    @staticmethod
+    def _split_list(value):
+        """Split a comma or space separated list of files"""
+        return [item for item in re.split(r'[,\s]+', value) if item]
+
+    def _read_file(self, filename, values):
+        """
+        Add the assignments in filename to values
+
+        Raises:
+        _Unknown -- the file uses something the evaluator doesn't handle
+        IOError -- the file can't be read
+        """
+        lines = []
+        continued = ''
+        for line in open(filename).read().splitlines():
+            line = continued + line
+            if line.rstrip().endswith('\\'):
+                continued = line.rstrip()[:-1]
+                continue
+            continued = ''
+            lines.append(line)
+        if continued:
+            lines.append(continued)
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            match = ASSIGNMENT_RE.match(line)
+            if not match:
+                # include, use, if/else, name @= multi-line values, ...
+                raise _Unknown(line)
+            name = match.group(1).upper()
+            value = match.group(2).strip()
+            if '.' in name:
+                # subsystem or local name prefixes may override the
+                # unprefixed variable for the tools
+                self.unknown.add(name.split('.')[-1])
+                continue
+            self_reference = re.compile(r'\$\(\s*%s\s*(:[^)]*)?\)' % re.escape(name), re.I)
+            if self_reference.search(value):
+                if name not in values:
+                    self.unknown.add(name)
+                    continue
+                previous = values[name]
+                value = self_reference.sub(lambda _: previous, value)
+            values[name] = value
+
+    def _expand(self, name, stack):
+        """
+        Return the expanded value of name
+
+        Raises:
+        _Unknown -- the value can't be worked out
+        """
+        if name in self.unknown or name in stack or name not in self.values:
+            raise _Unknown(name)
+        if ('_CONDOR_' + name) in os.environ:
+            raise _Unknown(name)
+        value = self.values[name]
+        stack = stack + (name,)
+        parts = []
+        position = 0
+        while True:
+            start = value.find('$', position)
+            if start < 0:
+                parts.append(value[position:])
+                break
+            parts.append(value[position:start])
+            if FUNCTION_RE.match(value, start) or value.startswith('$$', start):
+                # $ENV(), $INT(), $$(), ...
+                raise _Unknown(value)
+            if not value.startswith('$(', start):
+                parts.append('$')
+                position = start + 1
+                continue
+            end = value.find(')', start)
+            if end < 0 or '(' in value[start + 2:end]:
+                raise _Unknown(value)
+            reference = value[start + 2:end].split(':', 1)[0].strip().upper()
+            # a default only applies if the variable isn't defined anywhere,
+            # including HTCondor's built-in defaults
+            parts.append(self._expand(reference, stack))
+            position = end + 1
+        return ''.join(parts)
+
+    def lookup(self, name):
+        """
+        Return the expanded value of name the way condor_config_val -expand
+        would print it
+
+        Raises:
+        _Unknown -- the value can't be worked out
+        """
+        return self._expand(name.upper(), ()).strip()
+
+    def evaluate(self, name):
+        """Return the expanded value of name or None if it's unknown"""
+        if not self.usable:
+            return None
+        try:
+            return self.lookup(name)
+        except _Unknown:
+            return None
+
+
+def _get_evaluator(executable):
+    """Return the ConfigEvaluator for executable or None"""
+    if _evaluators is None or executable not in CONFIG_FILES:
+        return None
+    if executable not in _evaluators:
+        _evaluators[executable] = ConfigEvaluator(CONFIG_FILES[executable])
+    return _evaluators[executable]
+
+
+def _run_expand(executable, variables, quiet_undefined):
+    """
+    Run executable -expand once for all of variables and return a dict
+    mapping each variable to its value, or None for variables that are not
+    defined or couldn't be looked up
+    """
+    values = dict((variable, None) for variable in variables)
+    try:
+        result = runner.run([executable, '-expand'] + variables, timeout=CONDOR_CONFIG_VAL_TIMEOUT,
+                            read_only=True)
+    except OSError:
+        return values
+    if result.timed_out:
+        sys.stderr.write("%s -expand %s did not finish within %d seconds\n" %
+                         (executable, ' '.join(variables), CONDOR_CONFIG_VAL_TIMEOUT))
+        return values
+    undefined = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('Not defined:'):
+            undefined.add(line[len('Not defined:'):].strip().upper())
+            if quiet_undefined:
+                continue
+        sys.stderr.write(line + "\n")
+    defined = [variable for variable in variables if variable.upper() not in undefined]
+    lines = result.stdout.splitlines()
+    if len(lines) != len(defined):
+        if len(variables) > 1:
+            # can't tell which line belongs to which variable
+            for variable in variables:
+                values.update(_run_expand(executable, [variable], quiet_undefined))
+        elif result.succeeded():
+            values[variables[0]] = result.stdout.strip()
+        return values
+    if not result.succeeded() and not undefined:
+        return values
+    for variable, line in zip(defined, lines):
+        values[variable] = line.strip()
+    return values
+
+
+def get_values(variables, executable='condor_config_val', quiet_undefined=False):
+    """
+    Return a dict with the expanded values of variables.  Values are
+    remembered for the rest of the run; the ones not known yet are worked
+    out by the evaluator if it's enabled and the rest are looked up with a
+    single run of executable.
+
+    Arguments:
+    variables - names of the variables to look up
+    executable - condor_config_val or a wrapper like condor_ce_config_val
+    quiet_undefined - set to True if messages from the tool claiming a
+                      variable is undefined should be silenced
+
+    Returns:
+    dict mapping each variable to its value or to None if it's not defined
+    or the tool reported an error
+    """
+    values = {}
+    missing = []
+    _lock.acquire()
+    try:
+        for variable in variables:
+            key = (executable, variable.upper())
+            if key in _values:
+                values[variable] = _values[key]
+            elif variable not in missing:
+                missing.append(variable)
+        evaluator = _get_evaluator(executable)
+    finally:
+        _lock.release()
+    if evaluator is not None:
+        for variable in list(missing):
+            value = evaluator.evaluate(variable)
+            if value is not None:
+                values[variable] = value
+                missing.remove(variable)
+    if missing:
+        values.update(_run_expand(executable, missing, quiet_undefined))
+    _lock.acquire()
+    try:
+        for variable in variables:
+            _values[(executable, variable.upper())] = values[variable]
+    finally:
+        _lock.release()
+    return values
+
+
+def get_value(variable, executable='condor_config_val', quiet_undefined=False):
+    """
+    Return the expanded value of variable, or None if it's not defined or
+    the tool reported an error; see get_values
+    """
+    return get_values([variable], executable, quiet_undefined)[variable]
+
+
+def run_cached(args, timeout=CONDOR_CONFIG_VAL_TIMEOUT):
+    """
+    Run a read only condor query command once per run and return its
+    CommandResult, later calls with the same arguments get the same result
+
+    Raises:
+    OSError -- the command can't be run
+    """
+    key = tuple(args)
+    _lock.acquire()
+    try:
+        if key in _results:
+            return _results[key]
+    finally:
+        _lock.release()
+    result = runner.run(list(args), timeout=timeout, read_only=True)
+    if not result.timed_out:
+        _lock.acquire()
+        try:
+            _results[key] = result
+        finally:
+            _lock.release()
+    return result
+
+
+def file_written(filename):
+    """
+    Forget the values looked up so far if filename is an HTCondor config
+    file, since the tools may report something else now
+    """
+    for root in CONFIG_ROOTS:
+        if filename == root or filename.startswith(root + '/'):
+            reset()
+            return
+
+
+def enable_evaluator(enabled=True):
+    """
+    Turn the pure Python config evaluator on or off; when on, values that
+    can be worked out from the config files don't need a condor tool run
+    """
+    global _evaluators
+    _lock.acquire()
+    try:
+        if enabled:
+            _evaluators = {}
+        else:
+            _evaluators = None
+    finally:
+        _lock.release()
+
+
+def reset():
+    """Forget the values and command results looked up so far"""
+    global _evaluators
+    _lock.acquire()
+    try:
+        _values.clear()
+        _results.clear()
+        if _evaluators is not None:
+            _evaluators = {}
+    finally:
+        _lock.release()
@@ -0,0 +1,175 @@
+""" Module to edit var=value config files shared by several modules in memory """
+
+import re
+import threading
+
+from osg_configure.modules import utilities
+
+__all__ = ['SettingsFile',
+           'ConfigEditor',
+           'edit',
+           'flush',
+           'discard']
+
+# variable set on a line, matched the way add_or_replace_setting does
+SETTING_RE = re.compile(r'[ \t\r\f\v]*([^=\s]+)\s*=')
+
+
+class SettingsFile(object):
+    """
+    Class holding the contents of a var=value config file as a list of
+    lines with an index from each variable to the lines setting it, so that
+    a setting can be changed without scanning the whole file
+    """
+
+    def __init__(self, filename, contents):
+        """
+        Arguments:
+        filename - name of the file
+        contents - current contents of the file
+        """
+        self.filename = filename
+        self.lines = contents.splitlines(True)
+        self._lock = threading.Lock()
+        # variable -> indices of the lines setting it, in file order; lines
+        # that are removed are set to None so the indices stay valid
+        self._index = {}
+        for number, line in enumerate(self.lines):
+            match = SETTING_RE.match(line)
+            if match:
+                self._index.setdefault(match.group(1), []).append(number)
+
+    def set(self, variable, new_value, quote_value=True):
+        """
+        Change the first line setting variable to set it to new_value, or
+        add a line at the end if there is none; see add_or_replace_setting
+
+        If quote_value is True (default), the value is double-quoted first
+        """
+        if quote_value:
+            new_value = '"%s"' % new_value
+        new_line = '%s=%s' % (variable, new_value)
+        self._lock.acquire()
+        try:
+            numbers = self._index.get(variable)
+            if numbers:
+                old_line = self.lines[numbers[0]]
+                ending = old_line[len(old_line.rstrip('\r\n')):]
+                self.lines[numbers[0]] = new_line + ending
+            else:
+                last = len(self.lines) - 1
+                while last >= 0 and self.lines[last] is None:
+                    last -= 1
+                if last >= 0 and not self.lines[last].endswith('\n'):
+                    self.lines[last] += '\n'
+                self._index[variable] = [len(self.lines)]
+                self.lines.append(new_line + "\n")
+        finally:
+            self._lock.release()
+
+    def remove(self, variable):
+        """Remove all lines setting variable"""
+        self._lock.acquire()
+        try:
+            numbers = self._index.pop(variable, None)
+            if not numbers:
+                return
+            for number in numbers:
+                self.lines[number] = None
+        finally:
+            self._lock.release()
+
+    def contents(self):
+        """Return the edited contents of the file"""
+        self._lock.acquire()
+        try:
+            return ''.join([line for line in self.lines if line is not None])
+        finally:
+            self._lock.release()
+
+
+class ConfigEditor(object):
+    """
+    Class loading each shared config file once and holding the edits made to
+    it until flush() writes each file with a single atomic_write, which
+    leaves files with unchanged contents alone
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # SettingsFile objects keyed by file name, in the order first edited
+        self._files = {}
+        self._order = []
+
+    def edit(self, filename, default=None):
+        """
+        Return the SettingsFile for filename, reading the file the first
+        time it is asked for
+
+        Arguments:
+        filename - name of the file to edit
+
+        Keyword arguments:
+        default - contents to start with if the file can't be read; if
+                  None, None is returned for such files so that edits are
+                  skipped
+        """
+        self._lock.acquire()
+        try:
+            if filename not in self._files:
+                contents = utilities.read_file(filename, default=default)
+                if contents is None:
+                    return None
+                self._files[filename] = SettingsFile(filename, contents)
+                self._order.append(filename)
+            return self._files[filename]
+        finally:
+            self._lock.release()
+
+    def flush(self):
+        """
+        Write the files that were edited and forget all files
+
+        Returns:
+        list of the files that couldn't be written
+        """
+        self._lock.acquire()
+        try:
+            files = [self._files[filename] for filename in self._order]
+            self._files = {}
+            self._order = []
+        finally:
+            self._lock.release()
+        failed = []
+        for settings_file in files:
+            if not utilities.atomic_write(settings_file.filename, settings_file.contents()):
+                failed.append(settings_file.filename)
+        return failed
+
+    def discard(self):
+        """Forget all files and the edits made to them"""
+        self._lock.acquire()
+        try:
+            self._files = {}
+            self._order = []
+        finally:
+            self._lock.release()
+
+
+# editor used for the run
+_editor = ConfigEditor()
+
+
+def edit(filename, default=None):
+    """Return the SettingsFile for filename, see ConfigEditor.edit"""
+    return _editor.edit(filename, default)
+
+
+def flush():
+    """Write the edited files, see ConfigEditor.flush"""
+    return _editor.flush()
+
+
+def discard():
+    """Forget the edits made so far, see ConfigEditor.discard"""
+    _editor.discard()
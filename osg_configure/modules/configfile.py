@@ -1,23 +1,38 @@
 """ Module to hold various utility functions """
 
 import glob
+import fnmatch
 import ConfigParser
 import os
 import sys
+import cStringIO
 
 from osg_configure.modules import exceptions
 from osg_configure.modules import utilities
 from osg_configure.modules import validation
+from osg_configure.modules import inifile
+from osg_configure.modules import parsecache
 
 __all__ = ['get_option_location',
+           'get_option_line',
+           'find_options',
            'get_file_list',
            'read_config_files',
+           'read_config_snapshot',
+           'ConfigSnapshot',
+           'ResolvedConfigParser',
+           'InterpolationCycleError',
+           'OptionIndex',
            'get_option',
            'jobmanager_enabled',
            'Option']
 
 CONFIG_DIRECTORY = '/etc/osg/config.d'
 
+# OptionIndex objects for config directories that have already been read,
+# keyed by directory so that location lookups don't have to re-read files
+_option_indexes = {}
+
 
 def read_config_files(**kwargs):
     """
@@ -34,28 +49,76 @@ def read_config_files(**kwargs):
     IOError -- error when parsing files
     """
 
+    snapshot = read_config_snapshot(**kwargs)
+    if kwargs.get('case_sensitive', False):
+        return snapshot.case_sensitive_config
+    return snapshot.config
+
+
+def read_config_snapshot(**kwargs):
+    """
+    Read and validate the config files located in /etc/osg/config.d once and
+    return a ConfigSnapshot holding the parsed result
+
+    Keyword arguments:
+    config_directory -- indicates which directory holds the config files
+    previous -- ConfigSnapshot read earlier from the same directory; files
+      whose size and modification time haven't changed since are not read
+      or validated again
+
+    Files are looked up in the parse cache first if it has been enabled with
+    parsecache.enable()
+
+    Raises:
+    IOError -- error when reading or parsing files
+    """
+
     config_dir = kwargs.get('config_directory', CONFIG_DIRECTORY)
-    case_sensitive = kwargs.get('case_sensitive', False)
+    previous = kwargs.get('previous', None)
+    cache = parsecache.get_cache()
     if not validation.valid_directory(config_dir):
         raise IOError("%s does not exist" % config_dir)
     file_list = get_file_list(config_directory=config_dir)
+    file_contents = {}
+    file_stats = {}
+    ini_files = {}
+    changed_files = []
+    unread_files = []
     for filename in file_list:
-        if not validation.valid_ini_file(filename):
-            sys.stderr.write("Error found in %s\n" % filename)
-            sys.exit(1)
-    try:
-        config = ConfigParser.SafeConfigParser()
-        if case_sensitive:
-            config.optionxform = str
-    except ConfigParser.Error, e:
-        raise IOError("Can't read and parse config files:\n%s" % e)
-    read_files = config.read(file_list)
-    read_files.sort()
-    if file_list != read_files:
-        unread_files = set(file_list).difference(read_files)
+        try:
+            file_stat = os.stat(filename)
+            file_stats[filename] = (file_stat.st_size, file_stat.st_mtime)
+            if previous is not None and previous.file_stats.get(filename) == file_stats[filename]:
+                file_contents[filename] = previous.file_contents[filename]
+                ini_files[filename] = previous.ini_files[filename]
+                continue
+            if cache is not None:
+                entry = cache.load(filename, file_stat)
+                if entry is not None:
+                    (file_contents[filename], ini_files[filename]) = entry
+                    continue
+            file_contents[filename] = open(filename, 'r').read()
+            changed_files.append((filename, file_stat))
+        except (IOError, OSError):
+            unread_files.append(filename)
+    if unread_files:
         msg = "Can't read following config files:\n %s" % ("\n".join(unread_files))
         raise IOError(msg)
-    return config
+    for filename, file_stat in changed_files:
+        ini_files[filename] = inifile.tokenize(file_contents[filename], filename)
+        if not validation.valid_ini_file(filename, ini_file=ini_files[filename]):
+            sys.stderr.write("Error found in %s\n" % filename)
+            sys.exit(1)
+        if cache is not None:
+            cache.store(filename, file_stat, file_contents[filename], ini_files[filename])
+    snapshot = ConfigSnapshot(config_dir, file_list, file_contents, file_stats, ini_files)
+    cycles = snapshot.config.interpolation_cycles()
+    if cycles:
+        for cycle in cycles:
+            sys.stderr.write("%s\n" % cycle.message)
+        sys.exit(1)
+    _option_indexes[config_dir] = snapshot.option_index
+    return snapshot
 
 
 def get_option_location(option, section, **kwargs):
@@ -73,21 +136,95 @@ def get_option_location(option, section, **kwargs):
 
     Raises:
     IOError -- Can't read a given file
-    Exception -- Can't parse a config file in the config directory
+    """
+    location = get_option_line(option, section, **kwargs)
+    if location is None:
+        return None
+    return location[0]
+
+
+def get_option_line(option, section, **kwargs):
+    """
+    Like get_option_location but returns a (filename, line number) tuple for
+    the line that sets the value of the given option, or None if the option or
+    section is not defined.
+
+    The config directory is only read the first time it is looked up (or when
+    read_config_snapshot is called for it); later lookups use the cached index.
+
+    Formal arguments:
+    option -- option name to look for
+    section -- section that the option is located in
+
+    Keyword arguments:
+    config_directory -- indicates which directory holds the config files
+
+    Raises:
+    IOError -- Can't read a given file
     """
     config_dir = kwargs.get('config_directory', CONFIG_DIRECTORY)
-    file_list = get_file_list(config_directory=config_dir)
-    file_list.reverse()
-    for fn in file_list:
-        try:
-            config = ConfigParser.SafeConfigParser()
-            config.readfp(open(fn, 'r'))
-            if config.has_option(section, option):
-                return fn
-        except ConfigParser.Error, e:
-            raise Exception("Can't parse %s:\n%s" % (fn, e))
+    if config_dir not in _option_indexes:
+        ini_files = {}
+        file_list = get_file_list(config_directory=config_dir)
+        for filename in file_list:
+            ini_files[filename] = inifile.read_file(filename)
+        _option_indexes[config_dir] = OptionIndex(file_list, ini_files)
+    return _option_indexes[config_dir].locate(option, section)
 
-    return None
+
+def find_options(config, patterns, **kwargs):
+    """
+    Find the options in config matching any of the given patterns along with
+    their values and the file and line that set them.
+
+    Formal arguments:
+    config -- ConfigParser object holding the parsed config files
+    patterns -- list of patterns formatted as section.option or just option
+      to search every section; shell style wildcards may be used in both parts
+
+    Keyword arguments:
+    config_directory -- indicates which directory holds the config files
+
+    Returns:
+    A tuple with a list of (section, option, value, filename, line number)
+    tuples in pattern and file order, and a list of the patterns that
+    didn't match anything
+
+    Raises:
+    IOError -- Can't read a given file
+    """
+    matches = []
+    seen = set()
+    unmatched = []
+    for pattern in patterns:
+        if '.' in pattern:
+            (section_pattern, option_pattern) = pattern.split('.', 1)
+        else:
+            (section_pattern, option_pattern) = ('*', pattern)
+        # ConfigParser folds option names to lower case
+        option_pattern = option_pattern.lower()
+        found = False
+        for section in config.sections():
+            if not fnmatch.fnmatchcase(section, section_pattern):
+                continue
+            for option in config.options(section):
+                if not fnmatch.fnmatchcase(option, option_pattern):
+                    continue
+                location = get_option_line(option, section, **kwargs)
+                if location is None:
+                    continue
+                found = True
+                if (section, option) in seen:
+                    continue
+                seen.add((section, option))
+                try:
+                    value = config.get(section, option)
+                except ConfigParser.Error:
+                    value = config.get(section, option, raw=True)
+                matches.append((section, option, value, location[0], location[1]))
+        if not found:
+            unmatched.append(pattern)
+    return matches, unmatched
 
 
 def get_file_list(**kwargs):
@@ -226,3 +363,289 @@ class Option(object):
         in osg attributes file
         """
         return self.mapping is not None
+
+
+class ConfigSnapshot(object):
+    """
+    Class holding the contents of the config directory as read at one point
+    in time.  The files are only read from disk and tokenized once; the
+    case-folded view is built right away and the case-preserving view is built
+    from the same tokens the first time it is needed.
+    """
+
+    def __init__(self, config_directory, file_list, file_contents, file_stats=None,
+                 ini_files=None):
+        """
+        Arguments:
+        config_directory - directory the files were read from
+        file_list - list of files in the order they are parsed
+        file_contents - dict mapping each file in file_list to its contents
+        file_stats - dict mapping each file in file_list to its (size,
+                     modification time) when it was read
+        ini_files - dict mapping each file in file_list to its tokenized
+                    IniFile, files missing from it are tokenized here
+        """
+        self.config_directory = config_directory
+        self.file_list = file_list
+        self.file_contents = file_contents
+        self.file_stats = file_stats or {}
+        self.ini_files = dict(ini_files or {})
+        for filename in file_list:
+            if filename not in self.ini_files:
+                self.ini_files[filename] = inifile.tokenize(file_contents[filename], filename)
+        self.option_index = OptionIndex(file_list, self.ini_files)
+        self._config = self._parse()
+        self._case_sensitive_config = None
+
+    def _parse(self, case_sensitive=False):
+        """
+        Build a SafeConfigParser from the tokenized files, giving the same
+        result as having it read the files.  Lines that can't be parsed are
+        left out, read_config_snapshot refuses files with errors before it
+        gets here.
+        """
+        config = ResolvedConfigParser()
+        if case_sensitive:
+            config.optionxform = str
+        for filename in self.file_list:
+            ini_file = self.ini_files[filename]
+            for section in ini_file.sections:
+                if section != ConfigParser.DEFAULTSECT and not config.has_section(section):
+                    # add_section refuses names like "Default" that read accepts
+                    config.readfp(cStringIO.StringIO("[%s]\n" % section), filename)
+            for option in ini_file.options:
+                # SafeConfigParser.set would reject values with bad references
+                ConfigParser.RawConfigParser.set(config, option.section, option.name, option.value)
+        config.resolve()
+        return config
+
+    @property
+    def config(self):
+        """ResolvedConfigParser with option names folded to lower case"""
+        return self._config
+
+    @property
+    def case_sensitive_config(self):
+        """ResolvedConfigParser preserving the case of option names (used by Local Settings)"""
+        if self._case_sensitive_config is None:
+            self._case_sensitive_config = self._parse(case_sensitive=True)
+        return self._case_sensitive_config
+
+
+class InterpolationCycleError(ConfigParser.InterpolationDepthError):
+    """
+    Raised when the value of an option refers back to itself through %(...)s
+    references
+    """
+
+    def __init__(self, option, section, rawval, path):
+        ConfigParser.InterpolationDepthError.__init__(self, option, section, rawval)
+        self.path = path
+        self.message = ("Value of %s in section %s refers to itself: %s" %
+                        (option, section, " -> ".join(path)))
+        self.args = (option, section, rawval, path)
+
+
+class ResolvedConfigParser(ConfigParser.SafeConfigParser):
+    """
+    SafeConfigParser that interpolates every value once and answers get,
+    items and the typed getters from the resulting table instead of
+    interpolating on every call.  The table is built by resolve() and thrown
+    away whenever the parser is changed; values that can't be interpolated
+    are left out of it so that get raises the same errors SafeConfigParser
+    does.
+    """
+
+    def __init__(self, *args, **kwargs):
+        ConfigParser.SafeConfigParser.__init__(self, *args, **kwargs)
+        self._resolved = None
+        self._typed = {}
+        self._cycles = []
+
+    def _clear(self):
+        """Throw away the resolved values after a change"""
+        self._resolved = None
+        self._typed = {}
+        self._cycles = []
+
+    def _resolve_value(self, section, option, raw_values, resolved, stack):
+        """
+        Interpolate the value of option the way SafeConfigParser does,
+        using and filling resolved for the options it refers to
+
+        Raises:
+        InterpolationCycleError -- the value refers back to itself
+        ConfigParser.InterpolationError -- the value can't be interpolated
+        """
+        if option in resolved:
+            return resolved[option]
+        value = raw_values[option]
+        if value is None or '%' not in value:
+            resolved[option] = value
+            return value
+        if option in stack:
+            path = stack[stack.index(option):] + [option]
+            raise InterpolationCycleError(option, section, value, path)
+        stack.append(option)
+        parts = []
+        rest = value
+        while rest:
+            position = rest.find('%')
+            if position < 0:
+                parts.append(rest)
+                break
+            parts.append(rest[:position])
+            rest = rest[position:]
+            next_char = rest[1:2]
+            if next_char == '%':
+                parts.append('%')
+                rest = rest[2:]
+                continue
+            match = None
+            if next_char == '(':
+                match = self._interpvar_re.match(rest)
+            if match is None:
+                raise ConfigParser.InterpolationSyntaxError(option, section, rest)
+            name = self.optionxform(match.group(1))
+            rest = rest[match.end():]
+            if name not in raw_values:
+                raise ConfigParser.InterpolationMissingOptionError(option, section, rest, name)
+            parts.append(self._resolve_value(section, name, raw_values, resolved, stack))
+        stack.pop()
+        resolved[option] = ''.join(parts)
+        return resolved[option]
+
+    def resolve(self):
+        """
+        Interpolate the values of every option in every section and return a
+        list of InterpolationCycleError for the values that refer back to
+        themselves
+        """
+        table = {}
+        cycles = []
+        seen_cycles = set()
+        for section in self.sections():
+            raw_values = self._defaults.copy()
+            raw_values.update(self._sections[section])
+            resolved = {}
+            for option in raw_values:
+                try:
+                    value = self._resolve_value(section, option, raw_values, resolved, [])
+                except InterpolationCycleError, e:
+                    # report each cycle once, cycles made of defaults only
+                    # show up in every section
+                    if not [name for name in e.path if name in self._sections[section]]:
+                        e = InterpolationCycleError(e.path[0], ConfigParser.DEFAULTSECT,
+                                                    self._defaults[e.path[0]], e.path)
+                    key = (e.section, frozenset(e.path))
+                    if key not in seen_cycles:
+                        seen_cycles.add(key)
+                        cycles.append(e)
+                    continue
+                except ConfigParser.InterpolationError:
+                    # left for get to report
+                    continue
+                table[(section, option)] = value
+        self._resolved = table
+        self._typed = {}
+        self._cycles = cycles
+        return cycles
+
+    def interpolation_cycles(self):
+        """Return the InterpolationCycleError found by the last resolve()"""
+        if self._resolved is None:
+            self.resolve()
+        return self._cycles
+
+    def get(self, section, option, raw=False, vars=None):
+        if not raw and not vars:
+            if self._resolved is None:
+                self.resolve()
+            key = (section, self.optionxform(option))
+            if key in self._resolved:
+                return self._resolved[key]
+        return ConfigParser.SafeConfigParser.get(self, section, option, raw, vars)
+
+    def items(self, section, raw=False, vars=None):
+        if not raw and not vars and section in self._sections:
+            if self._resolved is None:
+                self.resolve()
+            options = self._defaults.copy()
+            options.update(self._sections[section])
+            names = [name for name in options.keys() if name != '__name__']
+            if [name for name in names if (section, name) not in self._resolved] == []:
+                return [(name, self._resolved[(section, name)]) for name in names]
+        return ConfigParser.SafeConfigParser.items(self, section, raw, vars)
+
+    def _get_typed(self, section, option, conversion):
+        """
+        Return the value of option converted by the getter conversion,
+        remembering the result for later calls
+        """
+        key = (section, self.optionxform(option), conversion)
+        if key not in self._typed:
+            self._typed[key] = conversion(self, section, option)
+        return self._typed[key]
+
+    def getint(self, section, option):
+        return self._get_typed(section, option, ConfigParser.SafeConfigParser.getint)
+
+    def getfloat(self, section, option):
+        return self._get_typed(section, option, ConfigParser.SafeConfigParser.getfloat)
+
+    def getboolean(self, section, option):
+        return self._get_typed(section, option, ConfigParser.SafeConfigParser.getboolean)
+
+    def set(self, section, option, value=None):
+        ConfigParser.SafeConfigParser.set(self, section, option, value)
+        self._clear()
+
+    def add_section(self, section):
+        ConfigParser.SafeConfigParser.add_section(self, section)
+        self._clear()
+
+    def remove_option(self, section, option):
+        self._clear()
+        return ConfigParser.SafeConfigParser.remove_option(self, section, option)
+
+    def remove_section(self, section):
+        self._clear()
+        return ConfigParser.SafeConfigParser.remove_section(self, section)
+
+    def _read(self, fp, fpname):
+        self._clear()
+        ConfigParser.SafeConfigParser._read(self, fp, fpname)
+
+
+class OptionIndex(object):
+    """
+    Class mapping (section, option) pairs to the file and line that set them.
+    Follows the same precedence rules as ConfigParser: later files override
+    earlier ones, and options in the DEFAULT section of a file apply to every
+    section defined in that file.
+    """
+
+    def __init__(self, file_list, ini_files):
+        """
+        Arguments:
+        file_list - list of files in the order they are parsed
+        ini_files - dict mapping each file in file_list to its tokenized IniFile
+        """
+        # list of (filename, {section: {option: line}}) in reverse parse order
+        self._files = []
+        for filename in file_list:
+            self._files.insert(0, (filename, ini_files[filename].index()))
+
+    def locate(self, option, section):
+        """
+        Return a (filename, line number) tuple for the line that sets option
+        in section or None if it is not set
+        """
+        option = option.lower()
+        for filename, sections in self._files:
+            if section not in sections and section != ConfigParser.DEFAULTSECT:
+                continue
+            for name in (section, ConfigParser.DEFAULTSECT):
+                if option in sections.get(name, {}):
+                    return filename, sections[name][option]
+        return None
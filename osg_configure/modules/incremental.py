@@ -0,0 +1,141 @@
+""" Module to keep track of module inputs for incremental configuration """
+
+import errno
+import hashlib
+import os
+
+from osg_configure.modules import utilities
+
+__all__ = ['DIGEST_FILE',
+           'input_digest',
+           'module_digest',
+           'read_digests',
+           'write_digests',
+           'select_modules']
+
+DIGEST_FILE = '/var/lib/osg/osg-configure-digests'
+
+
+def input_digest(module, attributes):
+    """
+    Compute a digest of the settings a configuration module is configured
+    with: its parsed settings, the attributes shared by all modules and
+    which of its relevant rpms are installed.  configure() may change the
+    module's settings, so this must be computed before configuring.
+
+    Arguments:
+    module - configuration module object
+    attributes - dict of the attributes passed to configure()
+
+    Returns:
+    a string with the hex digest
+    """
+    digest = hashlib.sha1()
+    digest.update("module %s\n" % module.__class__.__name__)
+    values = module.input_values()
+    for name in sorted(values):
+        digest.update("value %s=%r\n" % (name, values[name]))
+    for name in sorted(attributes):
+        digest.update("attribute %s=%r\n" % (name, attributes[name]))
+    for rpm_name in sorted(module.relevant_rpms()):
+        digest.update("rpm %s=%s\n" % (rpm_name, utilities.rpm_installed(rpm_name)))
+    return digest.hexdigest()
+
+
+def module_digest(module, attributes, inputs=None):
+    """
+    Compute a digest of the inputs of a configuration module: the digest
+    from input_digest() and the modification times of the files it
+    consumes or produces.
+
+    Arguments:
+    module - configuration module object
+    attributes - dict of the attributes passed to configure()
+
+    Keyword arguments:
+    inputs - digest from input_digest() computed before configuring, computed
+             now if None
+
+    Returns:
+    a string with the hex digest
+    """
+    if inputs is None:
+        inputs = input_digest(module, attributes)
+    digest = hashlib.sha1()
+    digest.update("inputs %s\n" % inputs)
+    for filename in sorted(module.consumes() | module.produces()):
+        try:
+            mtime = os.stat(filename).st_mtime
+        except OSError, e:
+            if e.errno != errno.ENOENT:
+                raise
+            mtime = None
+        digest.update("file %s=%r\n" % (filename, mtime))
+    return digest.hexdigest()
+
+
+def read_digests(filename=DIGEST_FILE):
+    """
+    Read the module digests saved by a previous run
+
+    Arguments:
+    filename - file to read digests from
+
+    Returns:
+    a dict mapping module names to digests, empty if the file is missing or
+    can't be read
+    """
+    digests = {}
+    try:
+        digest_file = open(filename)
+    except IOError:
+        return digests
+    try:
+        for line in digest_file:
+            fields = line.split()
+            if len(fields) == 2:
+                digests[fields[0]] = fields[1]
+    finally:
+        digest_file.close()
+    return digests
+
+
+def write_digests(digests, filename=DIGEST_FILE):
+    """
+    Save module digests for use by later runs
+
+    Arguments:
+    digests - dict mapping module names to digests
+    filename - file to write digests to
+
+    Returns:
+    True if the digests were written, False otherwise
+    """
+    contents = "# This file is automatically generated by osg-configure\n"
+    for name in sorted(digests):
+        contents += "%s %s\n" % (name, digests[name])
+    return utilities.atomic_write(filename, contents)
+
+
+def select_modules(scheduler, digests, attributes):
+    """
+    Find the modules that need to be configured given the digests of a
+    previous run.  A module is selected if its digest changed or if it
+    depends on a module that is selected, since that module may change the
+    files it reads.
+
+    Arguments:
+    scheduler - ModuleScheduler for the modules
+    digests - dict mapping module names to digests from a previous run
+    attributes - dict of the attributes passed to configure()
+
+    Returns:
+    a list of the modules to configure, in the order given to the scheduler
+    """
+    selected = set()
+    for index in scheduler.order:
+        module = scheduler.modules[index]
+        if (scheduler.dependencies[index] & selected or
+                digests.get(module.__class__.__name__) != module_digest(module, attributes)):
+            selected.add(index)
+    return [x for index, x in enumerate(scheduler.modules) if index in selected]
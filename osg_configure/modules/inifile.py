@@ -0,0 +1,232 @@
+""" Module to tokenize ini files in a single pass """
+
+import re
+import ConfigParser
+
+__all__ = ['tokenize',
+           'read_file',
+           'unresolved_references',
+           'IniFile',
+           'IniOption']
+
+SECTION_RE = ConfigParser.RawConfigParser.SECTCRE
+OPTION_RE = ConfigParser.RawConfigParser.OPTCRE
+# same as SafeConfigParser uses when interpolating values
+REFERENCE_RE = re.compile(r'%\(([^)]+)\)s')
+
+
+class IniOption(object):
+    """
+    Class holding a single option setting from an ini file
+    """
+
+    def __init__(self, section, name, value, line):
+        """
+        Arguments:
+        section - section the option is set in
+        name - option name as written in the file
+        value - raw value without interpolation, with continuation lines
+                joined by newlines like ConfigParser does
+        line - line number of the line with the option name
+        """
+        self.section = section
+        self.name = name
+        self.value = value
+        self.line = line
+
+    def references(self):
+        """
+        Return a tuple with a list of the option names referenced by the
+        value as %(name)s and a list of malformed references, in the form
+        SafeConfigParser would complain about on interpolation
+        """
+        names = []
+        malformed = []
+        position = 0
+        while True:
+            position = self.value.find('%', position)
+            if position < 0:
+                break
+            next_char = self.value[position + 1:position + 2]
+            if next_char == '%':
+                position += 2
+                continue
+            if next_char == '(':
+                match = REFERENCE_RE.match(self.value, position)
+                if match:
+                    names.append(match.group(1))
+                    position = match.end()
+                    continue
+            malformed.append(self.value[position:])
+            break
+        return names, malformed
+
+    def __repr__(self):
+        return "IniOption(%r, %r, %r, %r)" % (self.section, self.name, self.value, self.line)
+
+
+class IniFile(object):
+    """
+    Class holding the sections and options of an ini file along with the
+    problems found while reading it.  Sections and options are read the same
+    way ConfigParser reads them, but nothing is interpolated.
+    """
+
+    def __init__(self, filename=None):
+        """
+        Arguments:
+        filename - name of the file, used in messages
+        """
+        self.filename = filename
+        # section names in the order they first appear
+        self.sections = []
+        # IniOption objects in file order
+        self.options = []
+        # lists of (line number, message) tuples
+        self.errors = []
+        self.warnings = []
+        self._section_lines = {}
+
+    def valid(self):
+        """Return True if no problems were found in the file"""
+        return not self.errors
+
+    def add_section(self, section, line):
+        """
+        Record a section header, a header repeating an earlier section in the
+        same file is reported as a warning and its options are merged into
+        the earlier section, as ConfigParser does
+        """
+        if section in self._section_lines:
+            self.warnings.append((line, "Section %s is already defined on line %d, "
+                                        "the options of both are merged" %
+                                  (section, self._section_lines[section])))
+            return
+        self._section_lines[section] = line
+        self.sections.append(section)
+
+    def section_line(self, section):
+        """Return the line number of the header of section or None"""
+        return self._section_lines.get(section)
+
+    def index(self):
+        """
+        Return a dict of {section: {option: line number}} for the options in
+        the file, option names are folded to lower case the way ConfigParser
+        does it
+        """
+        sections = {}
+        for section in self.sections:
+            sections[section] = {}
+        for option in self.options:
+            sections[option.section][option.name.lower()] = option.line
+        return sections
+
+
+def tokenize(contents, filename=None):
+    """
+    Read the sections and options in contents and return an IniFile with
+    them.  Follows the rules of ConfigParser for comments, continuation lines
+    and inline comments; continuation lines are reported as errors since
+    osg-configure doesn't allow them, repeated sections as warnings.
+
+    Arguments:
+    contents - text of the ini file
+    filename - name of the file, used in messages
+    """
+    ini_file = IniFile(filename)
+    section = None
+    option = None
+    lineno = 0
+    for line in contents.splitlines():
+        lineno += 1
+        if line.strip() == '' or line[0] in '#;':
+            continue
+        if line.split(None, 1)[0].lower() == 'rem' and line[0] in "rR":
+            continue
+        if line[0].isspace() and option is not None:
+            value = line.strip()
+            if value:
+                option.value += "\n" + value
+                ini_file.errors.append((lineno, "Option %s in section %s continues on this line, "
+                                                "lines should not start with a space: %s" %
+                                        (option.name, section, value)))
+            continue
+        match = SECTION_RE.match(line)
+        if match:
+            section = match.group('header')
+            ini_file.add_section(section, lineno)
+            option = None
+            continue
+        if section is None:
+            ini_file.errors.append((lineno, "Option found before any section header: %s" %
+                                    line.strip()))
+            continue
+        match = OPTION_RE.match(line)
+        if not match:
+            if line[0].isspace():
+                ini_file.errors.append((lineno, "Lines with options should not start with a "
+                                                "space: %s" % line.strip()))
+            else:
+                ini_file.errors.append((lineno, "Can't parse line: %s" % line.strip()))
+            continue
+        (name, separator, value) = match.group('option', 'vi', 'value')
+        if separator in ('=', ':') and ';' in value:
+            # ';' only starts a comment if it follows a space
+            position = value.find(';')
+            if position != -1 and value[position - 1].isspace():
+                value = value[:position]
+        value = value.strip()
+        if value == '""':
+            value = ''
+        option = IniOption(section, name.rstrip(), value, lineno)
+        ini_file.options.append(option)
+    return ini_file
+
+
+def read_file(filename):
+    """
+    Read filename and return an IniFile with its contents
+
+    Raises:
+    IOError -- Can't read the file
+    """
+    return tokenize(open(filename, 'r').read(), filename)
+
+
+def unresolved_references(ini_files):
+    """
+    Check the variable references in a list of IniFile objects read in order
+    and return a list of (IniOption, filename, reference, message) tuples for
+    the references that can't be resolved once the files are merged
+    """
+    defaults = set()
+    sections = {}
+    for ini_file in ini_files:
+        for section in ini_file.sections:
+            sections.setdefault(section, set())
+        for option in ini_file.options:
+            if option.section == ConfigParser.DEFAULTSECT:
+                defaults.add(option.name.lower())
+            else:
+                sections[option.section].add(option.name.lower())
+
+    problems = []
+    for ini_file in ini_files:
+        for option in ini_file.options:
+            (names, malformed) = option.references()
+            for reference in malformed:
+                problems.append((option, ini_file.filename, reference,
+                                 "Invalid variable reference"))
+            if option.section == ConfigParser.DEFAULTSECT:
+                # resolved in whichever section the default ends up in
+                available = set(defaults)
+                for options in sections.values():
+                    available.update(options)
+            else:
+                available = defaults | sections[option.section]
+            for name in names:
+                if name.lower() not in available:
+                    problems.append((option, ini_file.filename, "%%(%s)s" % name,
+                                     "Reference to undefined option %s" % name))
+    return problems
@@ -1,11 +1,11 @@
 """ Base class for all job manager configuration classes """
 
 import re
-import os
 import logging
 
 from osg_configure.modules.baseconfiguration import BaseConfiguration
 from osg_configure.modules import utilities
+from osg_configure.modules import configeditor
 from osg_configure.modules import validation
 
 __all__ = ['JobManagerConfiguration']
@@ -18,6 +18,8 @@ class JobManagerConfiguration(BaseConfiguration):
                                    "Ensure the Globus jobmanagers for all enabled batch systems are installed.")
 
     BLAH_CONFIG = '/etc/blah.config'
+    # changed by globus-gatekeeper-admin when setting the default jobmanager
+    DEFAULT_JOBMANAGER_FILE = '/etc/grid-services/jobmanager'
 
     def __init__(self, *args, **kwargs):
         # pylint: disable-msg=W0142
@@ -46,6 +48,23 @@ class JobManagerConfiguration(BaseConfiguration):
             services.add('globus-gatekeeper')
         return services
 
+    def produces(self):
+        return set([self.HTCONDOR_CE_CONFIG_FILE,
+                    self.BLAH_CONFIG,
+                    self.DEFAULT_JOBMANAGER_FILE])
+
+    def input_values(self):
+        values = super(JobManagerConfiguration, self).input_values()
+        values['htcondor_gateway_enabled'] = self.htcondor_gateway_enabled
+        values['gram_gateway_enabled'] = self.gram_gateway_enabled
+        # batch system modules only set the default jobmanager if managed
+        # fork is not enabled
+        values['set_default'] = getattr(self, '_set_default', None)
+        return values
+
+    def relevant_rpms(self):
+        return set(['globus-gatekeeper', 'htcondor-ce'])
+
     def enable_accept_limited(self, filename):
         """
         Update the globus jobmanager configuration so that it allows limited proxies
@@ -57,7 +76,7 @@ class JobManagerConfiguration(BaseConfiguration):
             return False
 
         try:
-            contents = open(filename).read()
+            contents = open(utilities.staged_path(filename)).read()
         except EnvironmentError, err:
             self.log(self.MISSING_JOBMANAGER_CONF_MSG % (filename, err), level=logging.ERROR)
             return False
@@ -85,7 +104,7 @@ class JobManagerConfiguration(BaseConfiguration):
             return False
 
         try:
-            contents = open(filename).read()
+            contents = open(utilities.staged_path(filename)).read()
         except EnvironmentError, err:
             self.log(self.MISSING_JOBMANAGER_CONF_MSG % (filename, err), level=logging.ERROR)
             return False
@@ -125,7 +144,7 @@ class JobManagerConfiguration(BaseConfiguration):
             return False
 
         try:
-            contents = open(filename).read()
+            contents = open(utilities.staged_path(filename)).read()
         except EnvironmentError, err:
             self.log(self.MISSING_JOBMANAGER_CONF_MSG % (filename, err), level=logging.ERROR)
             return False
@@ -158,7 +177,7 @@ class JobManagerConfiguration(BaseConfiguration):
             return False
 
         try:
-            contents = open(filename).read()
+            contents = open(utilities.staged_path(filename)).read()
         except EnvironmentError, err:
             self.log(self.MISSING_JOBMANAGER_CONF_MSG % (filename, err), level=logging.ERROR)
             return False
@@ -256,22 +275,17 @@ class JobManagerConfiguration(BaseConfiguration):
         :param submit_binpath: The fully-qualified path to the submit
           executables for that jobmanager
         """
-        if os.path.exists(self.BLAH_CONFIG):
-            contents = utilities.read_file(self.BLAH_CONFIG)
-            contents = utilities.add_or_replace_setting(contents, jobmanager + "_binpath", submit_binpath,
-                                                        quote_value=True)
-            utilities.atomic_write(self.BLAH_CONFIG, contents)
+        blah_config = configeditor.edit(self.BLAH_CONFIG)
+        if blah_config is not None:
+            blah_config.set(jobmanager + "_binpath", submit_binpath, quote_value=True)
 
     def write_blah_disable_wn_proxy_renewal_to_blah_config(self):
-        if os.path.exists(self.BLAH_CONFIG):
-            contents = utilities.read_file(self.BLAH_CONFIG)
-            contents = utilities.add_or_replace_setting(contents, "blah_disable_wn_proxy_renewal", "yes",
-                                                        quote_value=True)
-            utilities.atomic_write(self.BLAH_CONFIG, contents)
+        blah_config = configeditor.edit(self.BLAH_CONFIG)
+        if blah_config is not None:
+            blah_config.set("blah_disable_wn_proxy_renewal", "yes", quote_value=True)
 
     def write_htcondor_ce_sentinel(self):
         if self.htcondor_gateway_enabled:
-            contents = utilities.read_file(self.HTCONDOR_CE_CONFIG_FILE,
-                                           default="# This file is managed by osg-configure\n")
-            contents = utilities.add_or_replace_setting(contents, "OSG_CONFIGURED", "true", quote_value=False)
-            utilities.atomic_write(self.HTCONDOR_CE_CONFIG_FILE, contents)
+            ce_config = configeditor.edit(self.HTCONDOR_CE_CONFIG_FILE,
+                                          default="# This file is managed by osg-configure\n")
+            ce_config.set("OSG_CONFIGURED", "true", quote_value=False)
@@ -0,0 +1,125 @@
+""" Module to look up which packages are installed """
+
+import os
+import threading
+
+__all__ = ['RPMDB_FILES',
+           'installed_packages',
+           'database_files',
+           'database_mtime',
+           'set_package_file',
+           'reset']
+
+# files changed whenever packages are installed, removed or updated, which
+# one exists depends on the rpm version
+RPMDB_FILES = ['/var/lib/rpm/Packages', '/var/lib/rpm/rpmdb.sqlite']
+
+_lock = threading.Lock()
+# names of the installed packages and the database mtime they were read at
+_packages = None
+_packages_mtime = None
+# file listing package names to use instead of the rpm database
+_package_file = None
+
+
+def database_files():
+    """Return the files that the package names are read from"""
+    if _package_file is not None:
+        return [_package_file]
+    return RPMDB_FILES
+
+
+def database_mtime():
+    """
+    Return the latest modification time of the package database files or
+    None if none of them exist
+    """
+    mtimes = []
+    for filename in database_files():
+        try:
+            mtimes.append(os.stat(filename).st_mtime)
+        except OSError:
+            continue
+    if not mtimes:
+        return None
+    return max(mtimes)
+
+
+def _read_package_file(filename):
+    """
+    Return a frozenset of the package names listed in filename, one per line
+    as printed by rpm -qa --qf '%{NAME}\\n'; blank lines and lines starting
+    with # are skipped
+    """
+    names = []
+    for line in open(filename):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            names.append(line.split()[0])
+    return frozenset(names)
+
+
+def _read_rpmdb():
+    """
+    Return a frozenset of the names of the packages in the rpm database
+
+    Raises:
+    IOError -- the rpm database can't be read
+    """
+    # imported here since loading the rpm bindings is slow and most modes
+    # of osg-configure never query the rpm database
+    import rpm
+
+    try:
+        trans_set = rpm.TransactionSet()
+        return frozenset([header['name'] for header in trans_set.dbMatch()])
+    except rpm.error, e:
+        raise IOError("Can't read rpm database: %s" % e)
+
+
+def installed_packages():
+    """
+    Return a frozenset with the names of the installed packages.  The
+    package database is only read again once it has been modified.
+
+    Raises:
+    IOError -- the package database or package file can't be read
+    """
+    global _packages, _packages_mtime
+    mtime = database_mtime()
+    _lock.acquire()
+    try:
+        if _packages is None or mtime != _packages_mtime:
+            if _package_file is not None:
+                _packages = _read_package_file(_package_file)
+            else:
+                _packages = _read_rpmdb()
+            _packages_mtime = mtime
+        return _packages
+    finally:
+        _lock.release()
+
+
+def set_package_file(filename):
+    """
+    Read the names of the installed packages from filename instead of the
+    rpm database, e.g. for tests or to configure for another host
+
+    Arguments:
+    filename - file with a package name per line, None to go back to using
+               the rpm database
+    """
+    global _package_file
+    _package_file = filename
+    reset()
+
+
+def reset():
+    """Forget the package names read so far"""
+    global _packages, _packages_mtime
+    _lock.acquire()
+    try:
+        _packages = None
+        _packages_mtime = None
+    finally:
+        _lock.release()
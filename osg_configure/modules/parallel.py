@@ -0,0 +1,264 @@
+""" Module to run configuration module methods concurrently """
+
+import logging
+import logging.handlers
+import sys
+import threading
+from multiprocessing.pool import ThreadPool
+
+from osg_configure.modules import exceptions
+from osg_configure.modules import profiling
+
+__all__ = ['BufferedLogger',
+           'ModuleScheduler',
+           'run_module_method']
+
+
+class BufferedLogger(logging.Logger):
+    """
+    A Logger that holds on to every record logged to it until flush() is
+    called, at which point the records are passed on to another logger.
+    Used to keep the output of modules running concurrently together and
+    in a deterministic order.  Records logged after flush() (e.g. by
+    background tasks a module started) go straight to the target logger.
+    """
+
+    def __init__(self, target):
+        """
+        Arguments:
+        target - logger that will receive the buffered records on flush()
+        """
+        logging.Logger.__init__(self, target.name)
+        self.target = target
+        self.setLevel(target.getEffectiveLevel())
+        self.propagate = False
+        # capacity is irrelevant since shouldFlush is never consulted by us
+        self.buffer_handler = logging.handlers.BufferingHandler(sys.maxint)
+        self.addHandler(self.buffer_handler)
+        self.flushed = False
+        self.flush_lock = threading.Lock()
+
+    def handle(self, record):
+        """Buffer record, or pass it on if the buffer was already flushed"""
+        self.flush_lock.acquire()
+        try:
+            if not self.flushed:
+                logging.Logger.handle(self, record)
+                return
+        finally:
+            self.flush_lock.release()
+        self.target.handle(record)
+
+    def flush(self):
+        """Pass all buffered records on to the target logger"""
+        self.flush_lock.acquire()
+        try:
+            for record in self.buffer_handler.buffer:
+                self.target.handle(record)
+            self.buffer_handler.buffer = []
+            self.flushed = True
+        finally:
+            self.flush_lock.release()
+
+
+def run_module_method(modules, method_name, args=(), jobs=1):
+    """
+    Call method_name(*args) on every module and return the results as a list
+    in module order.
+
+    If jobs is greater than 1, the calls are made on a pool of jobs threads.
+    Each module logs to its own BufferedLogger while running, and the
+    buffered messages are passed on to the module's logger in module order
+    once all calls are done so that the log output is the same regardless of
+    which call finishes first.  If a call raises an exception, the log
+    output of that module and of the modules before it is flushed and the
+    exception is re-raised.
+
+    Arguments:
+    modules - list of module objects
+    method_name - name of the method to call on each module
+    args - positional arguments to pass to the method
+    jobs - number of threads to use
+    """
+    if jobs <= 1 or len(modules) <= 1:
+        return [profiling.call_method(module, method_name, args) for module in modules]
+
+    buffers = []
+    for module in modules:
+        buffers.append(BufferedLogger(module.logger))
+
+    def call(index):
+        return _call_buffered(modules[index], buffers[index], method_name, args)
+
+    pool = ThreadPool(min(jobs, len(modules)))
+    try:
+        outcomes = pool.map(call, range(len(modules)))
+    finally:
+        pool.close()
+        pool.join()
+
+    results = []
+    for index, (result, exc_info) in enumerate(outcomes):
+        buffers[index].flush()
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
+        results.append(result)
+    return results
+
+
+def _call_buffered(module, buffer_logger, method_name, args):
+    """
+    Call method_name(*args) on module with its logger temporarily replaced by
+    buffer_logger.  Returns a (result, exc_info) tuple, exc_info is None if
+    the call did not raise an exception.
+    """
+    original_logger = module.logger
+    module.logger = buffer_logger
+    try:
+        try:
+            return profiling.call_method(module, method_name, args), None
+        except Exception:
+            return None, sys.exc_info()
+    finally:
+        module.logger = original_logger
+
+
+class ModuleScheduler(object):
+    """
+    Class to order configuration modules using the artifacts (files,
+    services, ...) they declare in consumes() and produces().  A module that
+    consumes an artifact runs after every module that produces it, and
+    modules that produce the same artifact run one at a time in the order
+    they were given in.  Modules with no artifacts in common may run
+    concurrently.
+    """
+
+    def __init__(self, modules):
+        """
+        Arguments:
+        modules - list of module objects, in the order to use for modules
+                  that have no dependency on each other
+
+        Raises:
+        ConfigurationError - if the declared artifacts form a cycle
+        """
+        self.modules = modules
+        produces = [module.produces() for module in modules]
+        consumes = [module.consumes() for module in modules]
+        # dependencies[i] is the set of indices of modules that must finish
+        # before module i starts
+        self.dependencies = [set() for _ in modules]
+        for i in range(len(modules)):
+            for j in range(i + 1, len(modules)):
+                # both directions are recorded so that two modules consuming
+                # what the other produces are reported as a cycle
+                if produces[i] & consumes[j]:
+                    self.dependencies[j].add(i)
+                if produces[j] & consumes[i]:
+                    self.dependencies[i].add(j)
+                if (j not in self.dependencies[i] and i not in self.dependencies[j] and
+                        produces[i] & produces[j]):
+                    self.dependencies[j].add(i)
+        self.order = self._sort()
+
+    def _sort(self):
+        """
+        Return the indices of the modules in dependency order, preferring the
+        given module order when there is a choice
+        """
+        order = []
+        done = set()
+        while len(order) < len(self.modules):
+            for index in range(len(self.modules)):
+                if index not in done and self.dependencies[index] <= done:
+                    order.append(index)
+                    done.add(index)
+                    break
+            else:
+                names = [self.modules[i].module_name()
+                         for i in range(len(self.modules)) if i not in done]
+                raise exceptions.ConfigurationError("Circular dependency between modules: %s" %
+                                                    ", ".join(names))
+        return order
+
+    def ordered_modules(self):
+        """Return the list of modules in the order they will be started"""
+        return [self.modules[index] for index in self.order]
+
+    def run(self, method_name, args=(), jobs=1):
+        """
+        Call method_name(*args) on every module, respecting the dependencies
+        between modules, and return the results as a list in the order the
+        modules were given in.
+
+        With jobs greater than 1, up to jobs modules whose dependencies are
+        done run at the same time.  Log output is buffered per module and
+        passed on in dependency order.  If a call raises an exception, no
+        further modules are started; the exception is re-raised once the
+        modules already running have finished.
+        """
+        results = [None] * len(self.modules)
+        if jobs <= 1 or len(self.modules) <= 1:
+            for index in self.order:
+                results[index] = profiling.call_method(self.modules[index], method_name, args)
+            return results
+
+        buffers = [BufferedLogger(module.logger) for module in self.modules]
+        condition = threading.Condition()
+        finished = {}
+
+        def call(index):
+            outcome = _call_buffered(self.modules[index], buffers[index], method_name, args)
+            condition.acquire()
+            try:
+                finished[index] = outcome
+                condition.notify()
+            finally:
+                condition.release()
+
+        pending = list(self.order)
+        running = set()
+        done = set()
+        flushed = 0
+        failure = None
+        pool = ThreadPool(jobs)
+        condition.acquire()
+        try:
+            while True:
+                if failure is None:
+                    for index in list(pending):
+                        if len(running) >= jobs:
+                            break
+                        if self.dependencies[index] <= done:
+                            pending.remove(index)
+                            running.add(index)
+                            pool.apply_async(call, (index,))
+                if not running:
+                    break
+                while not finished:
+                    # use a timeout so that KeyboardInterrupt gets handled
+                    condition.wait(1)
+                for index, (result, exc_info) in finished.items():
+                    running.discard(index)
+                    done.add(index)
+                    results[index] = result
+                    if exc_info is not None and (failure is None or
+                                                 self.order.index(index) < self.order.index(failure[0])):
+                        failure = (index, exc_info)
+                finished.clear()
+                # pass on log output of modules as soon as every module
+                # before them in the order has finished
+                while flushed < len(self.order) and self.order[flushed] in done:
+                    buffers[self.order[flushed]].flush()
+                    flushed += 1
+        finally:
+            condition.release()
+            pool.close()
+            pool.join()
+
+        for index in self.order[flushed:]:
+            buffers[index].flush()
+        if failure is not None:
+            exc_info = failure[1]
+            raise exc_info[0], exc_info[1], exc_info[2]
+        return results
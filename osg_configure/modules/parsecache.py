@@ -0,0 +1,202 @@
+""" Module to cache tokenized config files on disk between runs """
+
+import cPickle
+import errno
+import hashlib
+import os
+import stat
+import tempfile
+import time
+
+__all__ = ['CACHE_DIRECTORY',
+           'MAX_CACHE_SIZE',
+           'ParseCache',
+           'enable',
+           'disable',
+           'get_cache']
+
+CACHE_DIRECTORY = '/var/cache/osg-configure'
+# total size in bytes of the cache entries, least recently used entries
+# are removed to stay under it
+MAX_CACHE_SIZE = 8 * 1024 * 1024
+# change when the format of the cached objects changes
+CACHE_VERSION = 2
+ENTRY_SUFFIX = '.cache'
+TEMP_SUFFIX = '.tmp'
+# temporary files older than this were left behind by runs that died
+STALE_TEMP_AGE = 3600
+
+# ParseCache used by configfile, None if caching is not enabled
+_cache = None
+
+
+class ParseCache(object):
+    """
+    Class storing the contents and tokenized form of config files in a
+    directory, keyed by path, inode, size and modification time so that an
+    entry is never used for a file that changed since it was stored.
+
+    Entries are written to a temporary file and renamed into place, and
+    entries that can't be read are treated as missing, so several runs can
+    use the same directory at once.  Problems with the cache directory
+    disable the cache instead of failing the run.
+    """
+
+    def __init__(self, directory=CACHE_DIRECTORY, max_size=MAX_CACHE_SIZE):
+        """
+        Arguments:
+        directory - directory to keep the entries in, created if needed
+        max_size - total size in bytes of the entries to keep
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.usable = self._check_directory()
+
+    def _check_directory(self):
+        """
+        Create the cache directory if needed and return True if it can be
+        used.  Since entries are unpickled, the directory must belong to the
+        current user and not be writable by anybody else.
+        """
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0700)
+            dir_stat = os.stat(self.directory)
+        except OSError:
+            return False
+        if dir_stat.st_uid != os.getuid():
+            return False
+        if dir_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            return False
+        return True
+
+    def _entry_path(self, filename, file_stat):
+        """Return the path of the entry for filename with the given stat"""
+        key = "%d\0%s\0%d\0%d\0%d\0%r" % (CACHE_VERSION, os.path.abspath(filename),
+                                           file_stat.st_dev, file_stat.st_ino,
+                                           file_stat.st_size, file_stat.st_mtime)
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest() + ENTRY_SUFFIX)
+
+    def load(self, filename, file_stat):
+        """
+        Return a (contents, ini_file) tuple stored for filename if it still
+        has the given stat, or None
+
+        Arguments:
+        filename - config file to look up
+        file_stat - result of os.stat for filename
+        """
+        if not self.usable:
+            return None
+        entry = self._entry_path(filename, file_stat)
+        try:
+            entry_file = open(entry, 'rb')
+            try:
+                (stored_filename, contents, ini_file) = cPickle.load(entry_file)
+            finally:
+                entry_file.close()
+        except (IOError, OSError, EOFError, ValueError, TypeError,
+                AttributeError, ImportError, cPickle.UnpicklingError):
+            self.misses += 1
+            return None
+        if stored_filename != os.path.abspath(filename):
+            self.misses += 1
+            return None
+        try:
+            # mark the entry as recently used
+            os.utime(entry, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return contents, ini_file
+
+    def store(self, filename, file_stat, contents, ini_file):
+        """
+        Store the contents and IniFile for filename with the given stat
+
+        Arguments:
+        filename - config file the entry is for
+        file_stat - result of os.stat for filename before it was read
+        contents - contents of filename
+        ini_file - IniFile tokenized from contents
+        """
+        if not self.usable:
+            return
+        entry = self._entry_path(filename, file_stat)
+        try:
+            (fd, temp_name) = tempfile.mkstemp(suffix=TEMP_SUFFIX, dir=self.directory)
+            try:
+                temp_file = os.fdopen(fd, 'wb')
+                try:
+                    cPickle.dump((os.path.abspath(filename), contents, ini_file), temp_file,
+                                 cPickle.HIGHEST_PROTOCOL)
+                finally:
+                    temp_file.close()
+                os.rename(temp_name, entry)
+            except:
+                os.unlink(temp_name)
+                raise
+        except (IOError, OSError, cPickle.PicklingError):
+            return
+        self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used entries until the entries take up
+        less than max_size bytes, along with temporary files left behind
+        """
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                entry_stat = os.stat(path)
+                if name.endswith(TEMP_SUFFIX) and now - entry_stat.st_mtime > STALE_TEMP_AGE:
+                    os.unlink(path)
+            except OSError:
+                # removed by another run
+                continue
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, path))
+            total += entry_stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError, e:
+                if e.errno != errno.ENOENT:
+                    return
+            total -= size
+
+
+def enable(directory=CACHE_DIRECTORY, max_size=MAX_CACHE_SIZE):
+    """
+    Start caching tokenized config files in directory and return the
+    ParseCache, caching stays disabled if the directory can't be used
+    """
+    global _cache
+    _cache = ParseCache(directory, max_size)
+    if not _cache.usable:
+        _cache = None
+    return _cache
+
+
+def disable():
+    """Stop caching tokenized config files"""
+    global _cache
+    _cache = None
+
+
+def get_cache():
+    """Return the ParseCache in use or None if caching is not enabled"""
+    return _cache
@@ -0,0 +1,215 @@
+""" Module to record how long module methods, commands and file writes take """
+
+import os
+import sys
+import threading
+import time
+
+__all__ = ['DEFAULT_PROFILE_FILE',
+           'Profile',
+           'enable',
+           'disable',
+           'get_profile',
+           'timed',
+           'call_method']
+
+DEFAULT_PROFILE_FILE = '/var/log/osg/osg-configure-profile.json'
+
+# Profile that events are recorded in, None if profiling is not enabled
+_profile = None
+
+
+def _cpu_times():
+    """
+    Return a tuple with the cpu time used by this process and the cpu time
+    used by its child processes that have been waited for
+    """
+    times = os.times()
+    return times[0] + times[1], times[2] + times[3]
+
+
+class Profile(object):
+    """
+    Class holding timed events.  Events are nested: an event started while
+    another one is running in the same thread (e.g. a command run while a
+    module is being configured) records the other one as its parent and
+    belongs to the same module.
+
+    Cpu times are for the whole process, so they overlap for events running
+    at the same time in different threads.  The cpu time of commands is
+    recorded separately as child_cpu.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.start_time = time.time()
+        (self.start_cpu, self.start_child_cpu) = _cpu_times()
+
+    def begin(self, kind, name, module=None):
+        """
+        Start an event and return the dict describing it
+
+        Arguments:
+        kind - type of event: phase, command or write
+        name - method name, command line or file name
+
+        Keyword arguments:
+        module - name of the module the event belongs to, by default the
+                 module of the enclosing event
+        """
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        parent = None
+        if stack:
+            parent = stack[-1]
+            if module is None:
+                module = parent['module']
+        (cpu, child_cpu) = _cpu_times()
+        event = {'kind': kind,
+                 'name': name,
+                 'module': module,
+                 'thread': threading.currentThread().getName(),
+                 'start': time.time() - self.start_time,
+                 'cpu': cpu,
+                 'child_cpu': child_cpu}
+        self.lock.acquire()
+        try:
+            event['id'] = len(self.events)
+            self.events.append(event)
+        finally:
+            self.lock.release()
+        if parent is None:
+            event['parent'] = None
+        else:
+            event['parent'] = parent['id']
+        stack.append(event)
+        return event
+
+    def end(self, event):
+        """Finish an event started with begin()"""
+        (cpu, child_cpu) = _cpu_times()
+        event['wall'] = time.time() - self.start_time - event['start']
+        event['cpu'] = cpu - event['cpu']
+        event['child_cpu'] = child_cpu - event['child_cpu']
+        stack = self.local.stack
+        if event in stack:
+            del stack[stack.index(event):]
+
+    def summary(self):
+        """
+        Return a dict mapping module names to dicts mapping phase names to
+        the total wall, cpu and child cpu time of that phase
+        """
+        modules = {}
+        for event in self.events:
+            if event['kind'] != 'phase' or event['module'] is None or 'wall' not in event:
+                continue
+            phases = modules.setdefault(event['module'], {})
+            totals = phases.setdefault(event['name'], {'wall': 0.0, 'cpu': 0.0, 'child_cpu': 0.0})
+            for key in totals:
+                totals[key] += event[key]
+        return modules
+
+    def as_dict(self):
+        """Return the profile as a dict that can be serialized to JSON"""
+        (cpu, child_cpu) = _cpu_times()
+        return {'command': sys.argv,
+                'start': self.start_time,
+                'wall': time.time() - self.start_time,
+                'cpu': cpu - self.start_cpu,
+                'child_cpu': child_cpu - self.start_child_cpu,
+                'modules': self.summary(),
+                'events': self.events}
+
+    def write(self, filename):
+        """
+        Write the profile to filename as JSON
+
+        Raises:
+        IOError - if the file can't be written
+        """
+        import json
+
+        profile_file = open(filename, 'w')
+        try:
+            json.dump(self.as_dict(), profile_file, indent=2, sort_keys=True)
+            profile_file.write("\n")
+        finally:
+            profile_file.close()
+
+
+class _Timer(object):
+    """Context manager recording an event in a profile"""
+
+    def __init__(self, profile, kind, name, module):
+        self.profile = profile
+        self.args = (kind, name, module)
+        self.event = None
+
+    def __enter__(self):
+        self.event = self.profile.begin(*self.args)
+        return self.event
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profile.end(self.event)
+        return False
+
+
+class _NullTimer(object):
+    """Context manager used when profiling is not enabled"""
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+def enable():
+    """Start recording events in a new profile and return it"""
+    global _profile
+    _profile = Profile()
+    return _profile
+
+
+def disable():
+    """Stop recording events"""
+    global _profile
+    _profile = None
+
+
+def get_profile():
+    """Return the profile events are recorded in, or None"""
+    return _profile
+
+
+def timed(kind, name, module=None):
+    """
+    Return a context manager that records the code it wraps as an event if
+    profiling is enabled.  The context manager returns the event dict, extra
+    keys set on it (e.g. a return code) are saved with the event.
+
+    Arguments:
+    kind - type of event: phase, command or write
+    name - method name, command line or file name
+
+    Keyword arguments:
+    module - name of the module the event belongs to, by default the
+             module of the enclosing event
+    """
+    profile = _profile
+    if profile is None:
+        return _NullTimer()
+    return _Timer(profile, kind, name, module)
+
+
+def call_method(module, method_name, args=()):
+    """
+    Call method_name(*args) on a configuration module, recording the call
+    as a phase of the module if profiling is enabled
+    """
+    with timed('phase', method_name, module.__class__.__name__):
+        return getattr(module, method_name)(*args)
@@ -0,0 +1,120 @@
+""" Module with the list of configuration modules osg-configure knows about """
+
+import os
+
+__all__ = ['ModuleEntry',
+           'MODULES',
+           'MODULE_DIRECTORY',
+           'installed_modules',
+           'find_module']
+
+# directory the configuration modules are installed in; they ship in
+# separate osg-configure-* packages so not all of them may be there
+MODULE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'configure_modules')
+
+
+class ModuleEntry(object):
+    """
+    Class describing a configuration module without importing it so that
+    modes like listing modules don't need to load every module
+    """
+
+    def __init__(self, name, class_path, separately_configurable, config_section):
+        """
+        Arguments:
+        name - name of the module as returned by module_name()
+        class_path - dotted path to the module class
+        separately_configurable - whether the module can be configured with -m
+        config_section - section of the config files the module reads, None if
+                         the module doesn't have its own section
+        """
+        self.name = name
+        self.class_path = class_path
+        self.separately_configurable = separately_configurable
+        self.config_section = config_section
+
+    def installed(self, module_directory=None):
+        """
+        Return True if the file of the module is in module_directory, which
+        defaults to MODULE_DIRECTORY
+        """
+        if module_directory is None:
+            module_directory = MODULE_DIRECTORY
+        module_file = self.class_path.split('.')[-2] + '.py'
+        return os.path.isfile(os.path.join(module_directory, module_file))
+
+    def load(self):
+        """Import and return the module class"""
+        (module_path, class_name) = self.class_path.rsplit('.', 1)
+        module_ref = __import__(module_path, globals(), locals(), [class_name])
+        return getattr(module_ref, class_name)
+
+    def create(self, logger):
+        """Import the module class and return an instance of it"""
+        return self.load()(logger=logger)
+
+
+# Listed in the order modules get checked and configured in when there is no
+# dependency between them
+MODULES = [
+    ModuleEntry('BaseConfiguration', 'osg_configure.configure_modules.bosco.BoscoConfiguration',
+                False, 'BOSCO'),
+    ModuleEntry('Condor', 'osg_configure.configure_modules.condor.CondorConfiguration',
+                True, 'Condor'),
+    ModuleEntry('Gateway', 'osg_configure.configure_modules.gateway.GatewayConfiguration',
+                False, 'Gateway'),
+    ModuleEntry('GIP', 'osg_configure.configure_modules.gip.GipConfiguration',
+                True, 'GIP'),
+    ModuleEntry('Gratia', 'osg_configure.configure_modules.gratia.GratiaConfiguration',
+                False, 'Gratia'),
+    ModuleEntry('Infoservices', 'osg_configure.configure_modules.infoservices.InfoServicesConfiguration',
+                False, 'Info Services'),
+    ModuleEntry('InstallLocations', 'osg_configure.configure_modules.installlocations.InstallLocations',
+                True, 'Install Locations'),
+    ModuleEntry('Legacy', 'osg_configure.configure_modules.legacysettings.LegacyConfiguration',
+                False, None),
+    ModuleEntry('LocalSettings', 'osg_configure.configure_modules.localsettings.LocalSettings',
+                True, 'Local Settings'),
+    ModuleEntry('LSF', 'osg_configure.configure_modules.lsf.LSFConfiguration',
+                True, 'LSF'),
+    ModuleEntry('ManagedFork', 'osg_configure.configure_modules.managedfork.ManagedForkConfiguration',
+                False, 'Managed Fork'),
+    ModuleEntry('Misc', 'osg_configure.configure_modules.misc.MiscConfiguration',
+                True, 'Misc Services'),
+    ModuleEntry('NetworkConfiguration', 'osg_configure.configure_modules.network.NetworkConfiguration',
+                True, 'Network'),
+    ModuleEntry('PBS', 'osg_configure.configure_modules.pbs.PBSConfiguration',
+                True, 'PBS'),
+    ModuleEntry('RSV', 'osg_configure.configure_modules.rsv.RsvConfiguration',
+                True, 'RSV'),
+    ModuleEntry('SGE', 'osg_configure.configure_modules.sge.SGEConfiguration',
+                True, 'SGE'),
+    ModuleEntry('SiteInformation', 'osg_configure.configure_modules.siteattributes.SiteAttributes',
+                True, 'Site Information'),
+    ModuleEntry('SLURM', 'osg_configure.configure_modules.slurm.SlurmConfiguration',
+                True, 'SLURM'),
+    ModuleEntry('Squid', 'osg_configure.configure_modules.squid.SquidConfiguration',
+                True, 'Squid'),
+    ModuleEntry('Storage', 'osg_configure.configure_modules.storage.StorageConfiguration',
+                True, 'Storage'),
+]
+
+
+def installed_modules(module_directory=None):
+    """
+    Return the entries of MODULES whose module file is installed, see
+    ModuleEntry.installed
+    """
+    return [entry for entry in MODULES if entry.installed(module_directory)]
+
+
+def find_module(name, module_directory=None):
+    """
+    Return the ModuleEntry for the installed module with the given name
+    (compared case insensitively) or None if there is no such module
+    """
+    for entry in installed_modules(module_directory):
+        if entry.name.lower() == name.lower():
+            return entry
+    return None
@@ -0,0 +1,121 @@
+""" Module to reload services once at the end of a run if files they read changed """
+
+import os
+import threading
+
+from osg_configure.modules import utilities
+
+__all__ = ['ReloadQueue',
+           'request',
+           'run',
+           'reset']
+
+
+class ReloadQueue(object):
+    """
+    Class collecting the services that may need to reload their
+    configuration and the files each of them reads.  When the queue is run,
+    each service is reloaded once, and only if atomic_write changed at least
+    one of its files.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # service names in the order they were first requested
+        self._services = []
+        self._commands = {}
+        self._files = {}
+
+    def request(self, service, reconfig_cmd, files):
+        """
+        Ask for service to be reloaded if one of files changes
+
+        Arguments:
+        service - name of the init script of the service
+        reconfig_cmd - shell command making the service reload its
+                       configuration
+        files - names of the files the service reads, a name ending in /
+                stands for every file under that directory
+        """
+        self._lock.acquire()
+        try:
+            if service not in self._commands:
+                self._services.append(service)
+                self._files[service] = set()
+            self._commands[service] = reconfig_cmd
+            self._files[service].update(files)
+        finally:
+            self._lock.release()
+
+    def due(self, written=None):
+        """
+        Return a list of the requested services with a changed file
+
+        Arguments:
+        written - names of the changed files, defaults to the files
+                  atomic_write changed in this run
+        """
+        if written is None:
+            written = utilities.get_written_files()
+        self._lock.acquire()
+        try:
+            services = []
+            for service in self._services:
+                for filename in self._files[service]:
+                    if filename.endswith('/'):
+                        directory = os.path.abspath(filename) + '/'
+                        changed = [x for x in written if x.startswith(directory)]
+                    else:
+                        changed = os.path.abspath(filename) in written
+                    if changed:
+                        services.append(service)
+                        break
+            return services
+        finally:
+            self._lock.release()
+
+    def run(self, logger=utilities.NullLogger, written=None):
+        """
+        Reload the services that have a changed file and empty the queue,
+        logging a warning for each reload that fails
+        """
+        services = self.due(written)
+        self._lock.acquire()
+        try:
+            commands = dict(self._commands)
+            for service in self._services:
+                if service not in services:
+                    logger.debug("Configuration of %s unchanged -- skipping reconfigure" % service)
+            del self._services[:]
+            self._commands.clear()
+            self._files.clear()
+        finally:
+            self._lock.release()
+        if utilities.get_root() is not None:
+            if services:
+                logger.info("Rendering into %s, not reconfiguring %s" %
+                            (utilities.get_root(), ", ".join(services)))
+            return
+        for service in services:
+            if not utilities.reconfig_service(service, commands[service], logger):
+                logger.warning("Error reloading %s config" % service)
+
+
+# queue used for the run
+_queue = ReloadQueue()
+
+
+def request(service, reconfig_cmd, files):
+    """Ask for service to be reloaded at the end of the run, see ReloadQueue.request"""
+    _queue.request(service, reconfig_cmd, files)
+
+
+def run(logger=utilities.NullLogger):
+    """Reload the services whose files changed in this run, see ReloadQueue.run"""
+    _queue.run(logger)
+
+
+def reset():
+    """Forget the services requested so far"""
+    global _queue
+    _queue = ReloadQueue()
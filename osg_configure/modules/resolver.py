@@ -0,0 +1,190 @@
+""" Module to look up host names concurrently with deadlines and caching """
+
+import Queue
+import socket
+import threading
+import time
+
+__all__ = ['LOOKUP_TIMEOUT',
+           'MAX_THREADS',
+           'Resolver',
+           'get_resolver',
+           'set_resolver',
+           'reset']
+
+# seconds a lookup may take once started before it counts as failed
+LOOKUP_TIMEOUT = 10
+MAX_THREADS = 8
+# seconds between checks for lookups past their deadline while waiting
+POLL_INTERVAL = 0.05
+
+# Resolver used for the run, created when first needed
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+class _Lookup(object):
+    """State of a single lookup"""
+
+    def __init__(self, function, argument, timeout_result):
+        self.function = function
+        self.argument = argument
+        # result used if the lookup doesn't finish in time
+        self.timeout_result = timeout_result
+        self.started = None
+        self.result = None
+        self.done = threading.Event()
+
+
+class Resolver(object):
+    """
+    Class looking up host names on a pool of worker threads.  A lookup that
+    is still running LOOKUP_TIMEOUT seconds after a worker started it counts
+    as failed and its worker is replaced, since calls into the system
+    resolver can't be interrupted.  Results, failures included, are kept for
+    the life of the Resolver.
+    """
+
+    def __init__(self, lookup=socket.gethostbyname, fqdn=socket.getfqdn,
+                 timeout=LOOKUP_TIMEOUT, threads=MAX_THREADS):
+        """
+        Keyword arguments:
+        lookup - function returning the address of a host name, raising
+                 socket.error if it doesn't resolve; tests can pass a stub
+        fqdn - function returning the fully qualified name of this host
+        timeout - seconds a lookup may take once started
+        threads - maximum number of worker threads
+        """
+        self.lookup_function = lookup
+        self.fqdn_function = fqdn
+        self.timeout = timeout
+        self.threads = threads
+        self.timeouts = 0
+        self._lock = threading.Lock()
+        self._lookups = {}
+        self._queue = Queue.Queue()
+        self._workers = 0
+
+    def _start_worker(self):
+        """Start a worker thread, must be called with the lock held"""
+        worker = threading.Thread(target=self._work, name='resolver')
+        # a worker stuck in the system resolver must not keep
+        # osg-configure from exiting
+        worker.setDaemon(True)
+        self._workers += 1
+        worker.start()
+
+    def _work(self):
+        """Run lookups from the queue until a lookup overruns its deadline"""
+        while True:
+            lookup = self._queue.get()
+            self._lock.acquire()
+            try:
+                lookup.started = time.time()
+            finally:
+                self._lock.release()
+            try:
+                result = lookup.function(lookup.argument)
+            except (EnvironmentError, UnicodeError):
+                result = None
+            self._lock.acquire()
+            try:
+                if lookup.done.isSet():
+                    # timed out and this worker was replaced
+                    return
+                lookup.result = result
+                lookup.done.set()
+            finally:
+                self._lock.release()
+
+    def _submit(self, key, function, argument, timeout_result=None):
+        """Return the _Lookup for key, queueing it if it's new"""
+        self._lock.acquire()
+        try:
+            lookup = self._lookups.get(key)
+            if lookup is None:
+                lookup = _Lookup(function, argument, timeout_result)
+                self._lookups[key] = lookup
+                self._queue.put(lookup)
+                if self._workers < self.threads:
+                    self._start_worker()
+            return lookup
+        finally:
+            self._lock.release()
+
+    def _expire(self):
+        """Fail the lookups past their deadline and replace their workers"""
+        self._lock.acquire()
+        try:
+            now = time.time()
+            for lookup in self._lookups.values():
+                if (lookup.started is not None and not lookup.done.isSet() and
+                        now - lookup.started > self.timeout):
+                    lookup.result = lookup.timeout_result
+                    lookup.done.set()
+                    self.timeouts += 1
+                    self._workers -= 1
+                    self._start_worker()
+        finally:
+            self._lock.release()
+
+    def _wait(self, lookup):
+        """Wait for lookup to finish or time out and return its result"""
+        while not lookup.done.isSet():
+            lookup.done.wait(POLL_INTERVAL)
+            self._expire()
+        return lookup.result
+
+    def prefetch(self, hosts):
+        """Start looking up all of hosts without waiting for the results"""
+        for host in hosts:
+            if host:
+                self._submit(('address', host), self.lookup_function, host)
+
+    def address(self, host):
+        """Return the address host resolves to or None if it doesn't resolve"""
+        return self._wait(self._submit(('address', host), self.lookup_function, host))
+
+    def resolves(self, host):
+        """Return True if host resolves"""
+        return self.address(host) is not None
+
+    def fqdn(self):
+        """
+        Return the fully qualified name of this host like socket.getfqdn(),
+        or the short host name if the lookup doesn't finish in time
+        """
+        # getfqdn() falls back to the short name when lookups fail
+        lookup = self._submit(('fqdn', ''), self.fqdn_function, '',
+                              timeout_result=socket.gethostname())
+        return self._wait(lookup)
+
+
+def get_resolver():
+    """Return the Resolver used for the run"""
+    global _resolver
+    _resolver_lock.acquire()
+    try:
+        if _resolver is None:
+            _resolver = Resolver()
+        return _resolver
+    finally:
+        _resolver_lock.release()
+
+
+def set_resolver(resolver):
+    """
+    Use resolver for the rest of the run, e.g. a Resolver with a stub
+    lookup function for tests; None goes back to a default Resolver
+    """
+    global _resolver
+    _resolver_lock.acquire()
+    try:
+        _resolver = resolver
+    finally:
+        _resolver_lock.release()
+
+
+def reset():
+    """Forget the results looked up so far"""
+    set_resolver(None)
@@ -1,4 +1,3 @@
-import classad
 import re
 import utilities
 
@@ -10,6 +9,9 @@ def classad_parse(inputstr):
     classad.parse otherwise (HTCondor 8.2, deprecated in 8.3).
 
     """
+    # imported here since loading the HTCondor bindings is slow
+    import classad
+
     if hasattr(classad, 'parseOne'):
         return classad.parseOne(inputstr)
     else:
@@ -0,0 +1,240 @@
+""" Module to run external commands with timeouts and accounting """
+
+import errno
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from osg_configure.modules import profiling
+
+__all__ = ['DEFAULT_TIMEOUT',
+           'CommandResult',
+           'run',
+           'set_dry_run',
+           'write_output',
+           'get_counters',
+           'reset_counters']
+
+# number of seconds a command may run for unless the caller says otherwise
+DEFAULT_TIMEOUT = 600
+# number of seconds between asking a timed out command to stop and killing it
+KILL_GRACE_PERIOD = 5
+
+# if True, only commands marked as read only are run, see set_dry_run()
+_dry_run = False
+_counters = {}
+_counters_lock = threading.Lock()
+
+
+class CommandResult(object):
+    """
+    Class holding the outcome of a command run with run()
+    """
+
+    def __init__(self, command, returncode, stdout, stderr, elapsed, timed_out):
+        """
+        Arguments:
+        command - the command as a string, used in messages
+        returncode - exit code of the command, negative if it was killed by
+                     a signal
+        stdout - captured standard output, '' if output was not captured
+        stderr - captured standard error, '' if output was not captured or
+                 was merged into stdout
+        elapsed - number of seconds the command ran for
+        timed_out - True if the command was stopped because it ran for too
+                    long
+        """
+        self.command = command
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.elapsed = elapsed
+        self.timed_out = timed_out
+
+    def succeeded(self):
+        """Return True if the command finished in time with an exit code of 0"""
+        return not self.timed_out and self.returncode == 0
+
+
+def _command_string(args):
+    """Return args (a string or list) as a string for messages"""
+    if isinstance(args, basestring):
+        return args
+    return " ".join(args)
+
+
+def _command_name(args):
+    """Return the name counters are kept under for args"""
+    if isinstance(args, basestring):
+        args = args.split()
+    if not args:
+        return ''
+    return os.path.basename(args[0])
+
+
+def _count(name, elapsed, result):
+    """Update the counters of command name"""
+    _counters_lock.acquire()
+    try:
+        counter = _counters.setdefault(name, {'calls': 0,
+                                              'failures': 0,
+                                              'timeouts': 0,
+                                              'wall': 0.0})
+        counter['calls'] += 1
+        counter['wall'] += elapsed
+        if result is None or not result.succeeded():
+            counter['failures'] += 1
+        if result is not None and result.timed_out:
+            counter['timeouts'] += 1
+    finally:
+        _counters_lock.release()
+
+
+def _stop_process(process, session):
+    """
+    Stop a process, and the processes it started if it leads its own
+    session: ask politely, then kill it if it is still running after
+    KILL_GRACE_PERIOD seconds
+    """
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            if session:
+                os.killpg(process.pid, sig)
+            else:
+                os.kill(process.pid, sig)
+        except OSError, e:
+            if e.errno == errno.ESRCH:
+                return
+            raise
+        deadline = time.time() + KILL_GRACE_PERIOD
+        while time.time() < deadline:
+            if process.poll() is not None:
+                return
+            time.sleep(0.1)
+
+
+def set_dry_run(dry_run):
+    """
+    If dry_run is True, stop running commands that may change the system:
+    run() only runs commands marked as read only and pretends the others
+    succeeded without output.
+    """
+    global _dry_run
+    _dry_run = dry_run
+
+
+def run(args, timeout=DEFAULT_TIMEOUT, capture=True, merge_stderr=False, shell=False, env=None,
+        read_only=False):
+    """
+    Run a command and wait for it to finish or time out.  A command with a
+    timeout runs in its own session so that it can be stopped along with
+    any processes it starts.
+
+    Arguments:
+    args - a string or a list of arguments formatted as the args argument
+           to subprocess.Popen
+
+    Keyword arguments:
+    timeout - number of seconds after which the command is stopped, None
+              to wait as long as it takes
+    capture - if True, stdout and stderr are captured in the result instead
+              of going to the terminal
+    merge_stderr - if True, stderr is captured along with stdout
+    shell - run args with the shell
+    env - environment for the command, by default the current environment
+    read_only - True if the command only queries the system, such commands
+                are run even when set_dry_run(True) was called
+
+    Returns:
+    a CommandResult
+
+    Raises:
+    OSError - if the command can't be started (e.g. it does not exist)
+    """
+    command = _command_string(args)
+    name = _command_name(args)
+    stdout = stderr = None
+    if capture:
+        stdout = subprocess.PIPE
+        stderr = subprocess.PIPE
+        if merge_stderr:
+            stderr = subprocess.STDOUT
+
+    # os.setsid is the only code run in the child before exec; running
+    # Python code there can deadlock on locks held by other threads
+    session = timeout is not None
+    preexec_fn = None
+    if session:
+        preexec_fn = os.setsid
+
+    if _dry_run and not read_only:
+        with profiling.timed('command', command) as event:
+            event['skipped'] = True
+        return CommandResult(command, 0, '', '', 0.0, False)
+
+    start = time.time()
+    result = None
+    try:
+        with profiling.timed('command', command) as event:
+            process = subprocess.Popen(args, stdout=stdout, stderr=stderr, shell=shell, env=env,
+                                       preexec_fn=preexec_fn, close_fds=True)
+            timed_out = threading.Event()
+            timer = None
+            if timeout is not None:
+                def expire():
+                    timed_out.set()
+                    _stop_process(process, session)
+                timer = threading.Timer(timeout, expire)
+                timer.setDaemon(True)
+                timer.start()
+            try:
+                (output, error) = process.communicate()
+            except KeyboardInterrupt:
+                _stop_process(process, session)
+                raise
+            if timer is not None:
+                timer.cancel()
+                # wait for a stop in progress to finish
+                timer.join()
+            result = CommandResult(command, process.returncode, output or '', error or '',
+                                   time.time() - start, timed_out.isSet())
+            event['returncode'] = result.returncode
+            event['timed_out'] = result.timed_out
+    finally:
+        _count(name, time.time() - start, result)
+    return result
+
+
+def get_counters():
+    """
+    Return a dict mapping command names (the base name of the executable)
+    to dicts with the number of calls, failures and timeouts and the total
+    number of seconds the command ran for
+    """
+    _counters_lock.acquire()
+    try:
+        return dict((name, dict(counter)) for name, counter in _counters.items())
+    finally:
+        _counters_lock.release()
+
+
+def reset_counters():
+    """Reset the command counters"""
+    _counters_lock.acquire()
+    try:
+        _counters.clear()
+    finally:
+        _counters_lock.release()
+
+
+def write_output(result):
+    """Pass the captured output of a command on to stdout and stderr"""
+    if result.stdout:
+        sys.stdout.write(result.stdout)
+        sys.stdout.flush()
+    if result.stderr:
+        sys.stderr.write(result.stderr)
+        sys.stderr.flush()
@@ -0,0 +1,183 @@
+""" Module to answer osg-configure requests over a local Unix socket """
+
+import cStringIO
+import errno
+import logging
+import os
+import socket
+import SocketServer
+import sys
+import traceback
+
+__all__ = ['SOCKET_PATH',
+           'config_signature',
+           'ConfigServer',
+           'send_request']
+
+SOCKET_PATH = '/var/run/osg-configure.sock'
+# longest request line accepted from a client
+MAX_REQUEST_LENGTH = 4096
+
+
+def config_signature(config_directory, extra_files=()):
+    """
+    Return a value that changes whenever a file in config_directory or one
+    of extra_files is added, removed or modified.  Used to find out if state
+    built from these files needs to be rebuilt.
+
+    Arguments:
+    config_directory - directory to check
+    extra_files - other files to check
+    """
+    signature = []
+    try:
+        filenames = sorted(os.listdir(config_directory))
+    except OSError:
+        filenames = []
+    paths = [os.path.join(config_directory, filename) for filename in filenames]
+    for path in [config_directory] + paths + list(extra_files):
+        try:
+            path_stat = os.stat(path)
+            signature.append((path, path_stat.st_ino, path_stat.st_size, path_stat.st_mtime))
+        except OSError:
+            signature.append((path, None))
+    return tuple(signature)
+
+
+class RequestHandler(SocketServer.StreamRequestHandler):
+    """
+    Handle one request: a line holding a command and an optional argument.
+    The reply is a line with "status <exit code>" followed by the output of
+    the command.
+    """
+
+    def handle(self):
+        line = self.rfile.readline(MAX_REQUEST_LENGTH).strip()
+        fields = line.split(None, 1)
+        if fields:
+            command = fields[0]
+        else:
+            command = ''
+        if len(fields) > 1:
+            argument = fields[1]
+        else:
+            argument = None
+        (status, output) = self.server.dispatch(command, argument)
+        self.wfile.write("status %d\n" % status)
+        self.wfile.write(output)
+
+
+class ConfigServer(SocketServer.UnixStreamServer):
+    """
+    Class to serve osg-configure requests on a Unix socket, one at a time.
+    Each command is a function taking the request argument (or None) that
+    writes its output to sys.stdout and sys.stderr and may call sys.exit;
+    the output and the exit code are sent back to the client.
+    """
+
+    def __init__(self, socket_path, commands, logger=None):
+        """
+        Arguments:
+        socket_path - path of the socket to listen on, an existing socket
+                      there is replaced
+        commands - dict mapping command names to functions
+        logger - if given, warnings and errors logged while handling a
+                 request are sent to the client as well
+        """
+        self.socket_path = socket_path
+        self.commands = commands
+        self.logger = logger
+        try:
+            os.unlink(socket_path)
+        except OSError, e:
+            if e.errno != errno.ENOENT:
+                raise
+        SocketServer.UnixStreamServer.__init__(self, socket_path, RequestHandler)
+        # only root may talk to the server
+        os.chmod(socket_path, 0600)
+
+    def dispatch(self, command, argument):
+        """
+        Run a command and return a tuple with its exit code and output
+        """
+        if command not in self.commands:
+            return 1, "Unknown command %r, valid commands are: %s\n" % (command,
+                                                                      ", ".join(sorted(self.commands)))
+
+        output = cStringIO.StringIO()
+        handler = None
+        if self.logger is not None:
+            handler = logging.StreamHandler(output)
+            handler.setLevel(logging.WARNING)
+            handler.setFormatter(logging.Formatter('%(levelname)-8s %(message)s'))
+            self.logger.addHandler(handler)
+        (old_stdout, old_stderr) = (sys.stdout, sys.stderr)
+        (sys.stdout, sys.stderr) = (output, output)
+        status = 0
+        try:
+            try:
+                self.commands[command](argument)
+            except SystemExit, e:
+                if e.code is None:
+                    status = 0
+                elif isinstance(e.code, int):
+                    status = e.code
+                else:
+                    output.write("%s\n" % e.code)
+                    status = 1
+            except Exception, e:
+                if self.logger is not None:
+                    self.logger.debug("Unhandled exception %s\n%s" % (e, traceback.format_exc()))
+                output.write("Unknown exception encountered while running %s: %s\n" % (command, e))
+                status = 1
+        finally:
+            (sys.stdout, sys.stderr) = (old_stdout, old_stderr)
+            if handler is not None:
+                self.logger.removeHandler(handler)
+        return status, output.getvalue()
+
+    def server_close(self):
+        SocketServer.UnixStreamServer.server_close(self)
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+def send_request(command, argument=None, socket_path=SOCKET_PATH):
+    """
+    Send a request to a running ConfigServer
+
+    Arguments:
+    command - name of the command to run
+    argument - optional argument for the command
+    socket_path - path of the server socket
+
+    Returns:
+    a tuple with the exit code and output of the command
+
+    Raises:
+    socket.error if the server can't be reached
+    """
+    request = command
+    if argument is not None:
+        request += " " + argument
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+        client.sendall(request + "\n")
+        client.shutdown(socket.SHUT_WR)
+        reply = []
+        while True:
+            data = client.recv(65536)
+            if not data:
+                break
+            reply.append(data)
+    finally:
+        client.close()
+    (status_line, output) = ("".join(reply) + "\n").split("\n", 1)
+    try:
+        status = int(status_line.split()[1])
+    except (IndexError, ValueError):
+        raise socket.error("Invalid reply from server: %r" % status_line)
+    return status, output[:-1]
@@ -0,0 +1,149 @@
+""" Module to read user-vo-map files once and look up accounts and VOs """
+
+import os
+import re
+import threading
+
+__all__ = ['USER_VO_MAP_LOCATION',
+           'UserVoMap',
+           'load',
+           'reset']
+
+USER_VO_MAP_LOCATION = '/var/lib/osg/user-vo-map'
+
+COMMENT_RE = re.compile(r'^\s*#')
+JAVA_RE = re.compile('(java|exception)', re.I)
+ACCOUNT_RE = re.compile('^[a-z0-9-._]+$', re.IGNORECASE)
+
+_lock = threading.Lock()
+# UserVoMap objects keyed by absolute path
+_maps = {}
+
+
+class UserVoMap(object):
+    """
+    Class holding a user-vo-map file parsed in a single pass: the account,
+    VO entries, the lines that aren't valid and indexes from accounts to
+    VOs and from VOs to accounts
+    """
+
+    def __init__(self, filename, file_stat=None):
+        """
+        Arguments:
+        filename - user-vo-map file to read
+
+        Keyword arguments:
+        file_stat - result of os.stat for filename, used to tell whether the
+                    file changed since it was read
+
+        Raises:
+        IOError -- the file can't be read
+        """
+        self.filename = filename
+        if file_stat is None:
+            file_stat = os.stat(filename)
+        self.signature = _signature(file_stat)
+        # (account, vo) tuples in file order
+        self.entries = []
+        self.invalid_lines = []
+        # VO names the way get_vos reports them, in file order
+        self.vo_names = []
+        self.account_vos = {}
+        self.vo_accounts = {}
+        self._read()
+
+    def _read(self):
+        """Parse the file and build the indexes"""
+        # imported here since validation imports utilities, which uses this
+        # module
+        from osg_configure.modules import validation
+
+        seen_names = set()
+        vo_validity = {}
+        map_file = open(self.filename)
+        try:
+            for line in map_file:
+                line = line.strip()
+                if line == "":
+                    continue
+                comment = COMMENT_RE.match(line)
+                fields = line.split()
+                if not comment and len(fields) > 1:
+                    name = fields[1]
+                    if name.startswith('us'):
+                        name = name[2:]
+                    if name not in seen_names:
+                        seen_names.add(name)
+                        self.vo_names.append(name)
+
+                if JAVA_RE.search(line):
+                    # found java exception
+                    self.invalid_lines.append(line)
+                    continue
+                if comment:
+                    continue
+                if len(fields) != 2:
+                    self.invalid_lines.append(line)
+                    continue
+                (account, vo) = fields
+                if vo not in vo_validity:
+                    vo_validity[vo] = validation.valid_vo_name(vo)
+                if not (ACCOUNT_RE.match(account) and vo_validity[vo]):
+                    self.invalid_lines.append(line)
+                    continue
+                self.entries.append((account, vo))
+                self.account_vos.setdefault(account, []).append(vo)
+                self.vo_accounts.setdefault(vo, []).append(account)
+        finally:
+            map_file.close()
+
+    def valid(self):
+        """Return True if every line of the file is a comment or a valid entry"""
+        return not self.invalid_lines
+
+    def vos_for_account(self, account):
+        """Return a list of the VOs account is mapped to"""
+        return list(self.account_vos.get(account, []))
+
+    def accounts_for_vo(self, vo):
+        """Return a list of the accounts mapped to vo"""
+        return list(self.vo_accounts.get(vo, []))
+
+
+def _signature(file_stat):
+    """Return the parts of file_stat that change when the file is replaced or edited"""
+    return file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime
+
+
+def load(filename=USER_VO_MAP_LOCATION):
+    """
+    Return the UserVoMap for filename, the file is only read again once it
+    has been modified or replaced
+
+    Raises:
+    IOError -- the file doesn't exist or can't be read
+    """
+    path = os.path.abspath(filename)
+    try:
+        file_stat = os.stat(path)
+    except OSError, e:
+        raise IOError(e.errno, e.strerror, filename)
+    signature = _signature(file_stat)
+    _lock.acquire()
+    try:
+        vo_map = _maps.get(path)
+        if vo_map is None or vo_map.signature != signature:
+            vo_map = UserVoMap(path, file_stat)
+            _maps[path] = vo_map
+        return vo_map
+    finally:
+        _lock.release()
+
+
+def reset():
+    """Forget the user-vo-map files read so far"""
+    _lock.acquire()
+    try:
+        _maps.clear()
+    finally:
+        _lock.release()
@@ -1,20 +1,26 @@
 """ Module to hold various utility functions """
 
 import re
-import socket
 import os
 import types
 import sys
 import glob
 import stat
 import tempfile
-import subprocess
+import shutil
 import platform
 import ConfigParser
 import errno
 import logging
+import threading
 
-import rpm
+from osg_configure.modules import exceptions
+from osg_configure.modules import profiling
+from osg_configure.modules import runner
+from osg_configure.modules import packages
+from osg_configure.modules import condorconfig
+from osg_configure.modules import uservomap
+from osg_configure.modules import resolver
 
 __all__ = ['get_elements',
            'write_attribute_file',
@@ -29,8 +35,18 @@ __all__ = ['get_elements',
            'get_condor_config',
            'get_condor_config_val'
            'atomic_write',
+           'remove_path',
+           'get_write_counts',
+           'set_root',
+           'get_root',
+           'root_path',
+           'staged_path',
+           'get_written_files',
+           'reset_write_counts',
+           'begin_transaction',
+           'WriteTransaction',
            'ce_installed',
-           'any_rpms_installed'
+           'any_rpms_installed',
            'rpm_installed',
            'get_test_config',
            'make_directory',
@@ -44,6 +60,10 @@ __all__ = ['get_elements',
 ]
 
 CONFIG_DIRECTORY = "/etc/osg"
+# number of seconds external commands may run for
+FETCH_CRL_TIMEOUT = 1800
+CONDOR_CONFIG_VAL_TIMEOUT = condorconfig.CONDOR_CONFIG_VAL_TIMEOUT
+SERVICE_TIMEOUT = 300
 
 
 def get_elements(element=None, filename=None):
@@ -138,11 +158,8 @@ def get_set_membership(test_set, reference_set, defaults=None):
 
 
 def get_hostname():
-    """Returns the hostname of the current system"""
-    try:
-        return socket.getfqdn()
-    except socket.error:
-        return None
+    """Returns the hostname of the current system, looked up once per run"""
+    return resolver.get_resolver().fqdn()
 
 
 def blank(value):
@@ -167,26 +184,11 @@ def get_vos(user_vo_file):
 
     if (user_vo_file is None or
             not os.path.isfile(user_vo_file)):
-        user_vo_file = '/var/lib/osg/user-vo-map'
+        user_vo_file = uservomap.USER_VO_MAP_LOCATION
     if not os.path.isfile(user_vo_file):
         return []
-    file_buffer = open(user_vo_file, 'r')
-    vo_list = []
-    for line in file_buffer:
-        try:
-            line = line.strip()
-            if line.startswith("#"):
-                continue
-            vo = line.split()[1]
-            if vo.startswith('us'):
-                vo = vo[2:]
-            if vo not in vo_list:
-                vo_list.append(vo)
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except (TypeError, AttributeError, IndexError):
-            pass
-    return vo_list
+    # callers add to the list they get
+    return list(uservomap.load(user_vo_file).vo_names)
 
 
 def service_enabled(service_name):
@@ -195,11 +197,11 @@ def service_enabled(service_name):
     """
     if service_name is None or service_name == "":
         return False
-    process = subprocess.Popen(['/sbin/service', '--list', service_name],
-                               stdout=subprocess.PIPE)
-    output = process.communicate()[0]
-    if process.returncode != 0:
+    result = runner.run(['/sbin/service', '--list', service_name], timeout=SERVICE_TIMEOUT,
+                        read_only=True)
+    if not result.succeeded():
         return False
+    output = result.stdout
 
     match = re.search(service_name + r'\s*\|.*\|\s*([a-z ]*)$', output)
     if match:
@@ -213,16 +215,21 @@ def service_enabled(service_name):
         return False
 
 
-def fetch_crl():
+def fetch_crl(output=None):
     """
     Run fetch_crl script and return a boolean indicating whether it was successful
+
+    Keyword arguments:
+    output - file-like object to write messages to instead of stdout
     """
 
+    if output is None:
+        output = sys.stdout
     try:
         crl_files = glob.glob('/etc/grid-security/certificates/*.r0')
         if len(crl_files) > 0:
-            sys.stdout.write("CRLs exist, skipping fetch-crl invocation\n")
-            sys.stdout.flush()
+            output.write("CRLs exist, skipping fetch-crl invocation\n")
+            output.flush()
             return True
 
         crl_path = '/usr/sbin'
@@ -240,55 +247,72 @@ def fetch_crl():
                                      'CRL retrieval for',
                                      r'^\s*$',
                                      ]
+        output.write("Running %s, this process may take " % crl_path +
+                     "some time to fetch all the crl updates\n")
+        output.flush()
         try:
-            fetch_crl_process = subprocess.Popen([crl_path, '-p', '10', '-T', '30'], stdout=subprocess.PIPE,
-                                                 stderr=subprocess.STDOUT)
+            result = runner.run([crl_path, '-p', '10', '-T', '30'], timeout=FETCH_CRL_TIMEOUT, merge_stderr=True)
         except OSError, e:
             if e.errno == errno.ENOENT:
-                sys.stdout.write("Can't find fetch-crl script, skipping fetch-crl invocation\n")
-                sys.stdout.flush()
+                output.write("Can't find fetch-crl script, skipping fetch-crl invocation\n")
+                output.flush()
                 return True
             else:
                 raise
-        sys.stdout.write("Running %s, this process may take " % crl_path +
-                         "some time to fetch all the crl updates\n")
-        sys.stdout.flush()
-        outerr = fetch_crl_process.communicate()[0]
-        if fetch_crl_process.returncode != 0:
-            sys.stdout.write("fetch-crl script had some errors:\n" + outerr + "\n")
-            sys.stdout.flush()
+        outerr = result.stdout
+        if result.timed_out:
+            output.write("fetch-crl script did not finish within %d seconds:\n" % FETCH_CRL_TIMEOUT +
+                         outerr + "\n")
+            output.flush()
+            return False
+        if result.returncode != 0:
+            output.write("fetch-crl script had some errors:\n" + outerr + "\n")
+            output.flush()
             for line in outerr.rstrip("\n").split("\n"):
                 for msg in error_message_whitelist:
                     if re.search(msg, line):
                         break
                 else:
                     return False
-            sys.stdout.write("Ignoring errors and continuing\n")
-            sys.stdout.flush()
+            output.write("Ignoring errors and continuing\n")
+            output.flush()
     except IOError:
         return False
     return True
 
 
-def run_script(script):
+def run_script(script, timeout=runner.DEFAULT_TIMEOUT, output=None):
     """
+    Run a script, passing its output on once it is done
+
     Arguments:
     script - a string or a list of arguments to run formatted while
              the args argument to subprocess.Popen
+    timeout - number of seconds after which the script is stopped
+    output - file-like object to pass the output of the script on to
+             instead of stdout and stderr
 
     Returns:
     True if script runs successfully, False otherwise
     """
 
     try:
-        process = subprocess.Popen(script)
+        result = runner.run(script, timeout=timeout)
     except OSError, e:
         if e.errno == errno.ENOENT:
             return False
         else:
             raise
-    process.communicate()
-    if process.returncode != 0:
+    if output is None:
+        runner.write_output(result)
+        errors = sys.stderr
+    else:
+        output.write(result.stdout + result.stderr)
+        errors = output
+    if result.timed_out:
+        errors.write("%s did not finish within %d seconds\n" % (result.command, timeout))
+        return False
+    if result.returncode != 0:
         return False
 
     return True
@@ -323,6 +347,9 @@ def get_condor_config(default_config='/etc/condor/condor_config'):
 def get_condor_config_val(variable, executable='condor_config_val', quiet_undefined=False):
     """
     Use condor_config_val to return the expanded value of a variable.
+    Values are remembered for the rest of the run, use
+    condorconfig.get_values to look up several variables with one
+    condor_config_val run.
 
     Arguments:
     variable - name of the variable whose value to return
@@ -334,17 +361,7 @@ def get_condor_config_val(variable, executable='condor_config_val', quiet_undefi
     The stripped output of condor_config_val, or None if
     condor_config_val reports an error.
     """
-    try:
-        process = subprocess.Popen([executable, '-expand', variable],
-                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        output, error = process.communicate()
-        if error and not (error.startswith('Not defined:') and quiet_undefined):
-            sys.stderr.write(error)
-        if process.returncode != 0:
-            return None
-        return output.strip()
-    except OSError:
-        return None
+    return condorconfig.get_value(variable, executable, quiet_undefined)
 
 
 def read_file(filename, default=None):
@@ -358,7 +375,7 @@ def read_file(filename, default=None):
     """
     contents = default
     try:
-        fh = open(filename, 'r')
+        fh = open(staged_path(filename), 'r')
         try:
             contents = fh.read()
         finally:
@@ -368,9 +385,191 @@ def read_file(filename, default=None):
     return contents
 
 
+# directory that files are written under instead of /, see set_root()
+_root = None
+
+
+def set_root(root):
+    """
+    Write files under root instead of / from now on, e.g. to render the
+    configuration of another host into a staging directory.  Reads of files
+    being edited (through read_file or staged_path) see the staged copy if
+    there is one and the system file otherwise.
+
+    Arguments:
+    root - directory to use as the root, None to write to / again
+    """
+    global _root
+    if root is not None:
+        root = os.path.abspath(root)
+    _root = root
+
+
+def get_root():
+    """Return the directory set with set_root() or None"""
+    return _root
+
+
+def root_path(path):
+    """
+    Return the path a file should be written to: path under the directory
+    set with set_root(), or path itself if no root is set or path is
+    relative
+    """
+    if _root is None or not os.path.isabs(path):
+        return path
+    return os.path.join(_root, path.lstrip(os.sep))
+
+
+def staged_path(path):
+    """
+    Return the path a file should be read from: the copy under the directory
+    set with set_root() if there is one, path itself otherwise
+    """
+    staged = root_path(path)
+    if staged != path and os.path.lexists(staged):
+        return staged
+    return path
+
+
+# number of files written and of writes skipped because the file already had
+# the right contents; updated by atomic_write from multiple threads
+_write_counts = {'performed': 0, 'skipped': 0}
+_write_counts_lock = threading.Lock()
+# absolute names of the files atomic_write changed, before set_root() is
+# applied
+_written_files = set()
+
+
+def _count_write(kind, filename=None):
+    """
+    Increment the write counter given by kind, remembering filename if the
+    write was performed
+    """
+    _write_counts_lock.acquire()
+    try:
+        _write_counts[kind] += 1
+        if kind == 'performed' and filename is not None:
+            _written_files.add(filename)
+    finally:
+        _write_counts_lock.release()
+
+
+def get_write_counts():
+    """
+    Return a tuple with the number of files written by atomic_write and the
+    number of writes skipped since the file was unchanged
+    """
+    return _write_counts['performed'], _write_counts['skipped']
+
+
+def get_written_files():
+    """
+    Return a frozenset with the absolute names of the files atomic_write
+    changed, as given to it rather than under the directory set with
+    set_root()
+    """
+    _write_counts_lock.acquire()
+    try:
+        return frozenset(_written_files)
+    finally:
+        _write_counts_lock.release()
+
+
+def reset_write_counts():
+    """Reset the counts returned by get_write_counts and get_written_files"""
+    _write_counts_lock.acquire()
+    try:
+        _write_counts['performed'] = 0
+        _write_counts['skipped'] = 0
+        _written_files.clear()
+    finally:
+        _write_counts_lock.release()
+
+
+def _file_unchanged(filename, contents, mode):
+    """
+    Return True if filename already has the given contents.  If mode is not
+    None and the permissions differ, they are fixed without touching the
+    contents.
+    """
+    try:
+        file_stat = os.stat(filename)
+        if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_size != len(contents):
+            return False
+        current_file = open(filename, 'rb')
+        try:
+            if current_file.read() != contents:
+                return False
+        finally:
+            current_file.close()
+        if mode is not None and stat.S_IMODE(file_stat.st_mode) != mode:
+            os.chmod(filename, mode)
+    except EnvironmentError:
+        return False
+    return True
+
+
+def _replace_file(filename, contents, mode=None, sync=True):
+    """
+    Replace filename with a new file holding contents by writing a temporary
+    file in the same directory and renaming it into place.  The owner of an
+    existing file is kept.
+
+    Arguments:
+    filename - name of the file to replace
+    contents - string with contents to write to file
+    mode - permissions for the file, if None the previous permissions are
+           kept or 0644 is used for new files
+    sync - if True, fsync the data before renaming the file
+
+    Raises:
+    EnvironmentError on failure
+    """
+    try:
+        old_stat = os.stat(filename)
+    except OSError, e:
+        if e.errno != errno.ENOENT:
+            raise
+        old_stat = None
+    if mode is None:
+        if old_stat is not None:
+            mode = stat.S_IMODE(old_stat.st_mode)
+        else:
+            # file doesn't exist; give it 0644 permissions by default
+            mode = 0644
+    (config_fd, temp_name) = tempfile.mkstemp(dir=os.path.dirname(filename))
+    try:
+        try:
+            os.write(config_fd, contents)
+            if sync:
+                # need to fsync data to make sure data is written on disk before renames
+                # see ext4 documentation for more information
+                os.fsync(config_fd)
+        finally:
+            os.close(config_fd)
+        if old_stat is not None and (old_stat.st_uid, old_stat.st_gid) != (os.getuid(), os.getgid()):
+            try:
+                os.chown(temp_name, old_stat.st_uid, old_stat.st_gid)
+            except OSError, e:
+                if e.errno != errno.EPERM:
+                    raise
+    except:
+        os.unlink(temp_name)
+        raise
+    os.rename(temp_name, filename)
+    os.chmod(filename, mode)
+
+
 def atomic_write(filename=None, contents=None, **kwargs):
     """
-    Atomically write contents to a file
+    Atomically write contents to a file.  If the file already has the given
+    contents it is left alone so that its modification time doesn't change.
+
+    If a WriteTransaction is active (see begin_transaction), the file is
+    replaced right away so later reads see the new contents, but syncing it
+    to disk is left to WriteTransaction.commit and the previous contents
+    are restored by WriteTransaction.rollback.
 
     Arguments:
     filename - name of the file that needs to be written
@@ -388,36 +587,256 @@ def atomic_write(filename=None, contents=None, **kwargs):
     if filename is None or contents is None:
         return True
 
-    try:
-        (config_fd, temp_name) = tempfile.mkstemp(dir=os.path.dirname(filename))
-        mode = kwargs.get('mode', None)
-        if mode is None:
-            try:
-                mode = stat.S_IMODE(os.stat(filename).st_mode)
-            except OSError, e:
-                if e.errno == errno.ENOENT:
-                    # file doesn't exist; give it 0644 permissions by default
-                    mode = 0644
-                else:
-                    raise
+    mode = kwargs.get('mode', None)
+    written_name = os.path.abspath(filename)
+    if _root is not None:
+        filename = root_path(filename)
         try:
-            try:
-                os.write(config_fd, contents)
-                # need to fsync data to make sure data is written on disk before renames
-                # see ext4 documentation for more information
-                os.fsync(config_fd)
-            finally:
-                os.close(config_fd)
-        except:
-            os.unlink(temp_name)
-            raise
-        os.rename(temp_name, filename)
-        os.chmod(filename, mode)
-    except EnvironmentError:
-        return False
+            os.makedirs(os.path.dirname(filename))
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                return False
+    with profiling.timed('write', filename) as event:
+        if _file_unchanged(filename, contents, mode):
+            _count_write('skipped')
+            event['result'] = 'skipped'
+            return True
+
+        transaction = _transaction
+        try:
+            if transaction is not None:
+                transaction.write(filename, contents, mode)
+            else:
+                _replace_file(filename, contents, mode)
+        except EnvironmentError:
+            event['result'] = 'failed'
+            return False
+        _count_write('performed', written_name)
+        event['result'] = 'performed'
+        event['size'] = len(contents)
+    condorconfig.file_written(filename)
     return True
 
 
+def remove_path(path):
+    """
+    Remove a file or a directory tree.  If a WriteTransaction is active, the
+    removal is undone by WriteTransaction.rollback like the files written
+    by atomic_write.
+
+    Raises:
+    EnvironmentError on failure
+    """
+    path = root_path(path)
+    transaction = _transaction
+    if transaction is not None:
+        transaction.remove(path)
+    elif os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+class WriteTransaction(object):
+    """
+    Class to group the files written by atomic_write and removed by
+    remove_path while configuring.  Files are replaced or removed right
+    away, keeping a backup of the previous version, so that they can either
+    all be synced to disk at the end with one pass per directory or all be
+    put back the way they were.
+    """
+
+    BACKUP_SUFFIX = '.osg-configure-backup'
+
+    def __init__(self):
+        self.active = True
+        self._lock = threading.Lock()
+        # files in the order they were first written
+        self._files = []
+        # file name -> name of the backup of the previous version, or None
+        # if the file did not exist
+        self._backups = {}
+
+    def _backup_name(self, filename):
+        """Return the name used for the backup of filename"""
+        (directory, basename) = os.path.split(filename)
+        return os.path.join(directory, '.' + basename + WriteTransaction.BACKUP_SUFFIX)
+
+    def _make_backup(self, filename):
+        """
+        Keep the current version of filename around and return the backup
+        name, or None if filename doesn't exist
+        """
+        if not os.path.exists(filename):
+            return None
+        backup = self._backup_name(filename)
+        if os.path.lexists(backup):
+            # left over from a run that was interrupted
+            os.unlink(backup)
+        try:
+            # a hard link keeps the old inode with its contents, owner and
+            # permissions without copying anything
+            os.link(filename, backup)
+        except OSError:
+            shutil.copy2(filename, backup)
+        return backup
+
+    def write(self, filename, contents, mode=None):
+        """
+        Replace filename with contents without syncing, backing up the
+        previous version the first time the file is written
+
+        Raises:
+        EnvironmentError on failure
+        """
+        filename = os.path.abspath(filename)
+        self._lock.acquire()
+        try:
+            if not self.active:
+                raise IOError(errno.EINVAL, "Transaction already finished", filename)
+            if filename not in self._backups:
+                self._backups[filename] = self._make_backup(filename)
+                self._files.append(filename)
+        finally:
+            self._lock.release()
+        _replace_file(filename, contents, mode, sync=False)
+
+    def remove(self, path):
+        """
+        Remove the file or directory tree path by moving it to its backup
+        name, where it stays until the transaction is finished
+
+        Raises:
+        EnvironmentError on failure
+        """
+        path = os.path.abspath(path)
+        self._lock.acquire()
+        try:
+            if not self.active:
+                raise IOError(errno.EINVAL, "Transaction already finished", path)
+            if path not in self._backups:
+                backup = self._backup_name(path)
+                if os.path.isdir(backup) and not os.path.islink(backup):
+                    # left over from a run that was interrupted
+                    shutil.rmtree(backup)
+                elif os.path.lexists(backup):
+                    os.unlink(backup)
+                os.rename(path, backup)
+                self._backups[path] = backup
+                self._files.append(path)
+            elif os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.unlink(path)
+        finally:
+            self._lock.release()
+
+    def files(self):
+        """Return a list of the files written in this transaction"""
+        return list(self._files)
+
+    def _finish(self):
+        """Mark the transaction as finished"""
+        global _transaction
+        self.active = False
+        if _transaction is self:
+            _transaction = None
+
+    def commit(self):
+        """
+        Sync all files written to disk, syncing each directory once after
+        the files in it, and remove the backups
+
+        Returns:
+        True if everything was synced, False otherwise
+        """
+        self._lock.acquire()
+        try:
+            directories = {}
+            for filename in self._files:
+                directories.setdefault(os.path.dirname(filename), []).append(filename)
+            status = True
+            for directory in sorted(directories):
+                try:
+                    for filename in directories[directory]:
+                        # removed files have nothing left to sync
+                        if os.path.lexists(filename):
+                            _fsync_path(filename)
+                    _fsync_path(directory)
+                except EnvironmentError:
+                    status = False
+            for backup in self._backups.values():
+                if backup is not None:
+                    try:
+                        if os.path.isdir(backup) and not os.path.islink(backup):
+                            shutil.rmtree(backup)
+                        else:
+                            os.unlink(backup)
+                    except OSError:
+                        pass
+            return status
+        finally:
+            self._finish()
+            self._lock.release()
+
+    def rollback(self):
+        """
+        Put back the previous versions of all files written or removed,
+        removing files that did not exist before
+
+        Returns:
+        True if all files were restored, False otherwise
+        """
+        self._lock.acquire()
+        try:
+            status = True
+            for filename in reversed(self._files):
+                backup = self._backups[filename]
+                try:
+                    if backup is None:
+                        if os.path.lexists(filename):
+                            os.unlink(filename)
+                    else:
+                        # a directory removed and created again is empty
+                        # by now, rename replaces it
+                        os.rename(backup, filename)
+                except OSError:
+                    status = False
+            return status
+        finally:
+            self._finish()
+            self._lock.release()
+
+
+_transaction = None
+
+
+def begin_transaction():
+    """
+    Start a WriteTransaction that collects all files written by atomic_write
+    until it is committed or rolled back and return it
+    """
+    global _transaction
+    if _transaction is not None:
+        raise exceptions.ApplicationError("A write transaction is already active")
+    _transaction = WriteTransaction()
+    return _transaction
+
+
+def _fsync_path(path):
+    """fsync the file or directory at path"""
+    path_fd = os.open(path, os.O_RDONLY)
+    try:
+        try:
+            os.fsync(path_fd)
+        except OSError, e:
+            # some filesystems don't support syncing directories
+            if e.errno != errno.EINVAL:
+                raise
+    finally:
+        os.close(path_fd)
+
+
 def ce_installed():
     """
     Return True if one of the base osg-ce metapackages (osg-ce or osg-htcondor-ce) is installed
@@ -440,7 +859,11 @@ def any_rpms_installed(*rpm_names):
     """
     if isinstance(rpm_names[0], list) or isinstance(rpm_names[0], tuple):
         rpm_names = list(rpm_names[0])
-    return (True in (rpm_installed(rpm_name) for rpm_name in rpm_names))
+    try:
+        installed = packages.installed_packages()
+    except IOError:
+        return False
+    return not installed.isdisjoint(rpm_names)
 
 
 def rpm_installed(rpm_name):
@@ -454,18 +877,15 @@ def rpm_installed(rpm_name):
     Returns:
     True if rpms are installed, False otherwise
     """
-    trans_set = rpm.TransactionSet()
+    try:
+        installed = packages.installed_packages()
+    except IOError:
+        return False
     if isinstance(rpm_name, types.StringType):
-        return trans_set.dbMatch('name', rpm_name).count() in (1, 2)
+        return rpm_name in installed
 
     # check with iterable type
-    try:
-        for name in rpm_name:
-            if trans_set.dbMatch('name', name).count() not in (1, 2):
-                return False
-        return True
-    except rpm.error:
-        return False
+    return installed.issuperset(rpm_name)
 
 
 def get_test_config(config_file=''):
@@ -510,6 +930,7 @@ def make_directory(dir_name, perms=0755, uid=None, gid=None):
     if gid is None:
         gid = os.getgid()
     try:
+        dir_name = root_path(dir_name)
         os.makedirs(dir_name, perms)
         os.chown(dir_name, uid, gid)
         return True
@@ -615,15 +1036,25 @@ def fallback_classad_quote(input_value):
         raise ValueError("Unmatched double quotes in '%s'" % input_value)
 
 
-try:
-    import classad
+_classad_quote = None
 
-    _classad_quote = classad.quote
 
-    def classad_quote(input_value):
-        return _classad_quote(str(input_value))
-except (ImportError, AttributeError):
-    classad_quote = fallback_classad_quote
+def classad_quote(input_value):
+    """Quote a Python string according to classad syntax
+
+    Uses classad.quote if the HTCondor bindings are available; they are only
+    imported the first time this is called since loading them is slow.
+    """
+    global _classad_quote
+    if _classad_quote is None:
+        try:
+            import classad
+
+            quote = classad.quote
+            _classad_quote = lambda value: quote(str(value))
+        except (ImportError, AttributeError):
+            _classad_quote = fallback_classad_quote
+    return _classad_quote(input_value)
 
 
 def add_or_replace_setting(old_buf, variable, new_value, quote_value=True):
@@ -691,12 +1122,20 @@ def reconfig_service(service, reconfig_cmd, log=None):
     if log is None:
         log = NullLogger
     """If condor is running, run condor_reconfig to make it reload its configuration"""
-    if os.system('/sbin/service %s status >/dev/null 2>&1' % service) != 0:
+    try:
+        running = runner.run(['/sbin/service', service, 'status'], timeout=SERVICE_TIMEOUT,
+                             read_only=True).succeeded()
+    except OSError:
+        running = False
+    if not running:
         log.info("%s is not running -- skipping reconfigure" % service)
         return True
 
     log.info("Reconfiguring %s using %s" % (service, reconfig_cmd))
-    if os.system(reconfig_cmd + ' >/dev/null') == 0:
+    result = runner.run(reconfig_cmd, timeout=SERVICE_TIMEOUT, shell=True)
+    if result.stderr:
+        sys.stderr.write(result.stderr)
+    if result.succeeded():
         log.info("Reconfigure successful")
         return True
 
@@ -4,11 +4,12 @@ import re
 import socket
 import os
 import pwd
-import ConfigParser
 import sys
-import cStringIO
 
 from osg_configure.modules import utilities
+from osg_configure.modules import inifile
+from osg_configure.modules import uservomap
+from osg_configure.modules import resolver
 
 __all__ = ['valid_domain',
            'valid_email',
@@ -28,7 +29,8 @@ __all__ = ['valid_domain',
 def valid_domain(host, resolve=False):
     """Return True if the string passed in is a valid domain
 
-    If resolve=True, also check that it resolves (according to gethostbyname).
+    If resolve=True, also check that it resolves (according to gethostbyname,
+    see resolver.Resolver for the deadline and caching).
 
     """
     if not host:
@@ -51,11 +53,7 @@ def valid_domain(host, resolve=False):
     if not resolve:
         return True
 
-    try:
-        socket.gethostbyname(host)
-    except (socket.herror, socket.gaierror):
-        return False
-    return True
+    return resolver.get_resolver().resolves(host)
 
 
 def _all(iterable):
@@ -159,35 +157,9 @@ def valid_user_vo_file(map_file=None, return_invalid_lines=False):
         else:
             return False
 
-    valid = True
-    comment = re.compile(r'^\s*#')
-    java = re.compile('(java|exception)', re.I)
-    account_regex = re.compile('^[a-z0-9-._]+$', re.IGNORECASE)
-    invalid_lines = []
-    for line in [x.strip() for x in open(map_file)]:
-        if line == "":
-            # skip blank lines
-            continue
-
-        if java.search(line):
-            # found java exception
-            invalid_lines.append(line)
-            valid = False
-            continue
-
-        if not comment.match(line):
-            if len(line.strip().split()) != 2:
-                invalid_lines.append(line)
-                valid = False
-                continue
-
-            (account, vo) = line.strip().split()
-            if not (account_regex.match(account) and valid_vo_name(vo)):
-                # not a comment or entry
-                invalid_lines.append(line)
-                valid = False
-                continue
-
+    vo_map = uservomap.load(map_file)
+    valid = vo_map.valid()
+    invalid_lines = list(vo_map.invalid_lines)
     if return_invalid_lines:
         return (valid, invalid_lines)
     else:
@@ -244,47 +216,32 @@ def valid_executable(file_name):
     return True
 
 
-def valid_ini_file(filename):
+def valid_ini_file(filename, contents=None, ini_file=None):
     """
     Check an ini file to make sure that it's conforms to our requirements
-    E.g. no repeated sections, no newlines in options
+    E.g. no newlines in options; repeated sections only give a warning
+
+    If contents is given, it is used instead of reading filename again, if
+    ini_file is given it is used instead of tokenizing the contents
 
     returns True/False
     """
     if filename == "" or filename is None:
         return False
 
-    config_file = os.path.abspath(filename)
-    configuration = ConfigParser.ConfigParser()
-    file_buffer = cStringIO.StringIO()
-    temp = open(config_file).read()
-    temp = temp.replace('%(', '-')
-    file_buffer.write(temp)
-    file_buffer.seek(0)
-    try:
-        configuration.readfp(file_buffer)
-    except ConfigParser.ParsingError, e:
-        sys.stderr.write("Error while parsing: %s\n%s\n" % (filename, e))
-        sys.stderr.write("Lines with options should not start with a space\n")
-        return False
-
-    sections = configuration.sections()
-    for section in sections:
-        for option in configuration.options(section):
-            try:
-                value = configuration.get(section, option)
-                if "\n" in value:
-                    # pylint: disable-msg=E1103
-                    error_line = value.split('\n')[1]
-                    sys.stderr.write("INI syntax error in section %s: \n" % section)
-                    sys.stderr.write("The following line starts with a space: %s\n" % error_line)
-                    sys.stderr.write("Please removing the leading space\n")
-                    return False
-            except ValueError:
-                sys.stderr.write("syntax error in section %s with option %s\n" % (section, option))
-                return False
+    if ini_file is None:
+        if contents is None:
+            contents = open(os.path.abspath(filename)).read()
+        ini_file = inifile.tokenize(contents, filename)
+    for lineno, message in ini_file.warnings:
+        sys.stderr.write("WARNING: %s, line %d: %s\n" % (filename, lineno, message))
+    if ini_file.valid():
+        return True
 
-    return True
+    sys.stderr.write("Error while parsing: %s\n" % filename)
+    for lineno, message in ini_file.errors:
+        sys.stderr.write("Line %d: %s\n" % (lineno, message))
+    return False
 
 
 def valid_ini_references(files):
@@ -295,46 +252,15 @@ def valid_ini_references(files):
     return False if this is not the case
     """
 
-    configuration = ConfigParser.SafeConfigParser()
-    try:
-        configuration.read(files)
-    except ConfigParser.InterpolationError, e:
-        sys.stderr.write("Error with variable interpolation:\n%s\n" % e)
-        return False
-
-    ref_regex = re.compile(r'(%\(.*\))(!s|$)', flags=re.MULTILINE)
-    ref2_regex = re.compile(r'(%\(.*(!\)))$', flags=re.MULTILINE)
     if not hasattr(files, '__iter__'):
         # we have a single filename
-        buf = open(files).read()
-        match = ref_regex.search(buf)
-        match2 = ref2_regex.search(buf)
-        if match:
-            sys.stderr.write("WARNING: Possible invalid variable reference " +
-                             "in %s:\n%s\n" % (files, match.group(1)))
-            return False
-        elif match2:
-            sys.stderr.write("WARNING: Possible invalid variable reference " +
-                             "in %s:\n%s\n" % (files, match2.group(1)))
-            return False
-        else:
-            return True
-
-    status = True
-    for filename in files:
-        buf = open(filename).read()
-        match = ref_regex.search(buf)
-        match2 = ref2_regex.search(buf)
-        if match:
-            sys.stderr.write("WARNING: Possible invalid variable reference " +
-                             "in %s:\n%s\n" % (filename, match.group(1)))
-            status = False
-        elif match2:
-            sys.stderr.write("WARNING: Possible invalid variable reference " +
-                             "in %s:\n%s\n" % (files, match2.group(1)))
-            return False
-
-    return status
+        files = [files]
+    ini_files = [inifile.read_file(filename) for filename in files]
+    problems = inifile.unresolved_references(ini_files)
+    for option, filename, reference, message in problems:
+        sys.stderr.write("WARNING: Possible invalid variable reference " +
+                         "in %s, line %d:\n%s: %s\n" % (filename, option.line, message, reference))
+    return not problems
 
 
 def valid_contact(contact, jobmanager):
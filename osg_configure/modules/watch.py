@@ -0,0 +1,178 @@
+""" Module to wait for changes to the files in a directory """
+
+import errno
+import os
+import select
+import struct
+import time
+
+__all__ = ['DirectoryWatcher']
+
+# inotify event masks from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF)
+# struct inotify_event without the name: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _inotify_functions():
+    """
+    Return a tuple with the libc inotify_init and inotify_add_watch functions,
+    or None if inotify is not available
+    """
+    try:
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        init = libc.inotify_init
+        add_watch = libc.inotify_add_watch
+    except (ImportError, OSError, AttributeError):
+        return None
+    init.argtypes = []
+    add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return init, add_watch
+
+
+class DirectoryWatcher(object):
+    """
+    Class to wait for files in a directory to be created, changed, renamed
+    or removed.  Uses inotify when available and falls back to checking the
+    modification times of the files every poll_interval seconds otherwise.
+    """
+
+    def __init__(self, directory, poll_interval=1.0, settle_time=0.1):
+        """
+        Arguments:
+        directory - directory to watch
+        poll_interval - seconds between checks when inotify is not available
+        settle_time - seconds to keep collecting changes after the first
+                      one so that an editor saving a file results in a
+                      single wait() returning
+        """
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.fd = None
+        functions = _inotify_functions()
+        if functions is not None:
+            (init, add_watch) = functions
+            fd = init()
+            if fd >= 0:
+                if add_watch(fd, directory, WATCH_MASK) >= 0:
+                    self.fd = fd
+                else:
+                    os.close(fd)
+        self.stats = self._stat_files()
+
+    def using_inotify(self):
+        """Return True if changes are reported by inotify"""
+        return self.fd is not None
+
+    def _stat_files(self):
+        """Return a dict mapping file names in the directory to their stat"""
+        stats = {}
+        try:
+            filenames = os.listdir(self.directory)
+        except OSError:
+            return stats
+        for filename in filenames:
+            try:
+                file_stat = os.stat(os.path.join(self.directory, filename))
+            except OSError:
+                continue
+            stats[filename] = (file_stat.st_ino, file_stat.st_size, file_stat.st_mtime)
+        return stats
+
+    def _read_events(self, timeout):
+        """
+        Return the names of the files inotify reported changes for within
+        timeout seconds
+        """
+        try:
+            readable = select.select([self.fd], [], [], timeout)[0]
+        except select.error, e:
+            if e.args[0] == errno.EINTR:
+                return set()
+            raise
+        if not readable:
+            return set()
+        data = os.read(self.fd, 65536)
+        changed = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            (_, mask, _, length) = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip('\0')
+            offset += length
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                name = '.'
+            if name:
+                changed.add(name)
+        return changed
+
+    def _poll_changes(self, timeout):
+        """
+        Return the names of the files whose stat changed within timeout
+        seconds
+        """
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+        while True:
+            stats = self._stat_files()
+            changed = set()
+            for filename in set(stats) | set(self.stats):
+                if stats.get(filename) != self.stats.get(filename):
+                    changed.add(filename)
+            self.stats = stats
+            if changed:
+                return changed
+            if deadline is not None and time.time() >= deadline:
+                return changed
+            if deadline is None:
+                time.sleep(self.poll_interval)
+            else:
+                time.sleep(max(0, min(self.poll_interval, deadline - time.time())))
+
+    def wait(self, timeout=None):
+        """
+        Wait for changes in the directory
+
+        Arguments:
+        timeout - seconds to wait for, None to wait until something changes
+
+        Returns:
+        the set of names of the files that changed, empty if nothing changed
+        before the timeout
+        """
+        if self.fd is None:
+            changed = self._poll_changes(timeout)
+            if changed:
+                time.sleep(self.settle_time)
+                changed |= self._poll_changes(0)
+            return changed
+
+        changed = self._read_events(timeout)
+        if changed:
+            while True:
+                more = self._read_events(self.settle_time)
+                if not more:
+                    break
+                changed |= more
+        return changed
+
+    def close(self):
+        """Stop watching the directory"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
@@ -1,8 +1,5 @@
 """ Module to hold various xml related functions """
 
-import xml.dom.minidom
-import xml.parsers
-
 __all__ = ['get_elements']
 
 
@@ -10,6 +7,10 @@ def get_elements(element=None, filename=None):
     """Get values for selected element from xml file specified in filename"""
     if filename is None or element is None:
         return []
+    # imported here so that importing this module stays cheap
+    import xml.dom.minidom
+    import xml.parsers.expat
+
     try:
         dom = xml.dom.minidom.parse(filename)
     except IOError:
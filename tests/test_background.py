@@ -0,0 +1,104 @@
+"""Unit tests to test the background module"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import time
+import threading
+import unittest
+import cStringIO
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import background
+from osg_configure.modules import exceptions
+
+
+def slow_task(value, output=None):
+    """Write a message and return value after a short wait"""
+    output.write("running %s\n" % value)
+    time.sleep(0.1)
+    return value
+
+
+def failing_task(output=None):
+    """Raise a ConfigureError"""
+    raise exceptions.ConfigureError('failed')
+
+
+class TestBackground(unittest.TestCase):
+    """Unit test class to test functions in the background module"""
+
+    def setUp(self):
+        background.reset()
+        self.stdout = sys.stdout
+        sys.stdout = cStringIO.StringIO()
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+        background.reset()
+
+    def test_join(self):
+        """
+        Check that tasks run concurrently and pass their output on when joined
+        """
+        start = time.time()
+        first = background.start('first', slow_task, (1,))
+        second = background.start('second', slow_task, (2,))
+        self.assertTrue(background.start('first', slow_task, (3,)) is first,
+                        "Task started twice")
+        self.assertEqual('', sys.stdout.getvalue(), "Output passed on before join")
+        self.assertEqual(2, second.join())
+        self.assertEqual(1, first.join())
+        self.assertTrue(time.time() - start < 0.19, "Tasks did not run concurrently")
+        self.assertEqual("running 2\nrunning 1\n", sys.stdout.getvalue(),
+                         "Wrong output: %r" % sys.stdout.getvalue())
+        self.assertEqual(1, background.get('first').join())
+        self.assertEqual("running 2\nrunning 1\n", sys.stdout.getvalue(),
+                         "Output passed on twice")
+
+    def test_check(self):
+        """
+        Check that the check runs once on the joining thread and that its
+        exception is raised on every join
+        """
+        checks = []
+
+        def check(result):
+            checks.append((result, threading.currentThread().getName()))
+            raise exceptions.ConfigureError('check failed')
+
+        task = background.start('checked', slow_task, ('a',), check=check)
+        self.assertRaises(exceptions.ConfigureError, task.join)
+        self.assertRaises(exceptions.ConfigureError, background.join_all)
+        self.assertEqual([('a', threading.currentThread().getName())], checks,
+                         "Check not run once on the joining thread: %s" % checks)
+
+    def test_join_all(self):
+        """
+        Check that all tasks are joined and the first failure is raised
+        """
+        background.start('fail', failing_task)
+        task = background.start('slow', slow_task, (1,))
+        self.assertRaises(exceptions.ConfigureError, background.join_all)
+        self.assertTrue(task.joined, "Task not joined after an earlier failure")
+
+    def test_wait_all(self):
+        """
+        Check that waiting for all tasks passes their output on and counts
+        failures instead of raising them
+        """
+        background.start('fail', failing_task)
+        task = background.start('slow', slow_task, (1,))
+        self.assertEqual(1, background.wait_all(), "Wrong number of failures")
+        self.assertTrue(task.done(), "Task still running after wait_all")
+        self.assertEqual("running 1\n", sys.stdout.getvalue(),
+                         "Output not passed on: %r" % sys.stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Unit tests to test the HTCondor config lookups"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import condorconfig
+
+FAKE_CONDOR_CONFIG_VAL = """#!/bin/sh
+echo run >> %(log)s
+status=0
+for arg in "$@"; do
+  case "$arg" in
+    -expand) ;;
+    SPOOL) echo /var/lib/condor/spool ;;
+    COLLECTOR_HOST) echo cm.example.org ;;
+    *) echo "Not defined: $arg" >&2; status=1 ;;
+  esac
+done
+exit $status
+"""
+
+
+class TestCondorConfig(unittest.TestCase):
+    """Unit test class to test the HTCondor config lookups"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.temp_dir, 'log')
+        self.executable = os.path.join(self.temp_dir, 'condor_config_val')
+        open(self.executable, 'w').write(FAKE_CONDOR_CONFIG_VAL % {'log': self.log})
+        os.chmod(self.executable, 0755)
+        condorconfig.reset()
+
+    def tearDown(self):
+        condorconfig.reset()
+        shutil.rmtree(self.temp_dir)
+
+    def runs(self):
+        """Return the number of times the fake tool ran"""
+        if not os.path.exists(self.log):
+            return 0
+        return len(open(self.log).readlines())
+
+    def test_get_values(self):
+        """
+        Check that variables are looked up with one run and remembered
+        """
+        values = condorconfig.get_values(['SPOOL', 'MISSING', 'COLLECTOR_HOST'],
+                                         executable=self.executable, quiet_undefined=True)
+        self.assertEqual({'SPOOL': '/var/lib/condor/spool', 'MISSING': None,
+                          'COLLECTOR_HOST': 'cm.example.org'}, values, "Wrong values: %s" % values)
+        self.assertEqual(1, self.runs(), "Variables not looked up with one run")
+        self.assertEqual('cm.example.org', condorconfig.get_value('COLLECTOR_HOST', self.executable))
+        self.assertEqual(None, condorconfig.get_value('MISSING', self.executable))
+        self.assertEqual(1, self.runs(), "Values not remembered")
+
+        condorconfig.file_written('/etc/condor/config.d/99-local.conf')
+        self.assertEqual('/var/lib/condor/spool', condorconfig.get_value('SPOOL', self.executable))
+        self.assertEqual(2, self.runs(), "Values kept after a config file was written")
+
+    def test_run_cached(self):
+        """
+        Check that query commands are only run once
+        """
+        first = condorconfig.run_cached([self.executable, 'SPOOL'])
+        second = condorconfig.run_cached([self.executable, 'SPOOL'])
+        self.assertEqual("/var/lib/condor/spool\n", first.stdout, "Wrong output")
+        self.assertTrue(first is second, "Command result not remembered")
+        self.assertEqual(1, self.runs(), "Command run more than once")
+
+    def test_evaluator(self):
+        """
+        Check values worked out from config files and the ones that have to
+        be left to condor
+        """
+        config_dir = os.path.join(self.temp_dir, 'config.d')
+        os.mkdir(config_dir)
+        config_file = os.path.join(self.temp_dir, 'condor_config')
+        open(config_file, 'w').write("LOCAL_DIR = /var\n"
+                                     "SPOOL = $(LOCAL_DIR)/lib/condor/spool\n"
+                                     "LOCAL_CONFIG_DIR = %s\n"
+                                     "HOSTS = a, \\\n"
+                                     "b\n"
+                                     "COLLECTOR_HOST = $(FULL_HOSTNAME)\n" % config_dir)
+        open(os.path.join(config_dir, '10-local.conf'), 'w').write("spool = $(SPOOL)/local\n"
+                                                                   "SCHEDD.HOSTS = c\n")
+        open(os.path.join(config_dir, '20-ignored.conf.rpmnew'), 'w').write("SPOOL = /tmp\n")
+        evaluator = condorconfig.ConfigEvaluator(config_file)
+        self.assertTrue(evaluator.usable, "Config not understood")
+        self.assertEqual('/var/lib/condor/spool/local', evaluator.evaluate('SPOOL'),
+                         "Wrong value for SPOOL")
+        self.assertEqual(None, evaluator.evaluate('COLLECTOR_HOST'),
+                         "Value depending on built-in default was evaluated")
+        self.assertEqual(None, evaluator.evaluate('HOSTS'),
+                         "Value with subsystem override was evaluated")
+        self.assertEqual(None, evaluator.evaluate('UNDEFINED'),
+                         "Undefined value was evaluated")
+
+        open(os.path.join(config_dir, '30-use.conf'), 'w').write("use ROLE : Submit\n")
+        self.assertFalse(condorconfig.ConfigEvaluator(config_file).usable,
+                         "Metaknobs should not be evaluated")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Unit tests to test the shared config file editor"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import configeditor
+from osg_configure.modules import utilities
+
+
+class TestConfigEditor(unittest.TestCase):
+    """Unit test class to test the shared config file editor"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, 'blah.config')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_set(self):
+        """
+        Check that settings are changed the way add_or_replace_setting does
+        """
+        contents = "# comment\ncondor_binpath=/usr/bin\n  pbs_binpath = /opt\nlast=1"
+        settings_file = configeditor.SettingsFile(self.filename, contents)
+        expected = contents
+        for variable, value, quote in [('pbs_binpath', '/usr/local/bin', True),
+                                       ('condor_binpath', '/opt/condor/bin', False),
+                                       ('new_setting', 'yes', True),
+                                       ('new_setting', 'no', True)]:
+            settings_file.set(variable, value, quote_value=quote)
+            expected = utilities.add_or_replace_setting(expected, variable, value, quote_value=quote)
+        self.assertEqual(expected, settings_file.contents(),
+                         "Got wrong contents:\n%s" % settings_file.contents())
+
+    def test_remove(self):
+        """
+        Check that every line setting a variable is removed
+        """
+        settings_file = configeditor.SettingsFile(self.filename,
+                                                  "GRIDMAP=/a\nOTHER=1\n GRIDMAP = /b\n")
+        settings_file.remove('GRIDMAP')
+        self.assertEqual("OTHER=1\n", settings_file.contents())
+        settings_file.set('GRIDMAP', '/c', quote_value=False)
+        self.assertEqual("OTHER=1\nGRIDMAP=/c\n", settings_file.contents())
+
+    def test_flush(self):
+        """
+        Check that edits from several callers are written once
+        """
+        open(self.filename, 'w').write("a=1\n")
+        editor = configeditor.ConfigEditor()
+        editor.edit(self.filename).set('a', '2', quote_value=False)
+        editor.edit(self.filename).set('b', '3', quote_value=False)
+        self.assertEqual("a=1\n", open(self.filename).read(), "File written before flush")
+        self.assertEqual(None, editor.edit(os.path.join(self.temp_dir, 'missing')),
+                         "Missing file without default opened")
+        missing = os.path.join(self.temp_dir, 'new.conf')
+        editor.edit(missing, default="# new\n").set('c', '4', quote_value=False)
+        utilities.reset_write_counts()
+        try:
+            self.assertEqual([], editor.flush())
+            self.assertEqual((2, 0), utilities.get_write_counts(), "Files not written once")
+        finally:
+            utilities.reset_write_counts()
+        self.assertEqual("a=2\nb=3\n", open(self.filename).read())
+        self.assertEqual("# new\nc=4\n", open(missing).read())
+
+
+if __name__ == '__main__':
+    unittest.main()
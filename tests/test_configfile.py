@@ -8,6 +8,8 @@ import sys
 import unittest
 import ConfigParser
 import imp
+import shutil
+import tempfile
 
 # setup system library path
 pathname = os.path.realpath('../')
@@ -15,6 +17,9 @@ sys.path.insert(0, pathname)
 
 from osg_configure.modules import exceptions
 from osg_configure.modules import configfile
+from osg_configure.modules import utilities
+from osg_configure.modules.baseconfiguration import BaseConfiguration
+from osg_configure.modules import inifile
 from osg_configure.modules.utilities import get_test_config
 
 pathname = os.path.join('../scripts', 'osg-configure')
@@ -166,6 +171,53 @@ class TestConfigFile(unittest.TestCase):
                          "Didn't get the correct location for missing_opt:" +
                          "got %s expected None" % (opt_location))
 
+    def test_get_option_line(self):
+        """
+        Test that get_option_line gives the file and line that set an option
+        """
+        config_directory = get_test_config('config-test1.d')
+        location = (get_test_config('config-test1.d/10-test.ini'), 2)
+        opt_location = configfile.get_option_line('second_opt',
+                                                  'Common',
+                                                  config_directory=config_directory)
+        self.assertEqual(location,
+                         opt_location,
+                         "Didn't get the correct location for second_opt:" +
+                         "got %s expected %s" % (opt_location, location))
+
+        location = (get_test_config('config-test3.d/00-test.ini'), 5)
+        opt_location = configfile.get_option_line('my_var',
+                                                  'Local Settings',
+                                                  config_directory=get_test_config('config-test3.d'))
+        self.assertEqual(location,
+                         opt_location,
+                         "Didn't get the correct location for my_var:" +
+                         "got %s expected %s" % (opt_location, location))
+
+        self.assertEqual(None,
+                         configfile.get_option_line('first_opt',
+                                                    'Missing',
+                                                    config_directory=config_directory),
+                         "Got a location for an option in a missing section")
+
+    def test_find_options(self):
+        """
+        Test that find_options returns values and locations for every
+        matching option and reports patterns without matches
+        """
+        config_directory = get_test_config('config-test1.d')
+        config = configfile.read_config_files(config_directory=config_directory)
+        (matches, unmatched) = configfile.find_options(config,
+                                                       ['Common.*_opt', 'FOO', 'Common.first_opt',
+                                                        'Missing.*'],
+                                                       config_directory=config_directory)
+        expected = [('Common', 'first_opt', 'foo', get_test_config('config-test1.d/00-test.ini'), 2),
+                    ('Common', 'second_opt', 'bar', get_test_config('config-test1.d/10-test.ini'), 2),
+                    ('Common', 'foo', '1', get_test_config('config-test1.d/A-test.ini'), 2)]
+        self.assertEqual(expected, matches,
+                         "Wrong matches: got %s expected %s" % (matches, expected))
+        self.assertEqual(['Missing.*'], unmatched, "Wrong unmatched patterns: %s" % unmatched)
+
     def test_get_file_list(self):
         """
         Test the list of files that the module things it's reading and the order
@@ -211,6 +263,101 @@ class TestConfigFile(unittest.TestCase):
         self.assertFalse(configfile.jobmanager_enabled(config),
                          "jobmanager_enabled returned true on a config without an enabled jobmanager")
 
+    def test_read_config_snapshot(self):
+        """
+        Test that a snapshot provides both the case-folded and case-preserving
+        views of the config files
+        """
+        config_directory = get_test_config('config-test3.d')
+        snapshot = configfile.read_config_snapshot(config_directory=config_directory)
+        self.assertEqual(snapshot.file_list,
+                         [get_test_config('config-test3.d/00-test.ini'),
+                          get_test_config('config-test3.d/10-test.ini')],
+                         "Snapshot has the wrong file list: %s" % snapshot.file_list)
+        self.assertEqual(snapshot.config.get('Common', 'first_opt'), 'bar',
+                         'Later files should override earlier ones')
+        self.assertTrue(snapshot.config.has_option('Local Settings', 'my_var'),
+                        'Options should be lower case in the case-folded view')
+        self.assertTrue(snapshot.case_sensitive_config.has_option('Local Settings', 'My_Var'),
+                        'Options should keep their case in the case-preserving view')
+        self.assertFalse(snapshot.case_sensitive_config.has_option('Local Settings', 'my_var'),
+                         'Options should keep their case in the case-preserving view')
+        module = BaseConfiguration(logger=utilities.NullLogger)
+        try:
+            module.check_config(snapshot.config)
+            module.check_config(snapshot.case_sensitive_config)
+        except TypeError, e:
+            self.fail("Modules rejected the snapshot configuration: %s" % e)
+
+        self.assertRaises(IOError, configfile.read_config_snapshot,
+                          config_directory=get_test_config('config-test3.d/00-test.ini'))
+
+    def test_read_config_snapshot_previous(self):
+        """
+        Test that files unchanged since a previous snapshot are not read again
+        """
+        temp_dir = tempfile.mkdtemp()
+        first_file = os.path.join(temp_dir, '00-test.ini')
+        second_file = os.path.join(temp_dir, '10-test.ini')
+        try:
+            open(first_file, 'w').write("[Common]\nfirst_opt = foo\n")
+            open(second_file, 'w').write("[Common]\nsecond_opt = bar\n")
+            snapshot = configfile.read_config_snapshot(config_directory=temp_dir)
+            # change the cached contents to tell whether the file was read again
+            snapshot.ini_files[first_file] = inifile.tokenize("[Common]\nfirst_opt = cached\n")
+            open(second_file, 'w').write("[Common]\nsecond_opt = changed value\n")
+            snapshot = configfile.read_config_snapshot(config_directory=temp_dir,
+                                                       previous=snapshot)
+            self.assertEqual('cached', snapshot.config.get('Common', 'first_opt'),
+                             'Unchanged file was read again')
+            self.assertEqual('changed value', snapshot.config.get('Common', 'second_opt'),
+                             'Changed file was not read again')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_resolved_config_parser(self):
+        """
+        Test that values are interpolated once, that changes are picked up
+        and that interpolation cycles are found up front
+        """
+        config = configfile.ResolvedConfigParser()
+        config.set('DEFAULT', 'home', '/opt')
+        config.add_section('Test')
+        config.set('Test', 'path', '%(home)s/bin')
+        config.set('Test', 'enabled', 'True')
+        config.set('Test', 'missing', '%(nothing)s')
+        self.assertEqual([], config.interpolation_cycles(), 'Found cycles without references')
+        self.assertEqual('/opt/bin', config.get('Test', 'path'), 'Value not interpolated')
+        self.assertEqual(True, config.getboolean('Test', 'Enabled'), 'Wrong boolean value')
+        self.assertRaises(ConfigParser.InterpolationMissingOptionError,
+                          config.get, 'Test', 'missing')
+        config.set('DEFAULT', 'home', '/usr')
+        self.assertEqual('/usr/bin', config.get('Test', 'path'), 'Change not picked up')
+        config.remove_option('Test', 'missing')
+        self.assertEqual([('home', '/usr'), ('path', '/usr/bin'), ('enabled', 'True')],
+                         config.items('Test'), 'Wrong items')
+
+        config.set('Test', 'first', '%(second)s')
+        config.set('Test', 'second', 'x%(first)s')
+        config.set('Test', 'third', '%(first)s')
+        cycles = config.interpolation_cycles()
+        self.assertEqual([['first', 'second', 'first']], [cycle.path for cycle in cycles],
+                         'Wrong cycles: %s' % [cycle.message for cycle in cycles])
+        self.assertRaises(ConfigParser.InterpolationDepthError, config.get, 'Test', 'third')
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            open(os.path.join(temp_dir, '00-test.ini'), 'w').write("[Test]\na = %(b)s\nb = %(a)s\n")
+            _stderr = sys.stderr
+            sys.stderr = open(os.devnull, 'w')
+            try:
+                self.assertRaises(SystemExit, configfile.read_config_snapshot,
+                                  config_directory=temp_dir)
+            finally:
+                sys.stderr = _stderr
+        finally:
+            shutil.rmtree(temp_dir)
+
     def test_ini_spaces(self):
         """
         Test to make sure ini files with spaces work correctly
@@ -0,0 +1,152 @@
+"""Unit tests to test the incremental module"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import incremental
+from osg_configure.modules import parallel
+
+
+class InputModule(object):
+    """Fake configuration module with inputs that can be changed"""
+
+    def __init__(self, name, consumes=(), produces=()):
+        self.name = name
+        self.values = {'enabled': True}
+        self._consumes = set(consumes)
+        self._produces = set(produces)
+
+    def module_name(self):
+        return self.name
+
+    def consumes(self):
+        return self._consumes
+
+    def produces(self):
+        return self._produces
+
+    def input_values(self):
+        return dict(self.values)
+
+    def relevant_rpms(self):
+        return set()
+
+
+def make_module_class(name):
+    """Make a subclass of InputModule with the given name for digest keys"""
+    return type(name, (InputModule,), {})
+
+
+class TestIncremental(unittest.TestCase):
+    """Unit test class to test functions in the incremental module"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_file = os.path.join(self.temp_dir, 'input')
+        open(self.input_file, 'w').write('input')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_module_digest(self):
+        """
+        Check that digests change when settings or files change
+        """
+        module = InputModule('test', consumes=[self.input_file])
+        digest = incremental.module_digest(module, {})
+        self.assertEqual(digest, incremental.module_digest(module, {}),
+                         "Digest changed without input changes")
+
+        module.values['option:foo'] = 'bar'
+        new_digest = incremental.module_digest(module, {})
+        self.assertNotEqual(digest, new_digest, "Digest did not change with settings")
+
+        os.utime(self.input_file, (0, 0))
+        self.assertNotEqual(new_digest, incremental.module_digest(module, {}),
+                            "Digest did not change with file modification time")
+
+        module = InputModule('test', consumes=[os.path.join(self.temp_dir, 'missing')])
+        self.assertTrue(incremental.module_digest(module, {}),
+                        "Missing files should not prevent computing a digest")
+
+    def test_attributes(self):
+        """
+        Check that digests change when the shared attributes change
+        """
+        module = InputModule('test')
+        digest = incremental.module_digest(module, {'OSG_HOSTNAME': 'a.example.com'})
+        self.assertNotEqual(digest, incremental.module_digest(module, {'OSG_HOSTNAME': 'b.example.com'}),
+                            "Digest did not change with attributes")
+
+    def test_inputs_before_configure(self):
+        """
+        Check that a digest using inputs taken before configure() changed
+        the module's settings matches the digest computed on the next run
+        """
+        module = InputModule('test', produces=[self.input_file])
+        inputs = incremental.input_digest(module, {})
+        # configure() changing a setting and rewriting its file
+        module.values['option:resource'] = 'site'
+        open(self.input_file, 'w').write('output')
+        os.utime(self.input_file, (0, 0))
+        saved = incremental.module_digest(module, {}, inputs)
+        del module.values['option:resource']
+        self.assertEqual(saved, incremental.module_digest(module, {}),
+                         "Saved digest does not match digest of unchanged inputs")
+
+    def test_read_write_digests(self):
+        """
+        Check that digests are saved and read back
+        """
+        filename = os.path.join(self.temp_dir, 'digests')
+        self.assertEqual({}, incremental.read_digests(filename),
+                         "Missing digest file should give no digests")
+        digests = {'MiscConfiguration': 'abc', 'RsvConfiguration': 'def'}
+        self.assertTrue(incremental.write_digests(digests, filename),
+                        "Writing digests failed")
+        self.assertEqual(digests, incremental.read_digests(filename),
+                         "Digests read back don't match digests written")
+
+    def test_select_modules(self):
+        """
+        Check that unchanged modules are skipped unless a module they depend
+        on is configured
+        """
+        producer = make_module_class('Producer')('producer', produces=[self.input_file])
+        consumer = make_module_class('Consumer')('consumer', consumes=[self.input_file])
+        other = make_module_class('Other')('other')
+        modules = [producer, consumer, other]
+        scheduler = parallel.ModuleScheduler(modules)
+        digests = dict((module.__class__.__name__, incremental.module_digest(module, {}))
+                       for module in modules)
+
+        self.assertEqual([], incremental.select_modules(scheduler, digests, {}),
+                         "Unchanged modules were selected")
+
+        other.values['option:foo'] = 'bar'
+        self.assertEqual([other], incremental.select_modules(scheduler, digests, {}),
+                         "Only the changed module should be selected")
+
+        other.values = {'enabled': True}
+        producer.values['option:foo'] = 'bar'
+        self.assertEqual([producer, consumer], incremental.select_modules(scheduler, digests, {}),
+                         "Modules depending on a changed module should be selected")
+
+        del digests['Other']
+        producer.values = {'enabled': True}
+        self.assertEqual([other], incremental.select_modules(scheduler, digests, {}),
+                         "Modules without a saved digest should be selected")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Unit tests to test the ini file tokenizer"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import inifile
+from osg_configure.modules.utilities import get_test_config
+
+
+class TestIniFile(unittest.TestCase):
+    """Unit test class to test the ini file tokenizer"""
+
+    def test_tokenize(self):
+        """
+        Check sections, options, values and line numbers
+        """
+        contents = ("# comment\n"
+                    "[DEFAULT]\n"
+                    "home = /opt\n"
+                    "\n"
+                    "[Test]\n"
+                    "; another comment\n"
+                    "Foo = bar ; inline comment\n"
+                    "empty = \"\"\n"
+                    "path: %(home)s/bin\n")
+        ini_file = inifile.tokenize(contents, 'test.ini')
+        self.assertTrue(ini_file.valid(), "Errors in valid file: %s" % ini_file.errors)
+        self.assertEqual(['DEFAULT', 'Test'], ini_file.sections, "Wrong sections")
+        self.assertEqual(5, ini_file.section_line('Test'), "Wrong section line")
+        options = [(option.section, option.name, option.value, option.line)
+                   for option in ini_file.options]
+        self.assertEqual([('DEFAULT', 'home', '/opt', 3),
+                          ('Test', 'Foo', 'bar', 7),
+                          ('Test', 'empty', '', 8),
+                          ('Test', 'path', '%(home)s/bin', 9)],
+                         options, "Wrong options: %s" % options)
+        self.assertEqual({'DEFAULT': {'home': 3}, 'Test': {'foo': 7, 'empty': 8, 'path': 9}},
+                         ini_file.index(), "Wrong index")
+        self.assertEqual((['home'], []), ini_file.options[3].references(),
+                         "Wrong references")
+
+    def test_errors(self):
+        """
+        Check that continuation lines, repeated sections and unparsable lines
+        are reported with their line numbers, repeated sections as warnings
+        """
+        ini_file = inifile.read_file(get_test_config('utilities/newline.ini'))
+        self.assertEqual([3, 4], [lineno for lineno, _ in ini_file.errors],
+                         "Continuation lines not reported: %s" % ini_file.errors)
+        self.assertEqual("fdfd\nfdfdf\ndfd", ini_file.options[0].value,
+                         "Continuation lines not joined")
+
+        ini_file = inifile.read_file(get_test_config('utilities/duplicate_sections.ini'))
+        self.assertTrue(ini_file.valid(), "Repeated section reported as error: %s" % ini_file.errors)
+        self.assertEqual([4], [lineno for lineno, _ in ini_file.warnings],
+                         "Repeated section not reported: %s" % ini_file.warnings)
+        self.assertEqual(['SE dCache'], ini_file.sections, "Repeated section not merged")
+        self.assertEqual({'SE dCache': {'name': 5}}, ini_file.index(),
+                         "Later option in repeated section not used")
+
+        ini_file = inifile.read_file(get_test_config('utilities/section_space.ini'))
+        self.assertEqual([2], [lineno for lineno, _ in ini_file.errors],
+                         "Option starting with a space not reported: %s" % ini_file.errors)
+
+        ini_file = inifile.tokenize("foo = bar\n[Test]\nnot an option\n")
+        self.assertEqual([1, 3], [lineno for lineno, _ in ini_file.errors],
+                         "Unparsable lines not reported: %s" % ini_file.errors)
+
+    def test_unresolved_references(self):
+        """
+        Check that references are resolved across files and sections
+        """
+        defaults = inifile.tokenize("[DEFAULT]\nhome = /opt\n", '00-defaults.ini')
+        settings = inifile.tokenize("[Test]\n"
+                                    "ok = %(home)s %(local)s 100%%\n"
+                                    "local = x\n"
+                                    "missing = %(nothing)s\n"
+                                    "broken = %(home)\n", '10-test.ini')
+        problems = inifile.unresolved_references([defaults, settings])
+        found = [(option.name, filename, reference)
+                 for option, filename, reference, _ in problems]
+        self.assertEqual([('missing', '10-test.ini', '%(nothing)s'),
+                          ('broken', '10-test.ini', '%(home)')],
+                         found, "Wrong problems: %s" % found)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Unit tests to test the installed package lookups"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import packages
+from osg_configure.modules import utilities
+
+
+class TestPackages(unittest.TestCase):
+    """Unit test class to test the installed package lookups"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.package_file = os.path.join(self.temp_dir, 'packages')
+        open(self.package_file, 'w').write("# installed packages\nfilesystem\nglibc\n\nosg-ce\n")
+        os.utime(self.package_file, (1000, 1000))
+        packages.set_package_file(self.package_file)
+
+    def tearDown(self):
+        packages.set_package_file(None)
+        shutil.rmtree(self.temp_dir)
+
+    def test_installed_packages(self):
+        """
+        Check that the package list is read once and again after it changes
+        """
+        self.assertEqual(frozenset(['filesystem', 'glibc', 'osg-ce']),
+                         packages.installed_packages(), "Wrong packages")
+        open(self.package_file, 'w').write("filesystem\n")
+        os.utime(self.package_file, (1000, 1000))
+        self.assertTrue('glibc' in packages.installed_packages(),
+                        "Package list read again without changing")
+        os.utime(self.package_file, (2000, 2000))
+        self.assertFalse('glibc' in packages.installed_packages(),
+                         "Package list not read again after changing")
+
+    def test_rpm_installed(self):
+        """
+        Check the utilities functions using the package list
+        """
+        self.assertTrue(utilities.rpm_installed('filesystem'), "filesystem not installed")
+        self.assertFalse(utilities.rpm_installed('foo'), "foo installed")
+        self.assertTrue(utilities.rpm_installed(['filesystem', 'glibc']),
+                        "filesystem and glibc not installed")
+        self.assertFalse(utilities.rpm_installed(['filesystem', 'foo']), "foo installed")
+        self.assertTrue(utilities.any_rpms_installed('__foo__', 'glibc'), "glibc not installed")
+        self.assertFalse(utilities.any_rpms_installed(['__foo__', '__bar__']),
+                         "__foo__ or __bar__ installed")
+        self.assertTrue(utilities.ce_installed(), "osg-ce not installed")
+        self.assertFalse(utilities.gateway_installed(), "Gateway installed")
+
+        os.unlink(self.package_file)
+        self.assertFalse(utilities.rpm_installed('filesystem'),
+                         "Missing package list should not list packages")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+"""Unit tests to test the parallel module"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import time
+import logging
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import parallel
+from osg_configure.modules import exceptions
+
+
+class ListHandler(logging.Handler):
+    """Handler that saves the messages it gets"""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class SleepyModule(object):
+    """Fake configuration module that logs before and after sleeping"""
+
+    def __init__(self, name, delay, logger):
+        self.name = name
+        self.delay = delay
+        self.logger = logger
+
+    def check_attributes(self, attributes):
+        self.logger.warning("%s started" % self.name)
+        time.sleep(self.delay)
+        self.logger.warning("%s completed" % self.name)
+        if self.name == 'fail':
+            raise ValueError('failed')
+        return self.name in attributes
+
+
+class ArtifactModule(object):
+    """Fake configuration module that declares the artifacts it uses"""
+
+    def __init__(self, name, logger, consumes=(), produces=(), started=None):
+        self.name = name
+        self.logger = logger
+        self._consumes = set(consumes)
+        self._produces = set(produces)
+        self.started = started
+
+    def module_name(self):
+        return self.name
+
+    def consumes(self):
+        return self._consumes
+
+    def produces(self):
+        return self._produces
+
+    def configure(self, attributes):
+        if self.started is not None:
+            self.started.append(self.name)
+        self.logger.warning("%s configured" % self.name)
+        time.sleep(0.05)
+        if self.name == 'fail':
+            raise exceptions.ConfigureError('failed')
+        return True
+
+
+class TestParallel(unittest.TestCase):
+    """Unit test class to test functions in the parallel module"""
+
+    def setUp(self):
+        self.logger = logging.Logger('test_parallel')
+        self.handler = ListHandler()
+        self.logger.addHandler(self.handler)
+
+    def test_results_in_order(self):
+        """
+        Check that results and log messages come back in module order
+        """
+        modules = [SleepyModule('slow', 0.2, self.logger),
+                   SleepyModule('fast', 0, self.logger)]
+        for jobs in (1, 2):
+            self.handler.messages = []
+            results = parallel.run_module_method(modules, 'check_attributes', (['fast'],), jobs)
+            self.assertEqual([False, True], results,
+                             "Got wrong results with %d jobs: %s" % (jobs, results))
+            self.assertEqual(['slow started', 'slow completed', 'fast started', 'fast completed'],
+                             self.handler.messages,
+                             "Got log messages out of order with %d jobs: %s" % (jobs, self.handler.messages))
+            for module in modules:
+                self.assertTrue(module.logger is self.logger, "Module logger was not restored")
+
+    def test_exception(self):
+        """
+        Check that exceptions are re-raised after flushing earlier log output
+        """
+        modules = [SleepyModule('ok', 0, self.logger),
+                   SleepyModule('fail', 0, self.logger),
+                   SleepyModule('after', 0, self.logger)]
+        self.assertRaises(ValueError, parallel.run_module_method, modules, 'check_attributes', ([],), 3)
+        self.assertEqual(['ok started', 'ok completed', 'fail started', 'fail completed'],
+                         self.handler.messages,
+                         "Got wrong log messages: %s" % self.handler.messages)
+
+    def test_scheduler_order(self):
+        """
+        Check that producers are ordered before consumers and that modules
+        producing the same artifact keep their relative order
+        """
+        modules = [ArtifactModule('reader', self.logger, consumes=['file1']),
+                   ArtifactModule('other', self.logger),
+                   ArtifactModule('writer1', self.logger, produces=['file1', 'file2']),
+                   ArtifactModule('writer2', self.logger, produces=['file2'])]
+        scheduler = parallel.ModuleScheduler(modules)
+        self.assertEqual(['other', 'writer1', 'reader', 'writer2'],
+                         [x.name for x in scheduler.ordered_modules()],
+                         "Got wrong module order: %s" %
+                         [x.name for x in scheduler.ordered_modules()])
+        self.assertEqual(set(), scheduler.dependencies[1],
+                         "Independent module should not have dependencies")
+        self.assertEqual(set([2]), scheduler.dependencies[0],
+                         "Consumer should depend on producer")
+        self.assertEqual(set([2]), scheduler.dependencies[3],
+                         "Second writer should depend on first writer")
+
+        for jobs in (1, 4):
+            started = []
+            self.handler.messages = []
+            for module in modules:
+                module.started = started
+            results = scheduler.run('configure', ({},), jobs)
+            self.assertEqual([True] * 4, results, "Got wrong results with %d jobs" % jobs)
+            self.assertTrue(started.index('writer1') < started.index('reader'),
+                            "Consumer started before producer with %d jobs: %s" % (jobs, started))
+            self.assertTrue(started.index('writer1') < started.index('writer2'),
+                            "Writers started out of order with %d jobs: %s" % (jobs, started))
+            self.assertEqual(['other configured', 'writer1 configured', 'reader configured', 'writer2 configured'],
+                             self.handler.messages,
+                             "Got log messages out of order with %d jobs: %s" % (jobs, self.handler.messages))
+
+    def test_scheduler_cycle(self):
+        """
+        Check that circular dependencies are reported
+        """
+        modules = [ArtifactModule('a', self.logger, consumes=['file1'], produces=['file2']),
+                   ArtifactModule('b', self.logger, consumes=['file2'], produces=['file3']),
+                   ArtifactModule('c', self.logger, consumes=['file3'], produces=['file1'])]
+        self.assertRaises(exceptions.ConfigurationError, parallel.ModuleScheduler, modules)
+
+    def test_scheduler_mutual_cycle(self):
+        """
+        Check that two modules each consuming what the other produces are
+        reported as a cycle
+        """
+        modules = [ArtifactModule('a', self.logger, consumes=['file2'], produces=['file1']),
+                   ArtifactModule('b', self.logger, consumes=['file1'], produces=['file2'])]
+        self.assertRaises(exceptions.ConfigurationError, parallel.ModuleScheduler, modules)
+
+    def test_scheduler_failure(self):
+        """
+        Check that no new modules are started after a module fails
+        """
+        started = []
+        modules = [ArtifactModule('fail', self.logger, produces=['file1'], started=started),
+                   ArtifactModule('reader', self.logger, consumes=['file1'], started=started)]
+        scheduler = parallel.ModuleScheduler(modules)
+        self.assertRaises(exceptions.ConfigureError, scheduler.run, 'configure', ({},), 2)
+        self.assertEqual(['fail'], started, "Dependent module started after failure: %s" % started)
+        self.assertEqual(['fail configured'], self.handler.messages,
+                         "Got wrong log messages: %s" % self.handler.messages)
+
+    def test_buffered_logger_after_flush(self):
+        """
+        Check that messages logged after a flush go straight to the target
+        """
+        buffered = parallel.BufferedLogger(self.logger)
+        buffered.warning("first")
+        self.assertEqual([], self.handler.messages, "Message not buffered")
+        buffered.flush()
+        buffered.warning("second")
+        self.assertEqual(['first', 'second'], self.handler.messages,
+                         "Got wrong log messages: %s" % self.handler.messages)
+
+
+if __name__ == '__main__':
+    unittest.main()
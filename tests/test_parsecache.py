@@ -0,0 +1,106 @@
+"""Unit tests to test the parse cache"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import configfile
+from osg_configure.modules import parsecache
+from osg_configure.modules import inifile
+
+
+class TestParseCache(unittest.TestCase):
+    """Unit test class to test the parse cache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = os.path.join(self.temp_dir, 'config.d')
+        self.cache_dir = os.path.join(self.temp_dir, 'cache')
+        os.mkdir(self.config_dir)
+
+    def tearDown(self):
+        parsecache.disable()
+        shutil.rmtree(self.temp_dir)
+
+    def test_snapshot(self):
+        """
+        Check that unchanged files are loaded from the cache and changed
+        files are parsed again
+        """
+        filename = os.path.join(self.config_dir, '10-test.ini')
+        open(filename, 'w').write("[Common]\nfirst_opt = foo\n")
+        cache = parsecache.enable(self.cache_dir)
+        self.assertNotEqual(None, cache, "Cache not enabled")
+        configfile.read_config_snapshot(config_directory=self.config_dir)
+        self.assertEqual((0, 1), (cache.hits, cache.misses), "New file found in cache")
+        snapshot = configfile.read_config_snapshot(config_directory=self.config_dir)
+        self.assertEqual((1, 1), (cache.hits, cache.misses), "Unchanged file not found in cache")
+        self.assertEqual('foo', snapshot.config.get('Common', 'first_opt'),
+                         'Wrong value from cache')
+        self.assertEqual((filename, 2), snapshot.option_index.locate('first_opt', 'Common'),
+                         'Wrong location from cache')
+
+        open(filename, 'w').write("[Common]\nfirst_opt = changed\n")
+        snapshot = configfile.read_config_snapshot(config_directory=self.config_dir)
+        self.assertEqual((1, 2), (cache.hits, cache.misses), "Changed file found in cache")
+        self.assertEqual('changed', snapshot.config.get('Common', 'first_opt'),
+                         'Changed file not parsed again')
+
+    def test_bad_entries(self):
+        """
+        Check that unreadable entries and unsafe directories are ignored
+        """
+        filename = os.path.join(self.config_dir, '10-test.ini')
+        open(filename, 'w').write("[Common]\nfirst_opt = foo\n")
+        file_stat = os.stat(filename)
+        cache = parsecache.ParseCache(self.cache_dir)
+        cache.store(filename, file_stat, "contents", inifile.tokenize("contents"))
+        for name in os.listdir(self.cache_dir):
+            open(os.path.join(self.cache_dir, name), 'w').write("garbage")
+        self.assertEqual(None, cache.load(filename, file_stat), "Corrupt entry was used")
+
+        os.chmod(self.cache_dir, 0777)
+        self.assertFalse(parsecache.ParseCache(self.cache_dir).usable,
+                         "World writable cache directory was used")
+
+    def test_eviction(self):
+        """
+        Check that the least recently used entries are removed once the
+        cache is full
+        """
+        cache = parsecache.ParseCache(self.cache_dir)
+        stats = {}
+        for used, name in enumerate(['a', 'b', 'c']):
+            filename = os.path.join(self.config_dir, name + '.ini')
+            open(filename, 'w').write("[%s]\n" % name)
+            stats[name] = os.stat(filename)
+            cache.store(filename, stats[name], "[%s]\n" % name, inifile.tokenize("[%s]\n" % name))
+            # entries last used in order a, b, c
+            entry = cache._entry_path(filename, stats[name])
+            os.utime(entry, (used, used))
+        entry_size = os.path.getsize(entry)
+
+        # using a makes b the least recently used entry
+        self.assertNotEqual(None, cache.load(os.path.join(self.config_dir, 'a.ini'), stats['a']),
+                            "Entry not found")
+        cache.max_size = entry_size * 2
+        cache._evict()
+        self.assertEqual(None, cache.load(os.path.join(self.config_dir, 'b.ini'), stats['b']),
+                         "Least recently used entry kept")
+        self.assertNotEqual(None, cache.load(os.path.join(self.config_dir, 'a.ini'), stats['a']),
+                            "Recently used entry removed")
+        self.assertNotEqual(None, cache.load(os.path.join(self.config_dir, 'c.ini'), stats['c']),
+                            "Recently used entry removed")
+
+
+if __name__ == '__main__':
+    unittest.main()
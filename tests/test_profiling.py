@@ -0,0 +1,95 @@
+"""Unit tests to test the profiling module"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import profiling
+from osg_configure.modules import utilities
+
+
+class TimedModule(object):
+    """Fake configuration module that writes a file while configuring"""
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def configure(self, attributes):
+        utilities.run_script(['true'])
+        return utilities.atomic_write(self.filename, 'contents')
+
+
+class TestProfiling(unittest.TestCase):
+    """Unit test class to test the profiling module"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        profiling.disable()
+        shutil.rmtree(self.temp_dir)
+
+    def test_disabled(self):
+        """
+        Check that nothing is recorded unless profiling is enabled
+        """
+        self.assertEqual(None, profiling.get_profile(), "Profiling enabled by default")
+        with profiling.timed('phase', 'configure', 'Test') as event:
+            event['result'] = 'ok'
+        self.assertEqual(None, profiling.get_profile(), "Timing enabled profiling")
+
+    def test_nesting(self):
+        """
+        Check that commands and writes are recorded under the module phase
+        they happen in
+        """
+        profile = profiling.enable()
+        filename = os.path.join(self.temp_dir, 'output')
+        module = TimedModule(filename)
+        self.assertTrue(profiling.call_method(module, 'configure', ({},)),
+                        "Method result not returned")
+
+        kinds = [(event['kind'], event['name']) for event in profile.events]
+        self.assertEqual([('phase', 'configure'), ('command', 'true'), ('write', filename)], kinds,
+                         "Wrong events recorded: %s" % kinds)
+        phase = profile.events[0]
+        for event in profile.events[1:]:
+            self.assertEqual(phase['id'], event['parent'], "Wrong parent for %s" % event['name'])
+            self.assertEqual('TimedModule', event['module'], "Wrong module for %s" % event['name'])
+            self.assertTrue(event['wall'] <= phase['wall'], "Nested event took longer than phase")
+        self.assertEqual(0, profile.events[1]['returncode'], "Command exit code not recorded")
+        self.assertEqual('performed', profile.events[2]['result'], "Write result not recorded")
+
+        profiling.call_method(module, 'configure', ({},))
+        self.assertEqual('skipped', profile.events[-1]['result'], "Unchanged write not recorded")
+        self.assertEqual(['configure'], profile.summary()['TimedModule'].keys(),
+                         "Wrong phases in summary")
+
+    def test_write(self):
+        """
+        Check that the profile is written as JSON
+        """
+        profile = profiling.enable()
+        with profiling.timed('phase', 'check_attributes', 'Test'):
+            pass
+        filename = os.path.join(self.temp_dir, 'profile.json')
+        profile.write(filename)
+        data = json.load(open(filename))
+        for key in ('wall', 'cpu', 'child_cpu', 'modules', 'events'):
+            self.assertTrue(key in data, "%s missing from profile" % key)
+        self.assertTrue('check_attributes' in data['modules']['Test'],
+                        "Phase missing from module summary")
+
+
+if __name__ == '__main__':
+    unittest.main()
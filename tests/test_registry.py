@@ -0,0 +1,79 @@
+"""Unit tests to test the module registry"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import registry
+from osg_configure.modules import utilities
+
+
+class TestRegistry(unittest.TestCase):
+    """Unit test class to test the module registry"""
+
+    def test_entries_match_modules(self):
+        """
+        Check that the registry entries agree with the module classes
+        """
+        for entry in registry.MODULES:
+            module = entry.create(utilities.NullLogger)
+            self.assertEqual(entry.name, module.module_name(),
+                             "Wrong name for %s" % entry.class_path)
+            self.assertEqual(entry.separately_configurable, module.separately_configurable(),
+                             "Wrong separately_configurable for %s" % entry.class_path)
+            self.assertEqual(entry.config_section, module.config_section or None,
+                             "Wrong config section for %s" % entry.class_path)
+
+    def test_all_modules_registered(self):
+        """
+        Check that every file in configure_modules has a registry entry
+        """
+        module_dir = os.path.join(pathname, 'osg_configure', 'configure_modules')
+        registered = set([entry.class_path.split('.')[-2] for entry in registry.MODULES])
+        for filename in os.listdir(module_dir):
+            if filename.endswith('.py') and filename != '__init__.py':
+                self.assertTrue(filename[:-3] in registered,
+                                "%s is not in the module registry" % filename)
+
+    def test_find_module(self):
+        """
+        Check that modules are found case insensitively
+        """
+        self.assertEqual('Misc', registry.find_module('misc').name,
+                         "Didn't find misc module")
+        self.assertEqual(None, registry.find_module('nonexistent'),
+                         "Found a nonexistent module")
+
+    def test_missing_module(self):
+        """
+        Check that modules whose package isn't installed are skipped
+        """
+        module_dir = tempfile.mkdtemp()
+        try:
+            for entry in registry.MODULES:
+                module_file = entry.class_path.split('.')[-2] + '.py'
+                if module_file != 'lsf.py':
+                    shutil.copy(os.path.join(registry.MODULE_DIRECTORY, module_file), module_dir)
+            names = [entry.name for entry in registry.installed_modules(module_dir)]
+            self.assertFalse('LSF' in names, "Missing module listed as installed")
+            self.assertEqual(len(registry.MODULES) - 1, len(names),
+                             "Installed modules skipped: %s" % names)
+            self.assertEqual(None, registry.find_module('lsf', module_dir),
+                             "Found a module that isn't installed")
+            self.assertEqual('Misc', registry.find_module('misc', module_dir).name,
+                             "Didn't find installed misc module")
+        finally:
+            shutil.rmtree(module_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Unit tests to test the service reload queue"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import ConfigParser
+import logging
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.configure_modules import condor
+from osg_configure.modules import reloadqueue
+from osg_configure.modules import utilities
+from osg_configure.modules.utilities import get_test_config
+
+global_logger = logging.getLogger(__name__)
+global_logger.addHandler(logging.NullHandler())
+
+
+class RecordingLogger(object):
+    """Logger keeping the warnings logged"""
+
+    def __init__(self):
+        self.warnings = []
+
+    def debug(self, mesg):
+        pass
+
+    def info(self, mesg):
+        pass
+
+    def warning(self, mesg):
+        self.warnings.append(mesg)
+
+
+class TestReloadQueue(unittest.TestCase):
+    """Unit test class to test the service reload queue"""
+
+    def test_due(self):
+        """
+        Check that only services with a changed file are reloaded
+        """
+        queue = reloadqueue.ReloadQueue()
+        queue.request('condor-cron', 'condor_cron_reconfig', ['/etc/condor-cron/'])
+        queue.request('condor-ce', 'condor_ce_reconfig', ['/var/lib/osg/osg-job-environment.conf'])
+        queue.request('condor-cron', 'condor_cron_reconfig', ['/etc/sysconfig/condor-cron'])
+        self.assertEqual([], queue.due(frozenset()), "Services reloaded on a no-op run")
+        self.assertEqual(['condor-cron'], queue.due(frozenset(['/etc/condor-cron/config.d/condor_ids'])))
+        self.assertEqual(['condor-cron'], queue.due(frozenset(['/etc/sysconfig/condor-cron'])))
+        self.assertEqual([], queue.due(frozenset(['/etc/condor-ce/config.d/50-osg-configure.conf'])),
+                         "Directory matched a file in another directory")
+        self.assertEqual(['condor-cron', 'condor-ce'],
+                         queue.due(frozenset(['/etc/sysconfig/condor-cron',
+                                              '/var/lib/osg/osg-job-environment.conf'])))
+
+    def test_written_files(self):
+        """
+        Check that atomic_write only records files it changed
+        """
+        temp_dir = tempfile.mkdtemp()
+        try:
+            utilities.reset_write_counts()
+            filename = os.path.join(temp_dir, 'test.conf')
+            utilities.atomic_write(filename, 'a = 1\n')
+            self.assertEqual(frozenset([filename]), utilities.get_written_files())
+            utilities.reset_write_counts()
+            utilities.atomic_write(filename, 'a = 1\n')
+            self.assertEqual(frozenset(), utilities.get_written_files(),
+                             "Unchanged file recorded as written")
+
+            queue = reloadqueue.ReloadQueue()
+            queue.request('test', 'false', [temp_dir + '/'])
+            logger = RecordingLogger()
+            queue.run(logger)
+            self.assertEqual([], logger.warnings, "Reload attempted without changes")
+            self.assertEqual([], queue.due(frozenset([filename])), "Queue not emptied by run")
+        finally:
+            utilities.reset_write_counts()
+            shutil.rmtree(temp_dir)
+
+    def test_no_condor_reconfig(self):
+        """
+        Check that configuring Condor doesn't reconfigure the batch system
+        when CE side files it doesn't read change
+        """
+        config_file = get_test_config("condor/condor1.ini")
+        configuration = ConfigParser.SafeConfigParser()
+        configuration.read(config_file)
+        configuration.add_section('Gateway')
+        configuration.set('Gateway', 'htcondor_gateway_enabled', 'False')
+        configuration.set('Gateway', 'gram_gateway_enabled', 'False')
+
+        settings = condor.CondorConfiguration(logger=global_logger)
+        settings.parse_configuration(configuration)
+
+        temp_dir = tempfile.mkdtemp()
+        reconfigured = []
+        old_reconfig_service = utilities.reconfig_service
+        try:
+            reloadqueue.reset()
+            utilities.reset_write_counts()
+            self.assertTrue(settings.configure({}), "Condor configuration failed")
+            utilities.set_root(temp_dir)
+            for filename in (condor.CondorConfiguration.CONDOR_CONFIG_FILE,
+                             condor.CondorConfiguration.GRAM_CONFIG_FILE,
+                             condor.CondorConfiguration.BLAH_CONFIG,
+                             '/var/lib/osg/osg-job-environment.conf',
+                             '/var/lib/osg/osg-local-job-environment.conf'):
+                self.assertTrue(utilities.atomic_write(filename, "changed = 1\n"),
+                                "Writing %s failed" % filename)
+            utilities.set_root(None)
+
+            def record_reconfig(service, reconfig_cmd, log=None):
+                reconfigured.append((service, reconfig_cmd))
+                return True
+
+            utilities.reconfig_service = record_reconfig
+            reloadqueue.run()
+            self.assertEqual([], reconfigured,
+                             "Services reconfigured for CE side files: %s" % reconfigured)
+        finally:
+            utilities.reconfig_service = old_reconfig_service
+            utilities.set_root(None)
+            utilities.reset_write_counts()
+            reloadqueue.reset()
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""Unit tests to test the host name resolver"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import time
+import socket
+import threading
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import resolver
+from osg_configure.modules import validation
+from osg_configure.modules import utilities
+
+
+class StubLookup(object):
+    """Lookup function answering from a dict, sleeping for hosts in slow"""
+
+    def __init__(self, addresses, slow=()):
+        self.addresses = addresses
+        self.slow = slow
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, host):
+        self.lock.acquire()
+        try:
+            self.calls.append(host)
+        finally:
+            self.lock.release()
+        if host in self.slow:
+            time.sleep(1)
+        if host not in self.addresses:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return self.addresses[host]
+
+
+class TestResolver(unittest.TestCase):
+    """Unit test class to test the host name resolver"""
+
+    def tearDown(self):
+        resolver.reset()
+
+    def test_cache(self):
+        """
+        Check that successful and failed lookups are only done once
+        """
+        lookup = StubLookup({'ce.example.org': '192.0.2.1'})
+        host_resolver = resolver.Resolver(lookup=lookup)
+        host_resolver.prefetch(['ce.example.org', 'missing.example.org', ''])
+        self.assertEqual('192.0.2.1', host_resolver.address('ce.example.org'))
+        self.assertFalse(host_resolver.resolves('missing.example.org'))
+        self.assertTrue(host_resolver.resolves('ce.example.org'))
+        self.assertFalse(host_resolver.resolves('missing.example.org'))
+        self.assertEqual(['ce.example.org', 'missing.example.org'], sorted(lookup.calls),
+                         "Lookups repeated: %s" % lookup.calls)
+
+    def test_deadline(self):
+        """
+        Check that lookups run concurrently and that slow lookups fail
+        without holding up the others
+        """
+        lookup = StubLookup({'a.example.org': '192.0.2.1',
+                             'b.example.org': '192.0.2.2',
+                             'slow.example.org': '192.0.2.3'},
+                            slow=['slow.example.org'])
+        host_resolver = resolver.Resolver(lookup=lookup, timeout=0.2, threads=1)
+        start = time.time()
+        host_resolver.prefetch(['slow.example.org', 'a.example.org', 'b.example.org'])
+        self.assertFalse(host_resolver.resolves('slow.example.org'), "Slow lookup did not time out")
+        self.assertTrue(host_resolver.resolves('a.example.org'))
+        self.assertTrue(host_resolver.resolves('b.example.org'))
+        self.assertTrue(time.time() - start < 0.8, "Slow lookup held up the others")
+        self.assertEqual(1, host_resolver.timeouts)
+
+    def test_stub(self):
+        """
+        Check that valid_domain and get_hostname use the resolver set
+        """
+        fqdn_calls = []
+
+        def fqdn(name):
+            fqdn_calls.append(name)
+            return 'node.example.org'
+
+        resolver.set_resolver(resolver.Resolver(lookup=StubLookup({'ce.example.org': '192.0.2.1'}),
+                                                fqdn=fqdn))
+        self.assertTrue(validation.valid_domain('ce.example.org', resolve=True))
+        self.assertFalse(validation.valid_domain('invalid.invalid', resolve=True))
+        self.assertEqual('node.example.org', utilities.get_hostname())
+        self.assertEqual('node.example.org', utilities.get_hostname())
+        self.assertEqual(1, len(fqdn_calls), "Host name looked up more than once")
+
+
+if __name__ == '__main__':
+    unittest.main()
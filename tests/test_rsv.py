@@ -5,6 +5,8 @@
 
 import os
 import sys
+import shutil
+import tempfile
 import unittest
 import ConfigParser
 import logging
@@ -397,6 +399,30 @@ class TestRSV(unittest.TestCase):
                         "Correct configuration incorrectly flagged as incorrect")
 
 
+    def testRenderNagios(self):
+        """
+        Test that the nagios consumer is configured when rendering into a
+        staging root that has no copy of rsv-nagios.conf
+        """
+        settings = rsv.RsvConfiguration(logger=global_logger)
+        settings.options['enable_nagios'].value = True
+        settings.options['nagios_send_nsca'].value = False
+        temp_dir = tempfile.mkdtemp()
+        try:
+            utilities.set_root(temp_dir)
+            try:
+                settings._configure_nagios_files()
+            except OSError, e:
+                self.fail("Received exception while rendering nagios consumer: %s" % e)
+            nagios_conf_file = utilities.root_path('/etc/rsv/consumers/nagios-consumer.conf')
+            self.assertTrue(os.path.exists(nagios_conf_file),
+                            "nagios consumer configuration not rendered")
+            self.assertTrue("--conf-file /etc/rsv/rsv-nagios.conf" in open(nagios_conf_file).read(),
+                            "nagios consumer not pointed at the password file")
+        finally:
+            utilities.set_root(None)
+            shutil.rmtree(temp_dir)
+
     def testServiceList(self):
         """
         Test to make sure right services get returned
@@ -0,0 +1,82 @@
+"""Unit tests to test the command runner"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import time
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import runner
+
+
+class TestRunner(unittest.TestCase):
+    """Unit test class to test the command runner"""
+
+    def setUp(self):
+        runner.reset_counters()
+
+    def test_run(self):
+        """
+        Check that exit codes and output are captured
+        """
+        result = runner.run(['sh', '-c', 'echo out; echo err >&2; exit 3'])
+        self.assertEqual(3, result.returncode, "Wrong exit code")
+        self.assertEqual("out\n", result.stdout, "Wrong stdout")
+        self.assertEqual("err\n", result.stderr, "Wrong stderr")
+        self.assertFalse(result.succeeded(), "Failed command reported as succeeded")
+        self.assertFalse(result.timed_out, "Command reported as timed out")
+
+        result = runner.run('echo out; echo err >&2', shell=True, merge_stderr=True)
+        self.assertTrue(result.succeeded(), "Command reported as failed")
+        self.assertEqual("out\nerr\n", result.stdout, "Output not merged")
+
+        self.assertRaises(OSError, runner.run, ['/nonexistent/command'])
+
+    def test_timeout(self):
+        """
+        Check that commands are stopped along with their children when they
+        time out
+        """
+        start = time.time()
+        result = runner.run(['sh', '-c', 'sleep 30 | cat'], timeout=1)
+        self.assertTrue(time.time() - start < 10, "Command was not stopped")
+        self.assertTrue(result.timed_out, "Timeout not reported")
+        self.assertFalse(result.succeeded(), "Timed out command reported as succeeded")
+
+    def test_counters(self):
+        """
+        Check that calls, failures and timeouts are counted per command
+        """
+        runner.run(['true'])
+        runner.run(['true'])
+        runner.run(['false'])
+        runner.run(['sleep', '10'], timeout=0.5)
+        counters = runner.get_counters()
+        self.assertEqual(2, counters['true']['calls'], "Wrong number of calls")
+        self.assertEqual(0, counters['true']['failures'], "Wrong number of failures")
+        self.assertEqual(1, counters['false']['failures'], "Failure not counted")
+        self.assertEqual(1, counters['sleep']['timeouts'], "Timeout not counted")
+
+    def test_dry_run(self):
+        """
+        Check that only read only commands run in dry run mode
+        """
+        runner.set_dry_run(True)
+        try:
+            result = runner.run(['false'])
+            self.assertTrue(result.succeeded(), "Skipped command should report success")
+            result = runner.run(['echo', 'query'], read_only=True)
+            self.assertEqual("query\n", result.stdout, "Read only command was not run")
+        finally:
+            runner.set_dry_run(False)
+        self.assertFalse(runner.run(['false']).succeeded(), "Command skipped after dry run ended")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Unit tests to test the request server"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+import logging
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import server
+
+
+def echo_command(argument):
+    """Write the argument to stdout"""
+    sys.stdout.write("echo %s\n" % argument)
+
+
+def failing_command(argument):
+    """Log a warning and exit with an error"""
+    logging.getLogger('test_server').warning("bad argument")
+    sys.exit(2)
+
+
+def broken_command(argument):
+    """Raise an unexpected exception"""
+    raise ValueError("broken")
+
+
+class TestServer(unittest.TestCase):
+    """Unit test class to test the request server"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.temp_dir, 'socket')
+        commands = {'echo': echo_command,
+                    'fail': failing_command,
+                    'broken': broken_command}
+        self.server = server.ConfigServer(self.socket_path, commands, logging.getLogger('test_server'))
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.temp_dir)
+
+    def test_requests(self):
+        """
+        Check that commands get their argument and that output and exit
+        codes are sent back
+        """
+        self.assertEqual((0, "echo foo bar\n"),
+                         server.send_request('echo', 'foo bar', socket_path=self.socket_path),
+                         "Wrong reply for echo")
+        self.assertEqual((0, "echo None\n"),
+                         server.send_request('echo', socket_path=self.socket_path),
+                         "Wrong reply for echo without an argument")
+        (status, output) = server.send_request('fail', socket_path=self.socket_path)
+        self.assertEqual(2, status, "Wrong exit code for failing command")
+        self.assertTrue('bad argument' in output, "Logged warning not sent back")
+        (status, output) = server.send_request('broken', socket_path=self.socket_path)
+        self.assertEqual(1, status, "Wrong exit code for broken command")
+        self.assertTrue('broken' in output, "Exception not sent back")
+        (status, output) = server.send_request('missing', socket_path=self.socket_path)
+        self.assertEqual(1, status, "Wrong exit code for unknown command")
+        self.assertTrue('echo' in output, "Valid commands not listed")
+
+    def test_socket_permissions(self):
+        """
+        Check that only the owner can use the socket
+        """
+        self.assertEqual(0600, os.stat(self.socket_path).st_mode & 0777,
+                         "Wrong socket permissions")
+
+    def test_config_signature(self):
+        """
+        Check that the signature changes when config files change
+        """
+        config_dir = os.path.join(self.temp_dir, 'config.d')
+        os.mkdir(config_dir)
+        config_file = os.path.join(config_dir, '10-test.ini')
+        open(config_file, 'w').write('[Test]\n')
+        signature = server.config_signature(config_dir)
+        self.assertEqual(signature, server.config_signature(config_dir),
+                         "Signature changed without changes")
+        os.utime(config_file, (0, 0))
+        new_signature = server.config_signature(config_dir)
+        self.assertNotEqual(signature, new_signature,
+                            "Signature did not change with modification time")
+        open(os.path.join(config_dir, '20-new.ini'), 'w').write('')
+        self.assertNotEqual(new_signature, server.config_signature(config_dir),
+                            "Signature did not change with new file")
+
+
+if __name__ == '__main__':
+    unittest.main()
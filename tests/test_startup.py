@@ -0,0 +1,86 @@
+"""Unit tests to check the startup cost of read-only modes"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import time
+import subprocess
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+script_path = os.path.join('../scripts', 'osg-configure')
+script_path = os.path.abspath(script_path)
+
+if not os.path.exists(script_path):
+    script_path = os.path.join('/', 'usr', 'sbin', 'osg-configure')
+    if not os.path.exists(script_path):
+        raise Exception("Can't find osg-configure script")
+
+# Maximum number of seconds listing modules may take, including starting
+# the interpreter
+LIST_TIME_BUDGET = 2.0
+
+# Loads the script and lists the modules the same way -l does, then prints
+# the heavy modules that ended up being imported
+LIST_MODULES_CODE = """
+import imp
+import logging
+import sys
+configure_osg = imp.load_module('test_module', open(%(script)r), %(script)r, ('', '', 1))
+try:
+    configure_osg.list_modules(logging.getLogger('test_startup'))
+except SystemExit:
+    pass
+heavy = [name for name in sys.modules
+         if sys.modules[name] is not None and
+         (name in ('rpm', 'classad', 'xml.dom.minidom') or
+          name.startswith('osg_configure.configure_modules.'))]
+sys.stderr.write(' '.join(sorted(heavy)))
+"""
+
+
+class TestStartup(unittest.TestCase):
+    """Unit test class to check the startup cost of read-only modes"""
+
+    def run_list_modules(self):
+        """
+        Run the module listing in a new interpreter and return a tuple with
+        the elapsed time and the heavy modules imported
+        """
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([pathname] + [x for x in [env.get('PYTHONPATH')] if x])
+        start = time.time()
+        process = subprocess.Popen([sys.executable, '-c', LIST_MODULES_CODE % {'script': script_path}],
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   env=env)
+        (output, error) = process.communicate()
+        elapsed = time.time() - start
+        self.assertEqual(0, process.returncode, "Listing modules failed: %s" % error)
+        self.assertTrue('Modules listed successfully' in output,
+                        "Unexpected output from listing modules: %s" % output)
+        return elapsed, error.split()
+
+    def test_list_imports(self):
+        """
+        Check that listing modules doesn't import heavy modules
+        """
+        heavy = self.run_list_modules()[1]
+        self.assertEqual([], heavy, "Listing modules imported %s" % ", ".join(heavy))
+
+    def test_list_time(self):
+        """
+        Check that listing modules stays within the startup time budget
+        """
+        elapsed = self.run_list_modules()[0]
+        self.assertTrue(elapsed < LIST_TIME_BUDGET,
+                        "Listing modules took %.2fs, budget is %.2fs" % (elapsed, LIST_TIME_BUDGET))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Unit tests to test the user-vo-map loader"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import uservomap
+from osg_configure.modules.utilities import get_test_config
+
+
+class TestUserVoMap(unittest.TestCase):
+    """Unit test class to test the user-vo-map loader"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        uservomap.reset()
+
+    def tearDown(self):
+        uservomap.reset()
+        shutil.rmtree(self.temp_dir)
+
+    def test_indexes(self):
+        """
+        Check the account and VO indexes
+        """
+        map_file = os.path.join(self.temp_dir, 'user-vo-map')
+        open(map_file, 'w').write("# comment\n"
+                                  "cms01 uscms\n"
+                                  "cms02 uscms\n"
+                                  "osg osg\n"
+                                  "osg osgedu\n")
+        vo_map = uservomap.load(map_file)
+        self.assertTrue(vo_map.valid(), "Valid file flagged as invalid")
+        self.assertEqual(vo_map.vo_names, ['cms', 'osg', 'osgedu'],
+                         "Wrong VO names: %s" % vo_map.vo_names)
+        self.assertEqual(vo_map.accounts_for_vo('uscms'), ['cms01', 'cms02'])
+        self.assertEqual(vo_map.vos_for_account('osg'), ['osg', 'osgedu'])
+        self.assertEqual(vo_map.vos_for_account('missing'), [])
+
+    def test_invalid_lines(self):
+        """
+        Check that invalid lines are reported in file order
+        """
+        vo_map = uservomap.load(get_test_config('test_files/invalid-user-vo-map.txt'))
+        self.assertFalse(vo_map.valid(), "Invalid file flagged as valid")
+        self.assertEqual(vo_map.invalid_lines, ['fdjkf394f023', 'sam= 34f3'])
+        self.assertEqual(vo_map.accounts_for_vo('dzero'), ['sam'])
+
+    def test_reload(self):
+        """
+        Check that a file is only read again after it changes
+        """
+        map_file = os.path.join(self.temp_dir, 'user-vo-map')
+        open(map_file, 'w').write("osg osg\n")
+        vo_map = uservomap.load(map_file)
+        self.assertTrue(uservomap.load(map_file) is vo_map, "Unchanged file read again")
+
+        open(map_file, 'w').write("osg osg\nligo LIGO\n")
+        os.utime(map_file, (0, 0))
+        vo_map = uservomap.load(map_file)
+        self.assertEqual(vo_map.vo_names, ['osg', 'LIGO'], "Changed file not read again")
+
+        os.unlink(map_file)
+        self.assertRaises(IOError, uservomap.load, map_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,9 @@ import os
 import sys
 import unittest
 import imp
+import shutil
+import stat
+import tempfile
 
 # setup system library path
 pathname = os.path.realpath('../')
@@ -57,6 +60,157 @@ class TestUtilities(unittest.TestCase):
             if os.path.exists(attribute_file):
                 os.unlink(attribute_file)
 
+    def test_atomic_write_unchanged(self):
+        """
+        Check that atomic_write leaves files with unchanged contents alone
+        """
+        temp_dir = tempfile.mkdtemp()
+        filename = os.path.join(temp_dir, 'test_file')
+        try:
+            utilities.reset_write_counts()
+            self.assertTrue(utilities.atomic_write(filename, "contents\n"),
+                            "Writing new file failed")
+            os.utime(filename, (0, 0))
+            self.assertTrue(utilities.atomic_write(filename, "contents\n", mode=0600),
+                            "Writing unchanged file failed")
+            self.assertEqual(0, os.stat(filename).st_mtime,
+                             "Unchanged file was rewritten")
+            self.assertEqual(0600, stat.S_IMODE(os.stat(filename).st_mode),
+                             "Permissions of unchanged file were not updated")
+            self.assertEqual((1, 1), utilities.get_write_counts(),
+                             "Wrong write counts: %s" % (utilities.get_write_counts(),))
+
+            self.assertTrue(utilities.atomic_write(filename, "new contents\n"),
+                            "Writing changed file failed")
+            self.assertEqual("new contents\n", open(filename).read(),
+                             "Changed file was not written")
+            self.assertNotEqual(0, os.stat(filename).st_mtime,
+                                "Changed file kept old modification time")
+            self.assertEqual((2, 1), utilities.get_write_counts(),
+                             "Wrong write counts: %s" % (utilities.get_write_counts(),))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_staging_root(self):
+        """
+        Check that files are written under the staging root and that reads
+        fall back to the system file until there is a staged copy
+        """
+        temp_dir = tempfile.mkdtemp()
+        system_file = os.path.join(temp_dir, 'system', 'test_file')
+        root = os.path.join(temp_dir, 'root')
+        os.mkdir(os.path.dirname(system_file))
+        open(system_file, 'w').write("system\n")
+        try:
+            utilities.set_root(root)
+            staged_file = utilities.root_path(system_file)
+            self.assertEqual(os.path.join(root, system_file.lstrip('/')), staged_file,
+                             "Wrong staged path: %s" % staged_file)
+            self.assertEqual('relative', utilities.root_path('relative'),
+                             "Relative paths should not be moved")
+            self.assertEqual("system\n", utilities.read_file(system_file),
+                             "Read did not fall back to system file")
+            self.assertTrue(utilities.atomic_write(system_file, "staged\n"),
+                            "Writing staged file failed")
+            self.assertEqual("system\n", open(system_file).read(),
+                             "System file was changed")
+            self.assertEqual("staged\n", utilities.read_file(system_file),
+                             "Read did not use staged file")
+        finally:
+            utilities.set_root(None)
+            shutil.rmtree(temp_dir)
+        self.assertEqual(system_file, utilities.root_path(system_file),
+                         "Path moved after root was reset")
+
+    def test_write_transaction(self):
+        """
+        Check that files written in a transaction are kept on commit and
+        restored on rollback
+        """
+        temp_dir = tempfile.mkdtemp()
+        existing_file = os.path.join(temp_dir, 'existing')
+        new_file = os.path.join(temp_dir, 'new')
+        try:
+            open(existing_file, 'w').write("old contents\n")
+            os.chmod(existing_file, 0600)
+
+            transaction = utilities.begin_transaction()
+            self.assertTrue(utilities.atomic_write(existing_file, "new contents\n"),
+                            "Writing existing file failed")
+            self.assertTrue(utilities.atomic_write(existing_file, "newer contents\n"),
+                            "Writing existing file twice failed")
+            self.assertTrue(utilities.atomic_write(new_file, "contents\n"),
+                            "Writing new file failed")
+            self.assertEqual("newer contents\n", open(existing_file).read(),
+                             "Written contents not visible during transaction")
+            self.assertEqual(2, len(transaction.files()),
+                             "Wrong files in transaction: %s" % transaction.files())
+            self.assertTrue(transaction.rollback(), "Rollback failed")
+            self.assertEqual("old contents\n", open(existing_file).read(),
+                             "Existing file not restored")
+            self.assertEqual(0600, stat.S_IMODE(os.stat(existing_file).st_mode),
+                             "Permissions of existing file not restored")
+            self.assertFalse(os.path.exists(new_file), "New file not removed")
+            self.assertEqual(['existing'], os.listdir(temp_dir),
+                             "Files left behind after rollback: %s" % os.listdir(temp_dir))
+
+            transaction = utilities.begin_transaction()
+            self.assertTrue(utilities.atomic_write(existing_file, "new contents\n"),
+                            "Writing existing file failed")
+            self.assertTrue(utilities.atomic_write(new_file, "contents\n"),
+                            "Writing new file failed")
+            self.assertTrue(transaction.commit(), "Commit failed")
+            self.assertEqual("new contents\n", open(existing_file).read(),
+                             "Existing file not updated")
+            self.assertEqual("contents\n", open(new_file).read(),
+                             "New file not written")
+            self.assertEqual(['existing', 'new'], sorted(os.listdir(temp_dir)),
+                             "Files left behind after commit: %s" % os.listdir(temp_dir))
+
+            self.assertTrue(utilities.atomic_write(new_file, "more contents\n"),
+                            "Writing after transaction failed")
+            self.assertEqual(2, len(transaction.files()),
+                             "Write after commit was added to the transaction")
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_transaction_remove(self):
+        """
+        Check that files and directories removed in a transaction are gone
+        on commit and put back on rollback
+        """
+        temp_dir = tempfile.mkdtemp()
+        conf_file = os.path.join(temp_dir, 'metric.conf')
+        host_dir = os.path.join(temp_dir, 'host')
+        host_file = os.path.join(host_dir, 'allmetrics.conf')
+        try:
+            open(conf_file, 'w').write("enabled\n")
+            os.mkdir(host_dir)
+            open(host_file, 'w').write("old contents\n")
+
+            transaction = utilities.begin_transaction()
+            utilities.remove_path(conf_file)
+            utilities.remove_path(host_dir)
+            self.assertFalse(os.path.exists(conf_file), "File not removed during transaction")
+            self.assertFalse(os.path.exists(host_dir), "Directory not removed during transaction")
+            os.mkdir(host_dir)
+            self.assertTrue(utilities.atomic_write(host_file, "new contents\n"),
+                            "Writing to recreated directory failed")
+            self.assertTrue(transaction.rollback(), "Rollback failed")
+            self.assertEqual("enabled\n", open(conf_file).read(), "Removed file not restored")
+            self.assertEqual("old contents\n", open(host_file).read(), "Removed directory not restored")
+            self.assertEqual(['host', 'metric.conf'], sorted(os.listdir(temp_dir)),
+                             "Files left behind after rollback: %s" % os.listdir(temp_dir))
+
+            transaction = utilities.begin_transaction()
+            utilities.remove_path(conf_file)
+            utilities.remove_path(host_dir)
+            self.assertTrue(transaction.commit(), "Commit failed")
+            self.assertEqual([], os.listdir(temp_dir),
+                             "Files left behind after commit: %s" % os.listdir(temp_dir))
+        finally:
+            shutil.rmtree(temp_dir)
+
     def test_get_set_membership(self):
         """
         Test get_set_membership functionality
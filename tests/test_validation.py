@@ -188,38 +188,35 @@ class TestValidation(unittest.TestCase):
         self.assertTrue(validation.valid_ini_file(filename),
                         "Got error on valid file %s" % filename)
 
-    # Functionality has been broken for several versions and not going to be added in
-    # 1.0.40 will be fixed for 1.0.41
-    #   def test_valid_references(self):
-    #     """
-    #     Test functionality of invalid_references_exist and make sure
-    #     it catches invalid references correctly and lets valid references
-    #     go
-    #     """
-    #     filename = get_test_config('utilities/invalid_ref1.ini')
-    #     _stderr = sys.stderr
-    #     sys.stderr = file(os.devnull, 'wb')
-    #     # need to do this instead of putting this in assert so that stderr can
-    #     # be restored after call
-    #     result = validation.valid_ini_references(filename)
-    #     sys.stderr = _stderr
-    #     self.assertFalse(result,
-    #                      "Didn't detect invalid reference in %s" % filename)
-    #
-    #     filename = get_test_config('utilities/invalid_ref2.ini')
-    #     _stderr = sys.stderr
-    #     sys.stderr = file(os.devnull, 'wb')
-    #     # need to do this instead of putting this in assert so that stderr can
-    #     # be restored after call
-    #     result = validation.valid_ini_references(filename)
-    #     sys.stderr = _stderr
-    #     self.assertFalse(result,
-    #                      "Didn't detect invalid reference in %s" % filename)
-    #
-    #     filename = get_test_config('utilities/valid_ref1.ini')
-    #     self.assertTrue(validation.valid_ini_references(filename),
-    #                     "Got error on valid file %s" % filename)
+    def test_valid_references(self):
+        """
+        Test functionality of invalid_references_exist and make sure
+        it catches invalid references correctly and lets valid references
+        go
+        """
+        filename = get_test_config('utilities/invalid_ref1.ini')
+        _stderr = sys.stderr
+        sys.stderr = file(os.devnull, 'wb')
+        # need to do this instead of putting this in assert so that stderr can
+        # be restored after call
+        result = validation.valid_ini_references(filename)
+        sys.stderr = _stderr
+        self.assertFalse(result,
+                         "Didn't detect invalid reference in %s" % filename)
 
+        filename = get_test_config('utilities/invalid_ref2.ini')
+        _stderr = sys.stderr
+        sys.stderr = file(os.devnull, 'wb')
+        # need to do this instead of putting this in assert so that stderr can
+        # be restored after call
+        result = validation.valid_ini_references(filename)
+        sys.stderr = _stderr
+        self.assertFalse(result,
+                         "Didn't detect invalid reference in %s" % filename)
+
+        filename = get_test_config('utilities/valid_ref1.ini')
+        self.assertTrue(validation.valid_ini_references(filename),
+                        "Got error on valid file %s" % filename)
 
     def test_valid_contact(self):
         """
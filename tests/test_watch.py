@@ -0,0 +1,64 @@
+"""Unit tests to test the directory watcher"""
+
+# pylint: disable=W0703
+# pylint: disable=R0904
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# setup system library path
+pathname = os.path.realpath('../')
+sys.path.insert(0, pathname)
+
+from osg_configure.modules import watch
+
+
+class TestWatch(unittest.TestCase):
+    """Unit test class to test the directory watcher"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def check_watcher(self, watcher):
+        """
+        Check that watcher reports created, changed and removed files
+        """
+        filename = os.path.join(self.temp_dir, '10-test.ini')
+        try:
+            self.assertEqual(set(), watcher.wait(0.1), "Change reported in unchanged directory")
+            open(filename, 'w').write("[Test]\nfoo = bar\n")
+            self.assertEqual(set(['10-test.ini']), watcher.wait(5),
+                             "New file not reported")
+            open(filename, 'a').write("baz = 1\n")
+            self.assertEqual(set(['10-test.ini']), watcher.wait(5),
+                             "Changed file not reported")
+            os.unlink(filename)
+            self.assertEqual(set(['10-test.ini']), watcher.wait(5),
+                             "Removed file not reported")
+        finally:
+            watcher.close()
+
+    def test_watch(self):
+        """
+        Check changes reported by the watcher, using inotify if available
+        """
+        self.check_watcher(watch.DirectoryWatcher(self.temp_dir))
+
+    def test_polling(self):
+        """
+        Check changes reported by the watcher when falling back to polling
+        """
+        watcher = watch.DirectoryWatcher(self.temp_dir, poll_interval=0.1)
+        watcher.close()
+        self.assertFalse(watcher.using_inotify(), "Watcher still using inotify")
+        self.check_watcher(watcher)
+
+
+if __name__ == '__main__':
+    unittest.main()